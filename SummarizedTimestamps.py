@@ -1,19 +1,94 @@
-from sentence_transformers import SentenceTransformer, util
 import json
 import os
-import torch
-
-# Load sentence embedding model
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
-
-def match_summary_to_timestamps(summary_file, transcript_file, output_file="downloads/summary_with_timestamps.json"):
+import numpy as np
+from model_registry import EMBEDDING_MODEL, get_embedder
+from embedding_store import EMBEDDING_BATCH_SIZE, encode_normalized, load_or_encode, similarity_matrix
+from instrumentation import record_failure
+from sentences import split_summary_sentences
+
+def assign_greedy(scores):
+    """
+    Give each summary sentence (row), in order, its most similar transcript segment
+    that no earlier sentence took. At most S-1 segments are taken before any row,
+    so only each row's top-S candidates are needed instead of a full sort.
+    """
+    scores = np.asarray(scores)
+    num_summary, num_transcript = scores.shape
+    k = min(num_summary, num_transcript)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    top_indices = np.take_along_axis(top, order, axis=1).tolist()
+
+    used_indices = set()  # Track used transcript indices
+    assignment = []
+    for candidates in top_indices:
+        best_idx = next((idx for idx in candidates if idx not in used_indices), None)
+        if best_idx is None:
+            # Fallback: if everything is used, just take the highest one
+            best_idx = candidates[0]
+        used_indices.add(best_idx)
+        assignment.append(best_idx)
+    return assignment
+
+
+def assign_optimal(scores):
+    """
+    Unique assignment that maximizes total similarity (Hungarian algorithm, needs scipy).
+    Sentences left over when there are more sentences than segments take their best match.
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    matrix = np.asarray(scores)
+    rows, cols = linear_sum_assignment(matrix, maximize=True)
+    assignment = matrix.argmax(axis=1).tolist()
+    for row, col in zip(rows, cols):
+        assignment[row] = int(col)
+    return assignment
+
+
+ASSIGNMENT_METHODS = {
+    "greedy": assign_greedy,
+    "optimal": assign_optimal,
+}
+
+
+def assign_segments(scores, method="greedy"):
+    """Pick one transcript segment index per summary sentence from an S x T score matrix."""
+    if method not in ASSIGNMENT_METHODS:
+        raise ValueError(f"Unknown assignment method: {method}")
+    return ASSIGNMENT_METHODS[method](scores)
+
+
+def build_matches(summary_sentences, transcript, best_indices):
+    """Result rows in the summary_with_timestamps.json format."""
+    results = []
+    for summ_sent, best_idx in zip(summary_sentences, best_indices):
+        match = transcript[best_idx]
+
+        results.append({
+            "summary_sentence": summ_sent,
+            "timestamp": f"{match['start']} --> {match['end']}",
+            "matched_text": match["text"]
+        })
+    return results
+
+
+def match_summary_to_timestamps(summary_file, transcript_file, output_file="downloads/summary_with_timestamps.json",
+                                model_name=EMBEDDING_MODEL, assignment="greedy", batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Match each summary sentence to a distinct transcript segment.
+    assignment="greedy" keeps sentence order priority; "optimal" maximizes total similarity.
+    """
     try:
+        # Sentence embedding model is loaded on first use and shared
+        embedder = get_embedder(model_name)
+
         # Load summary text
         with open(summary_file, "r", encoding="utf-8") as f:
             summary_text = f.read().strip()
 
         # Split summary into sentences
-        summary_sentences = [s.strip() for s in summary_text.split(".") if s.strip()]
+        summary_sentences = split_summary_sentences(summary_text)
 
         # Load transcript with timestamps
         with open(transcript_file, "r", encoding="utf-8") as f:
@@ -21,38 +96,16 @@ def match_summary_to_timestamps(summary_file, transcript_file, output_file="down
 
         transcript_texts = [seg["text"] for seg in transcript]
 
-        # Encode sentences
-        transcript_embeddings = embedder.encode(transcript_texts, convert_to_tensor=True)
-        summary_embeddings = embedder.encode(summary_sentences, convert_to_tensor=True)
-
-        results = []
-        used_indices = set()  # Track used transcript indices
-
-        # Match each summary sentence to closest transcript sentence
-        for i, summ_sent in enumerate(summary_sentences):
-            cosine_scores = util.cos_sim(summary_embeddings[i], transcript_embeddings)[0]
-
-            # Sort transcript indices by similarity score (highest first)
-            sorted_indices = torch.argsort(cosine_scores, descending=True)
-
-            best_idx = None
-            for idx in sorted_indices:
-                if int(idx) not in used_indices:
-                    best_idx = int(idx)
-                    used_indices.add(best_idx)
-                    break
-
-            if best_idx is None:
-                # Fallback: if everything is used, just take the highest one
-                best_idx = int(sorted_indices[0])
+        # Transcript embeddings are stored once per transcript and memory-mapped on reuse,
+        # so re-matching a new summary only encodes the summary sentences
+        transcript_embeddings = load_or_encode(embedder, model_name, transcript_texts, batch_size=batch_size)
+        summary_embeddings = encode_normalized(embedder, summary_sentences, batch_size=batch_size)
 
-            match = transcript[best_idx]
+        # Whole summary x transcript similarity matrix in one batched operation
+        scores = similarity_matrix(summary_embeddings, transcript_embeddings)
+        best_indices = assign_segments(scores, method=assignment)
 
-            results.append({
-                "summary_sentence": summ_sent,
-                "timestamp": f"{match['start']} --> {match['end']}",
-                "matched_text": match["text"]
-            })
+        results = build_matches(summary_sentences, transcript, best_indices)
 
         # Save results
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
@@ -64,5 +117,6 @@ def match_summary_to_timestamps(summary_file, transcript_file, output_file="down
 
     except Exception as e:
         print(f"⚠️ Error: {e}")
+        record_failure(e)
         return None
 
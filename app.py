@@ -1,109 +1,147 @@
-from flask import Flask, render_template, request, send_from_directory, redirect, url_for
+from flask import Flask, render_template, request, send_from_directory, redirect, url_for, jsonify, Response, \
+    stream_with_context
 import os
-import time
+import json
+import sqlite3
 from werkzeug.utils import secure_filename
-from download import download_youtube_video
-from download_audio import extract_audio
-from transcript import transcribe_audio
-from timestamps import generate_transcript_with_timestamps
-from summarize_content import extract_main_points
-from SummarizedTimestamps import match_summary_to_timestamps
-from summarized_video import create_summarized_video
+from extractive_summary import SCORING_METHODS
+from model_registry import registry
+from inference_profiles import PROFILES
+from instrumentation import METRICS_DIR, render_metrics
+from jobs import JobManager, QueueFullError
+from job_queue import SqliteJobQueue
+from pipeline import DOWNLOAD_FOLDER, artifact_cache, profile_report_path, run_summarization_job
+from workspace import Workspace
+from warmup import WARMUP_ENABLED, Warmup
+from upload_stream import StreamingUploadRequest
+from summarize_content import level_cache
 
 app = Flask(__name__)
 
-# Folder paths
-DOWNLOAD_FOLDER = os.path.abspath("downloads")  # absolute path ensures Flask finds the file
-UPLOAD_FOLDER = os.path.abspath("uploads")
+# Uploads are streamed to disk in chunks and hashed while they arrive (see upload_stream)
+app.request_class = StreamingUploadRequest
+
+# Finished outputs (DOWNLOAD_FOLDER is absolute so Flask finds the files); uploads and
+# intermediates live in each job's workspace
 os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 app.config["DOWNLOAD_FOLDER"] = DOWNLOAD_FOLDER
-app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+
+# Where summarization jobs run: "local" runs them on a thread pool inside this server,
+# "sqlite" queues them for separate worker processes (see worker.py)
+JOB_QUEUE = os.environ.get("QUICKCLIPS_QUEUE", "local")
+jobs = SqliteJobQueue() if JOB_QUEUE == "sqlite" else JobManager()
+
+# Background model preload; started once the server is up (or by the first readiness probe).
+# In "sqlite" mode the models run in the workers, which warm up themselves, so this server
+# loads none and is ready once it can reach the queue database
+PRELOAD_MODELS = WARMUP_ENABLED and JOB_QUEUE != "sqlite"
+warmup = Warmup()
+
+# Form value -> pipeline output type
+OUTPUT_TYPES = {
+    "summarized_video": "video",
+    "summarized_audio": "audio",
+    "summarized_text": "text",
+}
+
+# Form value -> summarizer ("extractive" is the default extractive scorer)
+SUMMARIZERS = {"abstractive": "abstractive", "hierarchical": "hierarchical", "extractive": "centrality"}
+SUMMARIZERS.update({method: method for method in SCORING_METHODS})
 
 # Allowed video formats
 ALLOWED_EXTENSIONS = {'mp4', 'mov', 'avi', 'mkv'}
 
+# Browser cache lifetime of finished outputs (one year; every job writes a new file name)
+OUTPUT_MAX_AGE = 365 * 24 * 3600
+
 def allowed_file(filename):
     """Check if uploaded file has a valid extension"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def summarize_video_pipeline(video_path):
-    """
-    Full video summarization pipeline.
-    Always outputs downloads/summarized_video.mp4
-    """
-    if not video_path or not os.path.exists(video_path):
-        print("❌ No video provided or file does not exist.")
-        return None
+def is_summary_file(filename):
+    """Text summaries are written as summarized_<job>.json; their profile reports are not summaries"""
+    return (filename.startswith("summarized_") and filename.endswith(".json")
+            and not filename.endswith(".profile.json"))
 
-    downloads_dir = app.config["DOWNLOAD_FOLDER"]
-    os.makedirs(downloads_dir, exist_ok=True)
 
-    # Fixed output filename
-    output_video_path = os.path.join(downloads_dir, "summarized_video.mp4")
+@app.route('/')
+def index():
+    return render_template('index.html')
 
-    # Intermediate files with timestamp to avoid collisions
-    timestamp = int(time.time())
-    audio_file = os.path.join(downloads_dir, f"audio_{timestamp}.wav")
-    transcript_txt_file = os.path.join(downloads_dir, f"transcript_{timestamp}.txt")
-    transcript_json_file = os.path.join(downloads_dir, f"transcript_{timestamp}.json")
-    summary_file = os.path.join(downloads_dir, f"summary_{timestamp}.txt")
-    timestamps_file = os.path.join(downloads_dir, f"timestamps_{timestamp}.json")
 
-    try:
-        # 1️⃣ Extract audio
-        print("🎵 Extracting audio...")
-        extract_audio(video_path, output_audio_path=audio_file)
-
-        # 2️⃣ Transcribe audio
-        print("📝 Transcribing audio...")
-        transcribe_audio(audio_file, output_dir=downloads_dir,
-                         output_file=os.path.basename(transcript_txt_file))
-
-        # 3️⃣ Generate transcript with timestamps
-        print("⏱ Generating transcript with timestamps...")
-        generate_transcript_with_timestamps(audio_file, output_file=transcript_json_file)
-
-        # 4️⃣ Extract main points
-        print("📝 Extracting main points...")
-        extract_main_points(transcript_txt_file, output_file=summary_file,
-                            max_length=200, min_length=50)
-
-        # 5️⃣ Match summary to timestamps
-        print("🔗 Matching summary sentences with timestamps...")
-        match_summary_to_timestamps(summary_file, transcript_json_file,
-                                    output_file=timestamps_file)
-
-        # 6️⃣ Create summarized video
-        print("🎬 Creating summarized video...")
-        output_video = create_summarized_video(video_path, timestamps_file, output_video_path)
-
-        # Cleanup intermediates
-        for f in [audio_file, transcript_txt_file, transcript_json_file, summary_file, timestamps_file]:
-            try:
-                if os.path.exists(f):
-                    os.remove(f)
-            except Exception as e:
-                print(f"⚠️ Could not delete {f}: {e}")
-
-        # Confirm video exists
-        if output_video and os.path.exists(output_video):
-            print(f"✅ Summarized video created at: {output_video}")
-            return output_video
-        else:
-            print("⚠️ Summarized video could not be created.")
-            return None
-
-    except Exception as e:
-        print(f"⚠️ Error while creating summarized video: {e}")
-        return None
+@app.route('/metrics')
+def metrics():
+    """
+    Per-stage and per-ffmpeg-run histograms in the Prometheus text format. With the sqlite
+    queue the stages run in the workers, so their snapshots (METRICS_DIR) are added in.
+    """
+    snapshot_dir = METRICS_DIR if JOB_QUEUE == "sqlite" else None
+    return Response(render_metrics(snapshot_dir), mimetype="text/plain; version=0.0.4")
 
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({"status": "ok"})
+
+
+@app.route('/readyz')
+def readyz():
+    """
+    Readiness: 200 once the default profile's models are loaded, 503 while they load.
+    With the sqlite queue: 200 while the queue database is reachable.
+    """
+    if JOB_QUEUE == "sqlite":
+        try:
+            return jsonify({"ready": True, "queue": jobs.stats()})
+        except sqlite3.Error as e:
+            return jsonify({"ready": False, "error": f"Queue database unavailable: {e}"}), 503
+    if PRELOAD_MODELS:
+        warmup.start()
+    ready = warmup.ready()
+    return jsonify({"ready": ready, "warmup": warmup.status()}), 200 if ready else 503
+
+
+@app.route('/models')
+def model_stats():
+    """Load time and resident size of every model held by this process"""
+    return jsonify({
+        "ram_budget_mb": registry.ram_budget_bytes // (1024 * 1024),
+        "models": registry.stats(),
+    })
+
+
+@app.route('/profiles/<filename>')
+def profile_report(filename):
+    """Per-stage latency and memory of the job that produced this result"""
+    report_path = profile_report_path(os.path.join(app.config["DOWNLOAD_FOLDER"], secure_filename(filename)))
+    if not os.path.exists(report_path):
+        return jsonify({"error": "Report not found"}), 404
+    with open(report_path, "r", encoding="utf-8") as f:
+        return jsonify(json.load(f))
+
+
+@app.route('/cache')
+def cache_stats():
+    """Size and hit/miss counters of the artifact cache and, separately, the summary-level cache"""
+    return jsonify(dict(artifact_cache.stats(), summary_levels=level_cache.stats()))
+
+
+def send_output(filename, mimetype):
+    """
+    Send a finished output with byte-range support (206 / 416), an ETag and
+    If-None-Match / If-Modified-Since handling (304), so players can seek and
+    revisits are not downloaded again. Output names are unique per job and the
+    files are never rewritten, so they may be cached for a long time.
+    """
+    response = send_from_directory(app.config["DOWNLOAD_FOLDER"], filename, mimetype=mimetype,
+                                   conditional=True, etag=True, max_age=OUTPUT_MAX_AGE)
+    response.headers["Accept-Ranges"] = "bytes"
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 
 @app.route('/video/<filename>')
@@ -112,7 +150,7 @@ def serve_video(filename):
     video_path = os.path.join(app.config["DOWNLOAD_FOLDER"], filename)
     if not os.path.exists(video_path):
         return "❌ Video not found", 404
-    return send_from_directory(app.config["DOWNLOAD_FOLDER"], filename, mimetype='video/mp4')
+    return send_output(filename, 'video/mp4')
 
 
 @app.route('/watch/<filename>')
@@ -130,7 +168,7 @@ def watch_video(filename):
     <body style="background-color:black; color:white;">
         <h2 style="align-items:center;text-align:center;">Summarized Video</h2>
         <video width="720" controls autoplay>
-            <source src="/video/{filename}?t={int(time.time())}" type="video/mp4">
+            <source src="/video/{filename}" type="video/mp4">
             Your browser does not support the video tag.
         </video>
     </body>
@@ -138,54 +176,157 @@ def watch_video(filename):
     """
 
 
+@app.route('/audio/<filename>')
+def serve_audio(filename):
+    """Serve summarized audio for browser playback"""
+    audio_path = os.path.join(app.config["DOWNLOAD_FOLDER"], filename)
+    if not filename.endswith(".wav") or not os.path.exists(audio_path):
+        return "❌ Audio not found", 404
+    return send_output(filename, 'audio/wav')
+
+
+@app.route('/listen/<filename>')
+def listen_audio(filename):
+    """Render HTML page with audio player"""
+    audio_path = os.path.join(app.config["DOWNLOAD_FOLDER"], filename)
+    if not filename.endswith(".wav") or not os.path.exists(audio_path):
+        return render_template("error.html", message="❌ Audio not found."), 404
+    return render_template("listen.html", filename=filename)
+
+
+@app.route('/summary/<filename>')
+def read_summary(filename):
+    """Summary text with the timestamp of every sentence, as a page or as JSON"""
+    filename = secure_filename(filename)
+    summary_path = os.path.join(app.config["DOWNLOAD_FOLDER"], filename)
+    if not is_summary_file(filename) or not os.path.exists(summary_path):
+        return render_template("error.html", message="❌ Summary not found."), 404
+    with open(summary_path, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    if wants_json():
+        return jsonify(result)
+    return render_template("summary.html", summary=result["summary"], timestamps=result["timestamps"])
+
+
+def job_status(job):
+    """Public view of a job, including where to watch the result once it is ready."""
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "stage_label": job["stage_label"],
+        "stage_index": job["stage_index"],
+        "stage_count": job["stage_count"],
+        "percent": job["percent"],
+        "message": job["message"],
+        "error": job["error"],
+        "result_url": result_url(job["result"]) if job["result"] else None,
+        "profile_url": url_for('profile_report', filename=job["result"]) if job["result"] else None,
+    }
+
+
+def result_url(filename):
+    """Where to view a finished result, by its type."""
+    if filename.endswith(".json"):
+        return url_for('read_summary', filename=filename)
+    if filename.endswith(".wav"):
+        return url_for('listen_audio', filename=filename)
+    return url_for('watch_video', filename=filename)
+
+
+def wants_json():
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'application/json'
+
+
 @app.route('/process', methods=['POST'])
 def process():
     youtube_url = request.form.get('yturl')
     video_file = request.files.get('videofile')
     summarization_type = request.form.get('summarization_type')
 
-    video_path = None
+    output_type = OUTPUT_TYPES.get(summarization_type)
+    if output_type is None:
+        return render_template("error.html", message="⚠️ Unsupported summarization type."), 400
+
+    summarizer = SUMMARIZERS.get(request.form.get('summarizer') or "abstractive")
+    if summarizer is None:
+        return render_template("error.html", message="⚠️ Unsupported summarizer."), 400
 
-    # Case 1: YouTube video
-    if youtube_url:
-        video_path = download_youtube_video(youtube_url)
-        if not video_path or not os.path.exists(video_path):
-            return render_template("error.html", message="❌ Failed to download video."), 400
+    profile = request.form.get('profile') or None
+    if profile is not None and profile not in PROFILES:
+        return render_template("error.html", message="⚠️ Unsupported inference profile."), 400
 
-    # Case 2: Uploaded video
-    elif video_file and video_file.filename:
+    workspace = Workspace()
+    video_path = None
+    content_hash = None
+
+    # Case 1: YouTube video is downloaded inside the job
+    # Case 2: Uploaded video is saved now, before the request ends
+    if not youtube_url and video_file and video_file.filename:
         if not allowed_file(video_file.filename):
+            workspace.cleanup()
             return render_template("error.html", message="❌ Invalid file type."), 400
         filename = secure_filename(video_file.filename)
-        video_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        video_file.save(video_path)
-    else:
+        # Already on disk and hashed; moving it into the workspace copies nothing
+        video_path = video_file.stream.move_to(workspace.path(filename))
+        content_hash = video_file.stream.hexdigest()
+    elif not youtube_url:
+        workspace.cleanup()
         return render_template("error.html", message="❌ Provide YouTube URL or upload a video."), 400
 
-    if summarization_type == 'summarized_video':
-        summarized_video_path = summarize_video_pipeline(video_path)
-        if not summarized_video_path:
-            return render_template("error.html", message="❌ Summarization failed."), 500
-
-        # Cleanup uploaded file
-        if youtube_url is None and video_file:
-            try:
-                os.remove(video_path)
-            except Exception as e:
-                print(f"⚠️ Could not delete uploaded file: {e}")
-
-        # Redirect to fixed filename
-        return redirect(url_for('watch_video', filename="summarized_video.mp4"))
-
-    elif summarization_type == 'summarized_text':
-        return render_template("error.html", message="⚠️ Text summarization not implemented yet."), 400
-
-    elif summarization_type == 'summarized_audio':
-        return render_template("error.html", message="⚠️ Audio summarization not implemented yet."), 400
-
-    else:
-        return render_template("error.html", message="⚠️ Unsupported summarization type."), 400
+    try:
+        job_id = jobs.submit(run_summarization_job, workspace.job_id,
+                             youtube_url=youtube_url or None, video_path=video_path, content_hash=content_hash,
+                             output_type=output_type, summarizer=summarizer, profile=profile)
+    except QueueFullError as e:
+        workspace.cleanup()
+        return render_template("error.html", message=f"⚠️ {e}"), 503
+
+    if wants_json():
+        return jsonify({
+            "job_id": job_id,
+            "status_url": url_for('job_status_json', job_id=job_id),
+            "events_url": url_for('job_events', job_id=job_id),
+        }), 202
+    return redirect(url_for('job_page', job_id=job_id))
+
+
+@app.route('/jobs/<job_id>')
+def job_page(job_id):
+    """Progress page that follows the job and opens the video when it is ready"""
+    if jobs.get(job_id) is None:
+        return render_template("error.html", message="❌ Job not found."), 404
+    return render_template("job.html", job_id=job_id)
+
+
+@app.route('/jobs/<job_id>/status')
+def job_status_json(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_status(job))
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events stream with one message per progress update"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def stream(job):
+        while job is not None:
+            yield f"data: {json.dumps(job_status(job))}\n\n"
+            if job["status"] in ("done", "failed"):
+                break
+            job = jobs.wait_for_change(job_id, job["version"])
+
+    return Response(stream_with_context(stream(job)), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 if __name__ == '__main__':
-    app.run(debug=True, use_reloader=False)
+    if PRELOAD_MODELS:
+        warmup.start()  # loads in the background while the server binds and starts serving
+    app.run(debug=True, use_reloader=False, threaded=True)
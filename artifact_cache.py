@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Persistent cache of pipeline artifacts (transcript segments, summary, matched timestamps)
+CACHE_DIR = os.path.abspath(os.environ.get("QUICKCLIPS_CACHE_DIR", "cache"))
+CACHE_MAX_MB = int(os.environ.get("QUICKCLIPS_CACHE_MAX_MB", "512"))
+
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(source_key, **params):
+    """Key an entry by its source (content hash / video id) plus model names and parameters."""
+    payload = json.dumps({"source": source_key, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Directory of JSON entries, one per cache key.
+    File modification time doubles as the last-access time, so LRU eviction
+    survives restarts and is shared by every process using the same directory.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_mb=CACHE_MAX_MB):
+        self.root = os.path.join(root, "artifacts")
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached artifacts for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                artifacts = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return artifacts
+
+    def put(self, key, artifacts):
+        """Store artifacts under a key, then evict old entries beyond the size limit."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry = dict(artifacts, created_at=time.time())
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)  # atomic, readers never see a partial entry
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.root, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def evict(self):
+        """Delete least-recently-used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.root, name))
+                    total -= size
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(entries),
+                "size_mb": round(sum(size for _, size, _ in entries) / (1024 * 1024), 2),
+                "max_mb": self.max_bytes // (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
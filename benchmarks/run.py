@@ -0,0 +1,233 @@
+"""
+Offline pipeline benchmark.
+
+    python -m benchmarks.run --minutes 1 5 --resolution 1280x720 --segments 20
+    python -m benchmarks.run --save-baseline          # record benchmarks/baseline.json
+    python -m benchmarks.run --fail-on-regression     # compare against it, exit 1 if slower
+
+Synthetic videos are generated with ffmpeg's lavfi sources and the models are replaced by
+stand-ins (see stand_in_models), so no network is needed and the timings isolate the
+media and pipeline code. --real-models uses the real weights instead, offline, which only
+works when they are already in the local cache.
+
+pipeline_seconds is the wall-clock time of one real summarize_video_pipeline run on each
+video; the per-stage timings are taken separately, each run on a cold cache.
+"""
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from benchmarks.synthetic_media import make_test_video
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# A stage only counts as regressed when it is this much slower and the difference is
+# above the noise floor
+REGRESSION_TOLERANCE = 0.2
+NOISE_FLOOR_SECONDS = 0.05
+
+
+def use_private_cache():
+    """
+    Point the artifact cache at a fresh directory, never the real cache, so a run is never
+    warmed by an earlier one; removed at exit. Must run before the pipeline modules are
+    imported, since they read QUICKCLIPS_CACHE_DIR then.
+    """
+    cache_dir = tempfile.mkdtemp(prefix="quickclips_benchmark_cache_")
+    os.environ["QUICKCLIPS_CACHE_DIR"] = cache_dir
+    atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)
+    return cache_dir
+
+
+def clear_cache(cache_dir):
+    """Delete every cached artifact so the next run starts cold (the directories are kept)."""
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            os.remove(os.path.join(root, name))
+
+
+def time_pipeline(video, profile):
+    """Wall-clock seconds of one real end-to-end summarize_video_pipeline run, or None if it failed."""
+    from pipeline import profile_report_path, summarize_video_pipeline
+
+    started = time.perf_counter()
+    output = summarize_video_pipeline(video, profile=profile, streaming=False)
+    seconds = time.perf_counter() - started
+    if output is None:
+        return None
+    for path in (output, profile_report_path(output)):
+        if os.path.exists(path):
+            os.remove(path)
+    return seconds
+
+
+def run_case(minutes, width, height, segments, profile, cache_dir):
+    """
+    Generate one synthetic video, time a full pipeline run and then every stage on it,
+    each on a cold cache. Returns the case result.
+    """
+    from download_audio import load_audio_pcm
+    from transcript import transcribe_with_timestamps
+    from summarize_content import extract_main_points
+    from SummarizedTimestamps import match_summary_to_timestamps
+    from summarized_video import create_summarized_video
+    from summarized_audio import create_summarized_audio
+    from instrumentation import StageReport, file_size
+    from workspace import Workspace
+
+    with Workspace() as workspace:
+        video = make_test_video(workspace.path("input.mp4"), seconds=minutes * 60,
+                                width=width, height=height, segments=segments)
+        if video is None:
+            return None
+
+        clear_cache(cache_dir)
+        pipeline_seconds = time_pipeline(video, profile)
+
+        # The per-stage timings below must not reuse what the full run just cached
+        clear_cache(cache_dir)
+        transcript_txt = workspace.path("transcript.txt")
+        transcript_json = workspace.path("transcript.json")
+        summary = workspace.path("summary.txt")
+        timestamps = workspace.path("timestamps.json")
+        report = StageReport(profile)
+
+        with report.stage("extract_audio", input_bytes=file_size(video)):
+            audio = load_audio_pcm(video)
+        with report.stage("transcribe", audio_seconds=minutes * 60):
+            transcribe_with_timestamps(audio, transcript_txt, transcript_json,
+                                       model_name=profile["whisper_model"], long_form=False)
+        with report.stage("main_points"):
+            extract_main_points(transcript_txt, output_file=summary, model_name=profile["summarizer_model"])
+        with report.stage("match"):
+            match_summary_to_timestamps(summary, transcript_json, output_file=timestamps,
+                                        model_name=profile["embedding_model"])
+        with report.stage("render"):
+            create_summarized_video(video, timestamps, workspace.path("render.mp4"),
+                                    temp_clips_dir=workspace.path("auto_clips"), plan_file=workspace.path("plan.json"))
+        with report.stage("render_single_pass"):
+            create_summarized_video(video, timestamps, workspace.path("single_pass.mp4"), renderer="single_pass",
+                                    plan_file=workspace.path("plan.json"))
+        with report.stage("render_per_clip"):
+            create_summarized_video(video, timestamps, workspace.path("per_clip.mp4"),
+                                    temp_clips_dir=workspace.path("clips"), renderer="per_clip",
+                                    plan_file=workspace.path("plan.json"))
+        with report.stage("render_audio"):
+            create_summarized_audio(audio, timestamps, workspace.path("summary.wav"))
+
+    stages = {s["stage"]: s["seconds"] for s in report.stages}
+    failed_stages = [s["stage"] for s in report.stages if s["failed"]]
+    if pipeline_seconds is None:
+        failed_stages.insert(0, "pipeline")
+    else:
+        stages = dict(pipeline=round(pipeline_seconds, 3), **stages)
+    return {
+        "minutes": minutes,
+        "resolution": f"{width}x{height}",
+        "segments": segments,
+        "stages": stages,
+        "failed_stages": failed_stages,
+        "pipeline_seconds": round(pipeline_seconds, 3) if pipeline_seconds is not None else None,
+        # Video minutes processed per wall-clock minute of one end-to-end pipeline run
+        "throughput": round(minutes / (pipeline_seconds / 60), 2) if pipeline_seconds else None,
+    }
+
+
+def case_key(case):
+    return f"{case['minutes']}min-{case['resolution']}-{case['segments']}seg"
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Per-stage ratio against the baseline; returns the list of regressions."""
+    regressions = []
+    for key, case in results.items():
+        base = baseline.get("cases", {}).get(key)
+        if base is None:
+            print(f"ℹ️ {key}: no baseline")
+            continue
+        print(f"\n{key}: {case['throughput']} video-min/min (baseline {base['throughput']})")
+        print(f"{'stage':<16} {'seconds':>9} {'baseline':>9} {'ratio':>7}")
+        for stage, seconds in case["stages"].items():
+            base_seconds = base["stages"].get(stage)
+            if base_seconds is None:
+                continue
+            ratio = seconds / base_seconds if base_seconds else float("inf")
+            slower = ratio > 1 + tolerance and seconds - base_seconds > NOISE_FLOOR_SECONDS
+            if slower:
+                regressions.append(f"{key} {stage}: {base_seconds:.2f}s -> {seconds:.2f}s")
+            print(f"{stage:<16} {seconds:>9.2f} {base_seconds:>9.2f} {ratio:>7.2f}{'  SLOWER' if slower else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline QuickClips pipeline benchmark")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1.0, 5.0], help="Video lengths to test")
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--segments", type=int, default=20, help="Tone segments (stand-in speech turns) per video")
+    parser.add_argument("--real-models", action="store_true",
+                        help="Use the real models from the local cache instead of the stand-ins")
+    parser.add_argument("--profile", default=None, help="Inference profile for --real-models")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    width, height = (int(v) for v in args.resolution.lower().split("x"))
+    cache_dir = use_private_cache()
+    from model_registry import registry
+    from inference_profiles import get_profile
+    from benchmarks.stand_in_models import STAND_IN_PROFILE, install_stand_ins
+
+    if args.real_models:
+        # Never download weights during a benchmark
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+        profile = get_profile(args.profile)
+    else:
+        install_stand_ins(registry)
+        profile = STAND_IN_PROFILE
+
+    results = {}
+    for minutes in args.minutes:
+        print(f"⏱ Benchmarking {minutes:g} min at {args.resolution} with {args.segments} segments...")
+        case = run_case(minutes, width, height, args.segments, profile, cache_dir)
+        if case is None:
+            return 2
+        results[case_key(case)] = case
+
+    print(f"\n{'case':<28} {'pipeline s':>10} {'video-min/min':>14}")
+    for key, case in results.items():
+        print(f"{key:<28} {case['pipeline_seconds'] or float('nan'):>10.2f} {case['throughput']:>14}"
+              f"{'  (failed: ' + ', '.join(case['failed_stages']) + ')' if case['failed_stages'] else ''}")
+
+    run = {"created_at": time.time(), "models": profile["name"], "cases": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=4)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=4)
+        print(f"✅ Baseline saved at {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("models") != run["models"]:
+            print(f"⚠️ Baseline was recorded with '{baseline.get('models')}' models, this run used '{run['models']}'")
+        regressions = compare(results, baseline)
+        if regressions:
+            print("\n⚠️ Slower than baseline:\n  " + "\n  ".join(regressions))
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
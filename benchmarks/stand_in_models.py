@@ -0,0 +1,108 @@
+import hashlib
+import re
+import numpy as np
+from download_audio import load_audio_pcm
+from voice_activity import detect_speech_regions
+
+# Model names used for the stand-ins, so their outputs never mix with real models'
+# cached artifacts or registry entries
+STAND_IN_WHISPER = "stand-in/whisper"
+STAND_IN_SUMMARIZER = "stand-in/summarizer"
+STAND_IN_EMBEDDER = "stand-in/embedder"
+
+# Stand-in segments are at most this long, like Whisper's
+MAX_SEGMENT_SECONDS = 8.0
+
+EMBEDDING_DIM = 256
+
+WORDS = ("market growth energy climate design model data network river city music health water "
+         "history science travel policy budget school story motion signal garden planet light "
+         "memory future value").split()
+TOKEN = re.compile(r"\S+")
+
+
+class StandInWhisper:
+    """Whisper's transcribe() interface: one segment per detected sound region (split to <= 8 s)."""
+
+    def transcribe(self, audio):
+        if isinstance(audio, str):
+            audio = load_audio_pcm(audio)
+        segments = []
+        for start, end in detect_speech_regions(audio):
+            while start < end:
+                piece_end = min(end, start + MAX_SEGMENT_SECONDS)
+                segments.append({"start": round(start, 2), "end": round(piece_end, 2),
+                                 "text": _sentence(len(segments))})
+                start = piece_end
+        return {"segments": segments, "text": " ".join(s["text"] for s in segments)}
+
+
+def _sentence(index):
+    rng = np.random.default_rng(index)
+    words = rng.choice(WORDS, size=10)
+    return f"Part {index} talks about {' '.join(words)}."
+
+
+class StandInTokenizer:
+    """Whitespace tokenizer with the parts of the HF tokenizer interface the pipeline uses."""
+
+    model_max_length = 1024
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False):
+        spans = [match.span() for match in TOKEN.finditer(text)]
+        encoding = {"input_ids": list(range(len(spans)))}
+        if return_offsets_mapping:
+            encoding["offset_mapping"] = spans
+        return encoding
+
+
+class StandInSummarizer:
+    """HF summarization pipeline interface: keeps the first sentences of each input."""
+
+    def __init__(self, sentences=2):
+        self.sentences = sentences
+        self.tokenizer = StandInTokenizer()
+
+    def __call__(self, texts, max_length=200, min_length=50, **kwargs):
+        batch = [texts] if isinstance(texts, str) else texts
+        outputs = []
+        for text in batch:
+            sentences = [s.strip() for s in text.split(".") if s.strip()]
+            outputs.append({"summary_text": ". ".join(sentences[:self.sentences]) + "."})
+        return outputs
+
+
+class StandInEmbedder:
+    """SentenceTransformer encode() interface with hashed bag-of-words vectors."""
+
+    def get_sentence_embedding_dimension(self):
+        return EMBEDDING_DIM
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False):
+        vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in TOKEN.findall(text.lower()):
+                digest = hashlib.md5(token.encode("utf-8")).digest()
+                vectors[row, int.from_bytes(digest[:4], "little") % EMBEDDING_DIM] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.maximum(norms, 1e-12)
+        return vectors
+
+
+def install_stand_ins(registry):
+    """Register the stand-ins as the loaders of all three model kinds."""
+    registry.register_loader("whisper", lambda name: StandInWhisper())
+    registry.register_loader("summarizer", lambda name: StandInSummarizer())
+    registry.register_loader("embedder", lambda name: StandInEmbedder())
+    registry.clear()
+
+
+STAND_IN_PROFILE = {
+    "name": "stand-in",
+    "whisper_model": STAND_IN_WHISPER,
+    "summarizer_model": STAND_IN_SUMMARIZER,
+    "embedding_model": STAND_IN_EMBEDDER,
+    "quantize": False,
+    "threads": 1,
+}
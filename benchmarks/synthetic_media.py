@@ -0,0 +1,33 @@
+import os
+import subprocess
+
+# Gap of silence at the end of every synthetic "speech" segment
+SEGMENT_GAP_SECONDS = 1.0
+
+
+def make_test_video(path, seconds=60, width=1280, height=720, segments=10, fps=30, keyframe_seconds=2):
+    """
+    Generate an H.264/AAC test video with ffmpeg's lavfi sources (no network, no assets).
+    The picture is testsrc2; the audio is a tone that changes pitch every segment and falls
+    silent for SEGMENT_GAP_SECONDS at the end of each, so VAD and silence search have real
+    boundaries to find. Returns the path, or None if ffmpeg fails.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    segment = seconds / max(segments, 1)
+    gap = min(SEGMENT_GAP_SECONDS, segment / 4)
+    tone = (f"0.3*sin(2*PI*(220+110*mod(floor(t/{segment}),5))*t)"
+            f"*lt(mod(t,{segment}),{segment - gap})")
+    cmd = [
+        "ffmpeg", "-nostdin", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}",
+        "-f", "lavfi", "-i", f"aevalsrc='{tone}':s=44100:d={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-g", str(int(fps * keyframe_seconds)),
+        "-c:a", "aac", "-b:a", "128k", "-shortest",
+        path,
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        print("❌ Could not generate test video:", result.stderr.decode(errors="ignore"))
+        return None
+    return path
@@ -0,0 +1,188 @@
+import multiprocessing
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+from download_audio import SAMPLE_RATE
+from jobs import MAX_RUNNING_JOBS
+from model_registry import QUANTIZED_SUFFIX, WHISPER_MODEL, get_whisper_model, registry
+
+# Long-form mode: audio is split at silences into windows of about this length
+WINDOW_MINUTES = float(os.environ.get("QUICKCLIPS_WINDOW_MINUTES", "10"))
+
+# How far (seconds) either side of a nominal window boundary to look for the quietest point
+SPLIT_SEARCH_SECONDS = 30.0
+
+# Frame length (seconds) used for the loudness envelope when searching for silences
+FRAME_SECONDS = 0.05
+
+# Worker processes for long-form transcription, shared by all concurrent jobs. Opt-in: every
+# worker holds its own Whisper copy outside this process's registry, so the default is 1
+# (no pool); set e.g. to cpu_count // 2 on hosts with RAM to spare.
+TRANSCRIBE_WORKERS = int(os.environ.get("QUICKCLIPS_TRANSCRIBE_WORKERS", "1"))
+
+# Approximate resident size of each Whisper checkpoint, for sizing the pool before it is loaded
+WHISPER_SIZES_MB = {"tiny": 150, "base": 290, "small": 970, "medium": 3060, "large": 6200}
+
+
+def frame_rms(audio, sample_rate=SAMPLE_RATE, frame_seconds=FRAME_SECONDS):
+    """Root-mean-square loudness per frame, computed a minute at a time to bound memory."""
+    frame = max(1, int(sample_rate * frame_seconds))
+    usable = len(audio) - len(audio) % frame
+    block = frame * max(1, int(60 / frame_seconds))
+    parts = []
+    for start in range(0, usable, block):
+        frames = np.asarray(audio[start:min(start + block, usable)], dtype=np.float32).reshape(-1, frame)
+        parts.append(np.sqrt(np.mean(frames ** 2, axis=1)))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def find_split_points(audio, sample_rate=SAMPLE_RATE, window_minutes=WINDOW_MINUTES,
+                      search_seconds=SPLIT_SEARCH_SECONDS, frame_seconds=FRAME_SECONDS):
+    """
+    Sample indices where the audio is split: near every window_minutes boundary,
+    at the quietest frame within +/- search_seconds, so words are not cut in half.
+    """
+    window = int(window_minutes * 60 * sample_rate)
+    if len(audio) <= window:
+        return []
+
+    rms = frame_rms(audio, sample_rate, frame_seconds)
+    frame = max(1, int(sample_rate * frame_seconds))
+    search = int(search_seconds / frame_seconds)
+
+    splits = []
+    nominal = window
+    while nominal < len(audio) - sample_rate:
+        center = nominal // frame
+        lo, hi = max(0, center - search), min(len(rms), center + search + 1)
+        if lo >= hi:
+            break
+        quietest = lo + int(np.argmin(rms[lo:hi]))
+        split = quietest * frame + frame // 2
+        if splits and split <= splits[-1]:
+            split = nominal
+        splits.append(split)
+        nominal = split + window
+    return splits
+
+
+def split_windows(audio, sample_rate=SAMPLE_RATE, window_minutes=WINDOW_MINUTES):
+    """(start_sample, end_sample) pairs covering the whole audio."""
+    bounds = [0] + find_split_points(audio, sample_rate, window_minutes) + [len(audio)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def pool_size(model_name, workers=TRANSCRIBE_WORKERS, concurrent_jobs=MAX_RUNNING_JOBS):
+    """
+    Worker processes one job may start: TRANSCRIBE_WORKERS split between the jobs that can
+    run at once, and no more Whisper copies than fit in the model registry's free budget.
+    """
+    workers = max(1, workers // max(1, concurrent_jobs))
+    size = registry.size_bytes("whisper", model_name)
+    if size is None:
+        base = model_name.replace(QUANTIZED_SUFFIX, "")
+        size_mb = next((mb for prefix, mb in WHISPER_SIZES_MB.items() if base.startswith(prefix)), None)
+        size = size_mb * 1024 * 1024 if size_mb else None
+    if size:
+        workers = min(workers, max(1, registry.free_bytes() // size))
+    return workers
+
+
+# Pools starting at the same time (concurrent jobs) share one swap of __main__.__spec__:
+# the saved original spec, then one entry per pool currently starting or running
+_spawn_main_lock = threading.Lock()
+_spawn_main_users = []
+
+
+@contextmanager
+def _spawn_main():
+    """
+    Spawned children re-import the parent's __main__ script as __mp_main__ unless it was
+    started with -m. When that script is app.py, every worker would build the Flask app,
+    job manager and caches; while the pool starts, point the children at this module instead.
+    """
+    main = sys.modules["__main__"]
+    with _spawn_main_lock:
+        if not _spawn_main_users:
+            _spawn_main_users.append(getattr(main, "__spec__", None))
+            main.__spec__ = sys.modules[__name__].__spec__
+        _spawn_main_users.append(None)
+    try:
+        yield
+    finally:
+        with _spawn_main_lock:
+            _spawn_main_users.pop()
+            if len(_spawn_main_users) == 1:
+                main.__spec__ = _spawn_main_users.pop()
+
+
+def _init_worker(model_name, threads):
+    """Each worker process loads its own Whisper model once and limits its torch threads."""
+    import torch
+    torch.set_num_threads(threads)
+    get_whisper_model(model_name)
+
+
+def _transcribe_window(model_name, window_audio, offset_seconds):
+    model = get_whisper_model(model_name)
+    result = model.transcribe(window_audio)
+    return [
+        {
+            "start": round(seg["start"] + offset_seconds, 3),
+            "end": round(seg["end"] + offset_seconds, 3),
+            "text": seg["text"].strip(),
+        }
+        for seg in result["segments"]
+    ]
+
+
+def transcribe_long_form(audio, model_name=WHISPER_MODEL, window_minutes=WINDOW_MINUTES,
+                         workers=TRANSCRIBE_WORKERS, sample_rate=SAMPLE_RATE):
+    """
+    Transcribe 16 kHz mono audio in silence-aligned windows on a process pool
+    (one Whisper model per worker, see pool_size) and stitch the segments back onto the
+    global timeline. With a single worker the windows run in this process on the
+    registry's model. Returns segments in the same {"start", "end", "text"} form as
+    transcribe_with_timestamps.
+    """
+    windows = split_windows(audio, sample_rate, window_minutes)
+    workers = max(1, min(pool_size(model_name, workers), len(windows)))
+    print(f"🧩 Transcribing {len(audio) / sample_rate:.0f}s of audio in {len(windows)} windows "
+          f"on {workers} worker(s)...")
+
+    if workers == 1:
+        parts = [_transcribe_window(model_name, np.ascontiguousarray(audio[a:b], dtype=np.float32),
+                                    a / sample_rate)
+                 for a, b in windows]
+    else:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        # spawn: never fork a parent that may already hold torch thread pools or loaded models
+        context = multiprocessing.get_context("spawn")
+        parts = [None] * len(windows)
+        with _spawn_main(), ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                                initializer=_init_worker, initargs=(model_name, threads)) as pool:
+            # Copy at most two windows per worker out of the (possibly memory-mapped) buffer at a time
+            pending = {}
+            queue = list(enumerate(windows))
+            while queue or pending:
+                while queue and len(pending) < workers * 2:
+                    i, (a, b) = queue.pop(0)
+                    future = pool.submit(_transcribe_window, model_name,
+                                         np.ascontiguousarray(audio[a:b], dtype=np.float32), a / sample_rate)
+                    pending[future] = i
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parts[pending.pop(future)] = future.result()
+
+    segments = []
+    for part in parts:
+        for seg in part:
+            # Whisper can overshoot the window end slightly; keep the timeline monotonic
+            if segments and seg["start"] < segments[-1]["end"]:
+                seg["start"] = segments[-1]["end"]
+            if seg["end"] > seg["start"] and seg["text"]:
+                segments.append(seg)
+    return segments
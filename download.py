@@ -1,5 +1,28 @@
-import yt_dlp
+import glob
 import os
+import re
+
+# Matches the 11-character id in watch?v=, youtu.be/, /shorts/, /embed/ and /live/ URLs
+YOUTUBE_ID_PATTERN = re.compile(
+    r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})"
+)
+
+
+# Captions are only trusted when they cover at least this share of the video
+CAPTION_MIN_COVERAGE = float(os.environ.get("QUICKCLIPS_CAPTION_MIN_COVERAGE", "0.5"))
+# Set QUICKCLIPS_ALLOW_AUTO_CAPTIONS=0 to only accept manually written captions
+ALLOW_AUTO_CAPTIONS = os.environ.get("QUICKCLIPS_ALLOW_AUTO_CAPTIONS", "1") == "1"
+CAPTION_LANGUAGES = ["en", "en-US", "en-GB", "en-orig"]
+
+VTT_TIME = re.compile(r"(?:(\d+):)?(\d{2}):(\d{2})\.(\d{3})")
+VTT_TAG = re.compile(r"<[^>]+>")
+
+
+def youtube_video_id(url):
+    """Return the YouTube video id from a URL, or None if it cannot be found."""
+    match = YOUTUBE_ID_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
 
 def download_youtube_video(url, path="downloads"):
     """
@@ -27,10 +50,11 @@ def download_youtube_video(url, path="downloads"):
     }
 
     try:
+        import yt_dlp  # imported on first download, not when the web app starts
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info_dict = ydl.extract_info(url, download=True)
             if info_dict:
-                print(f"✅ Title: {info_dict.get('title')}")
+                print(f"✅ Title: {info_dict.get('title')} (id: {info_dict.get('id')})")
                 print(f"🎬 Saved as {output_path}")
                 return output_path  # ✅ return the file path
             else:
@@ -39,3 +63,146 @@ def download_youtube_video(url, path="downloads"):
     except Exception as e:
         print(f"⚠️ An error occurred: {e}")
         return None
+
+
+def download_youtube_audio(url, path="downloads"):
+    """
+    Download only the best audio stream (no video, no remux), which is much smaller and
+    lets transcription start while the video is still downloading.
+    Returns the saved file path if successful, else None.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    ydl_opts = {
+        'outtmpl': os.path.join(path, 'audio.%(ext)s'),
+        'format': 'bestaudio/best',
+        'noplaylist': True,
+        'quiet': True,
+        'ignoreerrors': True,
+    }
+
+    try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info_dict = ydl.extract_info(url, download=True)
+            if not info_dict:
+                print("❌ Failed to download the audio.")
+                return None
+            downloads = info_dict.get("requested_downloads") or [{}]
+            output_path = downloads[0].get("filepath") or ydl.prepare_filename(info_dict)
+            print(f"🎵 Audio saved as {output_path}")
+            return output_path
+    except Exception as e:
+        print(f"⚠️ An error occurred: {e}")
+        return None
+
+
+def _vtt_seconds(stamp):
+    """Seconds of a WebVTT timestamp ("hh:mm:ss.ttt" or "mm:ss.ttt"), or None if it does not parse."""
+    match = VTT_TIME.match(stamp.strip())
+    if match is None:
+        return None
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_vtt(text):
+    """
+    Convert WebVTT captions to transcript segments ({"start", "end", "text"}).
+    YouTube's automatic captions repeat the previous line in every cue, so lines
+    already emitted by the previous cue are dropped. Blocks whose timing line does not
+    parse (NOTE / STYLE blocks mentioning "-->", malformed cues) are skipped.
+    """
+    segments = []
+    previous_lines = []
+    for block in re.split(r"\n\s*\n", text.replace("\r", "")):
+        lines = [line for line in block.split("\n") if line.strip()]
+        timing = next((i for i, line in enumerate(lines) if "-->" in line), None)
+        if timing is None:
+            continue
+        start_stamp, _, end_stamp = lines[timing].partition("-->")
+        start, end = _vtt_seconds(start_stamp), _vtt_seconds(end_stamp)
+        if start is None or end is None or lines[0].startswith(("NOTE", "STYLE", "REGION")):
+            continue
+
+        cue_lines = [VTT_TAG.sub("", line).strip() for line in lines[timing + 1:]]
+        cue_lines = [line for line in cue_lines if line]
+        new_lines = [line for line in cue_lines if line not in previous_lines]
+        previous_lines = cue_lines
+        if not new_lines or end - start < 0.05:
+            continue
+
+        segments.append({"start": round(start, 3), "end": round(end, 3), "text": " ".join(new_lines)})
+    return segments
+
+
+def caption_coverage(segments, duration):
+    if not segments or not duration:
+        return 0.0
+    return min(1.0, sum(seg["end"] - seg["start"] for seg in segments) / duration)
+
+
+def fetch_youtube_captions(url, path="downloads", languages=None,
+                           min_coverage=CAPTION_MIN_COVERAGE, allow_automatic=ALLOW_AUTO_CAPTIONS):
+    """
+    Fetch existing captions (manual first, then automatic) without downloading any media
+    and convert them to transcript segments.
+    Returns (segments, info) when they pass the quality threshold, else (None, info),
+    where info describes the captions that were found.
+    """
+    os.makedirs(path, exist_ok=True)
+    languages = languages or CAPTION_LANGUAGES
+
+    ydl_opts = {
+        'outtmpl': os.path.join(path, 'captions.%(ext)s'),
+        'skip_download': True,
+        'writesubtitles': True,
+        'writeautomaticsub': allow_automatic,
+        'subtitleslangs': languages,
+        'subtitlesformat': 'vtt',
+        'noplaylist': True,
+        'quiet': True,
+    }
+
+    info = {"source": None, "language": None, "coverage": 0.0}
+    try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info_dict = ydl.extract_info(url, download=True)
+    except Exception as e:
+        print(f"⚠️ Could not fetch captions: {e}")
+        return None, info
+    if not info_dict:
+        return None, info
+
+    requested = info_dict.get("requested_subtitles") or {}
+    manual = info_dict.get("subtitles") or {}
+    # Prefer manual captions, then follow the language preference order
+    ordered = sorted(requested, key=lambda lang: (lang not in manual,
+                                                  languages.index(lang) if lang in languages else len(languages)))
+    for lang in ordered:
+        sub_path = requested[lang].get("filepath") or next(
+            iter(glob.glob(os.path.join(path, f"captions.{lang}.vtt"))), None)
+        if not sub_path or not os.path.exists(sub_path):
+            continue
+        try:
+            with open(sub_path, "r", encoding="utf-8") as f:
+                segments = parse_vtt(f.read())
+        except Exception as e:
+            # Unreadable captions are treated like missing ones: fall back to transcription
+            print(f"⚠️ Could not parse {lang} captions: {e}")
+            continue
+        finally:
+            os.remove(sub_path)
+
+        info = {
+            "source": "manual" if lang in manual else "automatic",
+            "language": lang,
+            "coverage": round(caption_coverage(segments, info_dict.get("duration")), 3),
+        }
+        if info["coverage"] >= min_coverage:
+            print(f"📝 Using {info['source']} {lang} captions ({info['coverage']:.0%} coverage)")
+            return segments, info
+        print(f"⚠️ {info['source'].capitalize()} {lang} captions cover only {info['coverage']:.0%}, skipping")
+
+    return None, info
@@ -1,8 +1,127 @@
+import json
 import os
 import subprocess
-from pydub import AudioSegment
+import tempfile
+import numpy as np
+from instrumentation import run_traced, traced_subprocess
+
+# Whisper works on 16 kHz mono float32 audio
+SAMPLE_RATE = 16000
+
+# Inputs longer than this are buffered in a memory-mapped file instead of RAM
+MMAP_THRESHOLD_SECONDS = 30 * 60
+
+
+def probe_media(video_path):
+    """
+    Read stream info with ffprobe (no decoding).
+    Returns {"has_audio": bool, "duration": float or None}, or None if ffprobe fails.
+    """
+    result = run_traced(
+        ["ffprobe", "-v", "error", "-print_format", "json",
+         "-show_entries", "stream=codec_type:format=duration", video_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    if result.returncode != 0:
+        print("❌ FFprobe error:", result.stderr.decode())
+        return None
+
+    info = json.loads(result.stdout.decode() or "{}")
+    streams = info.get("streams", [])
+    duration = info.get("format", {}).get("duration")
+    return {
+        "has_audio": any(s.get("codec_type") == "audio" for s in streams),
+        "duration": float(duration) if duration else None,
+    }
+
+
+def _ffmpeg_pcm_command(video_path, sample_rate):
+    return [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-i", video_path,
+        "-map", "0:a:0", "-vn",
+        "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "-"
+    ]
+
+
+def load_audio_pcm(video_path, sample_rate=SAMPLE_RATE, mmap_threshold_seconds=MMAP_THRESHOLD_SECONDS):
+    """
+    Decode the first audio stream straight to mono float32 PCM with a single ffmpeg process.
+    Short inputs are returned as an in-memory NumPy array; long inputs are streamed into
+    a memory-mapped temp file so peak RAM stays flat. Returns None on failure.
+    """
+    try:
+        if not os.path.exists(video_path):
+            print(f"❌ Error: Video file not found -> {video_path}")
+            return None
+
+        info = probe_media(video_path)
+        if info is None:
+            return None
+        if not info["has_audio"]:
+            print("⚠️ No audio stream found in this video!")
+            return None
+
+        cmd = _ffmpeg_pcm_command(video_path, sample_rate)
+        duration = info["duration"]
+
+        if not duration or duration < mmap_threshold_seconds:
+            result = run_traced(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if result.returncode != 0:
+                print("❌ FFmpeg extraction error:", result.stderr.decode())
+                return None
+            audio = np.frombuffer(result.stdout, dtype=np.float32)
+        else:
+            audio = _stream_to_memmap(cmd, int(duration * sample_rate) + sample_rate)
+            if audio is None:
+                return None
+
+        print(f"✅ Audio decoded: {len(audio) / sample_rate:.1f}s at {sample_rate} Hz mono")
+        return audio
+
+    except Exception as e:
+        print("❌ Exception:", e)
+        return None
+
+
+def _stream_to_memmap(cmd, capacity_samples, chunk_samples=SAMPLE_RATE * 60):
+    """Copy ffmpeg's PCM output into a memory-mapped float32 buffer."""
+    # The file is unlinked right away; the mapping keeps the data alive until it is released
+    with tempfile.TemporaryFile(prefix="quickclips_pcm_") as backing:
+        buffer = np.memmap(backing, dtype=np.float32, mode="w+", shape=(capacity_samples,))
+
+    with traced_subprocess(cmd) as outcome:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        written = 0
+        try:
+            while True:
+                block = proc.stdout.read(chunk_samples * 4)
+                if not block:
+                    break
+                samples = np.frombuffer(block[:len(block) - len(block) % 4], dtype=np.float32)
+                if written + len(samples) > capacity_samples:
+                    samples = samples[:capacity_samples - written]  # duration was slightly under-reported
+                buffer[written:written + len(samples)] = samples
+                written += len(samples)
+        finally:
+            proc.stdout.close()
+            stderr = proc.stderr.read()
+            proc.wait()
+            outcome["returncode"] = proc.returncode
+
+    if proc.returncode != 0:
+        print("❌ FFmpeg extraction error:", stderr.decode())
+        return None
+    return buffer[:written]
+
 
 def extract_audio(video_path, output_audio_path="extracted_audio.wav"):
+    """
+    Write the audio track as a 16 kHz mono WAV with a single ffmpeg pass.
+    Prefer load_audio_pcm() when the audio is only needed for transcription.
+    """
     try:
         if not os.path.exists(video_path):
             print(f"❌ Error: Video file not found -> {video_path}")
@@ -10,21 +129,19 @@ def extract_audio(video_path, output_audio_path="extracted_audio.wav"):
 
         video_path = os.path.abspath(video_path)
         output_audio_path = os.path.abspath(output_audio_path)
-        temp_audio = os.path.abspath("temp_audio.mp3")
 
-        # ✅ Run ffmpeg to check if audio exists
-        probe = subprocess.run(
-            ["ffmpeg", "-i", video_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        if "Audio:" not in probe.stderr.decode():
+        # ✅ Check if audio exists
+        info = probe_media(video_path)
+        if info is None:
+            return None
+        if not info["has_audio"]:
             print("⚠️ No audio stream found in this video!")
             return None
 
         # ✅ Extract audio
-        result = subprocess.run(
-            ["ffmpeg", "-i", video_path, "-q:a", "0", "-map", "a", temp_audio, "-y"],
+        result = run_traced(
+            ["ffmpeg", "-nostdin", "-y", "-i", video_path, "-map", "0:a:0", "-vn",
+             "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le", output_audio_path],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE
         )
@@ -33,15 +150,9 @@ def extract_audio(video_path, output_audio_path="extracted_audio.wav"):
             print("❌ FFmpeg extraction error:", result.stderr.decode())
             return None
 
-        audio = AudioSegment.from_file(temp_audio, format="mp3")
-        audio.export(output_audio_path, format="wav")
-        os.remove(temp_audio)
-
         print(f"✅ Audio extracted successfully: {output_audio_path}")
         return output_audio_path
 
     except Exception as e:
         print("❌ Exception:", e)
         return None
-
-
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import numpy as np
+from artifact_cache import CACHE_DIR
+
+# Transcript segment embeddings, one float16 .npy file per (model, transcript)
+EMBEDDING_DIR = os.path.join(CACHE_DIR, "embeddings")
+# Size limit of the store; least-recently-used files are deleted beyond it (as in ArtifactCache)
+EMBEDDING_MAX_MB = int(os.environ.get("QUICKCLIPS_EMBEDDING_MAX_MB", "512"))
+EMBEDDING_BATCH_SIZE = int(os.environ.get("QUICKCLIPS_EMBEDDING_BATCH_SIZE", "64"))
+
+# Transcript rows scored per block when building the similarity matrix
+SIMILARITY_BLOCK_ROWS = 8192
+
+STORE_VERSION = 1
+
+
+def embedding_key(model_name, texts):
+    """Key covering the model and the exact texts, so another model never reuses stale vectors."""
+    payload = json.dumps({"version": STORE_VERSION, "model": model_name, "texts": texts})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def encode_normalized(embedder, texts, batch_size=EMBEDDING_BATCH_SIZE):
+    """Encode texts to unit-length float32 vectors (so cosine similarity is a dot product)."""
+    return embedder.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                           normalize_embeddings=True).astype(np.float32)
+
+
+def evict_embeddings(store_dir=EMBEDDING_DIR, max_mb=EMBEDDING_MAX_MB, keep=None):
+    """
+    Delete least-recently-used embedding files until the store fits in max_mb.
+    File modification time is the last-access time; `keep` (the file just written) and
+    files still being written are never deleted. Open memory maps stay valid after a delete.
+    """
+    entries = []
+    for name in os.listdir(store_dir):
+        path = os.path.join(store_dir, name)
+        if not name.endswith(".npy") or name.endswith(".tmp.npy") or path == keep:
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries) + (os.path.getsize(keep) if keep else 0)
+    for _, size, path in sorted(entries):
+        if total <= max_mb * 1024 * 1024:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def load_or_encode(embedder, model_name, texts, batch_size=EMBEDDING_BATCH_SIZE, store_dir=EMBEDDING_DIR,
+                   max_mb=EMBEDDING_MAX_MB):
+    """
+    Return the (N, D) float16 embeddings of texts as a read-only memory map,
+    encoding and saving them first if this model has not seen these texts before.
+    Encoding runs batch by batch straight into the file, so peak memory stays bounded.
+    The store is kept under max_mb by evicting the least recently used files.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, f"{embedding_key(model_name, texts)}.npy")
+
+    if os.path.exists(path):
+        try:
+            vectors = np.load(path, mmap_mode="r")
+        except ValueError:
+            os.remove(path)  # truncated or corrupt file, rebuild it
+        except OSError:
+            pass  # evicted meanwhile, encode again
+        else:
+            try:
+                os.utime(path)  # mark as recently used
+            except OSError:
+                pass
+            return vectors
+
+    dim = embedder.get_sentence_embedding_dimension()
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+    vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float16, shape=(len(texts), dim))
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        vectors[start:start + len(batch)] = encode_normalized(embedder, batch, batch_size)
+    vectors.flush()
+    del vectors
+    os.replace(tmp_path, path)
+    evict_embeddings(store_dir, max_mb, keep=path)
+
+    print(f"✅ Stored {len(texts)} segment embeddings at {path}")
+    return np.load(path, mmap_mode="r")
+
+
+def similarity_matrix(query_vectors, stored_vectors, block_rows=SIMILARITY_BLOCK_ROWS):
+    """Cosine similarity (Q x N) between normalized queries and a stored embedding matrix, block by block."""
+    scores = np.empty((len(query_vectors), len(stored_vectors)), dtype=np.float32)
+    for start in range(0, len(stored_vectors), block_rows):
+        block = np.asarray(stored_vectors[start:start + block_rows], dtype=np.float32)
+        scores[:, start:start + len(block)] = query_vectors @ block.T
+    return scores
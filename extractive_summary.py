@@ -0,0 +1,159 @@
+import json
+import os
+import time
+import numpy as np
+from model_registry import EMBEDDING_MODEL, get_embedder
+from embedding_store import EMBEDDING_BATCH_SIZE, load_or_encode, similarity_matrix
+from instrumentation import record_failure
+
+# Summary length as a share of the transcript's duration, with a floor in seconds
+EXTRACTIVE_BUDGET_RATIO = float(os.environ.get("QUICKCLIPS_EXTRACTIVE_BUDGET_RATIO", "0.15"))
+EXTRACTIVE_MIN_SECONDS = float(os.environ.get("QUICKCLIPS_EXTRACTIVE_MIN_SECONDS", "30"))
+
+# A candidate this similar to an already selected segment is skipped as a repeat
+REDUNDANCY_THRESHOLD = 0.85
+
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+
+
+def centrality_scores(vectors):
+    """Mean cosine similarity of each (normalized) segment vector to all segments."""
+    vectors = np.asarray(vectors)
+    centroid = np.zeros(vectors.shape[1], dtype=np.float32)
+    for start in range(0, len(vectors), 8192):
+        centroid += np.asarray(vectors[start:start + 8192], dtype=np.float32).sum(axis=0)
+    return similarity_matrix(centroid[None, :] / max(len(vectors), 1), vectors)[0]
+
+
+def textrank_scores(vectors, damping=TEXTRANK_DAMPING, iterations=TEXTRANK_ITERATIONS):
+    """PageRank over the segment similarity graph (negative similarities dropped)."""
+    query = np.asarray(vectors, dtype=np.float32)
+    weights = np.maximum(similarity_matrix(query, vectors), 0.0)
+    np.fill_diagonal(weights, 0.0)
+    totals = weights.sum(axis=1, keepdims=True)
+    transition = np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+    n = len(query)
+    rank = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ rank)
+        if np.abs(updated - rank).sum() < 1e-6:
+            return updated
+        rank = updated
+    return rank
+
+
+SCORING_METHODS = {
+    "centrality": centrality_scores,
+    "textrank": textrank_scores,
+}
+
+
+def select_segments(segments, scores, vectors, budget_seconds, redundancy=REDUNDANCY_THRESHOLD):
+    """
+    Take segments from the highest score down until the duration budget is used,
+    skipping near-duplicates of segments already taken. Returns indices in time order.
+    """
+    chosen, used = [], 0.0
+    for idx in np.argsort(-scores, kind="stable"):
+        duration = segments[idx]["end"] - segments[idx]["start"]
+        if duration <= 0 or used + duration > budget_seconds:
+            continue
+        if chosen:
+            taken = np.asarray(vectors[chosen], dtype=np.float32)
+            if float(np.max(taken @ np.asarray(vectors[idx], dtype=np.float32))) > redundancy:
+                continue
+        chosen.append(int(idx))
+        used += duration
+    return sorted(chosen, key=lambda i: segments[i]["start"])
+
+
+def extractive_summarize(transcript_file, summary_file, output_file, budget_seconds=None,
+                         method="centrality", model_name=EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Summarize by picking transcript segments directly: score each segment against the
+    rest with the stored MiniLM vectors and keep the best ones within budget_seconds
+    (by default EXTRACTIVE_BUDGET_RATIO of the transcript). No text is generated, so the
+    timestamps come for free and no re-matching is needed.
+    Writes the summary text and the matched timestamps (same format as
+    match_summary_to_timestamps) and returns the matches, or None on failure.
+    """
+    try:
+        with open(transcript_file, "r", encoding="utf-8") as f:
+            transcript = json.load(f)
+        transcript = [seg for seg in transcript if seg["text"].strip()]
+        if not transcript:
+            print("⚠️ Transcript is empty, nothing to summarize.")
+            return None
+
+        if budget_seconds is None:
+            total = transcript[-1]["end"] - transcript[0]["start"]
+            budget_seconds = max(total * EXTRACTIVE_BUDGET_RATIO, EXTRACTIVE_MIN_SECONDS)
+
+        embedder = get_embedder(model_name)
+        vectors = load_or_encode(embedder, model_name, [seg["text"] for seg in transcript], batch_size=batch_size)
+        scores = SCORING_METHODS[method](vectors)
+        chosen = select_segments(transcript, scores, vectors, budget_seconds)
+
+        results = [
+            {
+                "summary_sentence": transcript[i]["text"],
+                "timestamp": f"{transcript[i]['start']} --> {transcript[i]['end']}",
+                "matched_text": transcript[i]["text"],
+            }
+            for i in chosen
+        ]
+
+        os.makedirs(os.path.dirname(summary_file) or ".", exist_ok=True)
+        with open(summary_file, "w", encoding="utf-8") as f:
+            f.write(" ".join(item["summary_sentence"] for item in results))
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+        print(f"✅ Extractive summary ({method}): {len(results)} of {len(transcript)} segments "
+              f"within {budget_seconds:.0f}s, saved at {output_file}")
+        return results
+
+    except Exception as e:
+        print(f"⚠️ Error: {e}")
+        record_failure(e)
+        return None
+
+
+def benchmark(transcript_txt_file, transcript_json_file, work_dir="downloads"):
+    """
+    Time the abstractive (BART + matching) path against both extractive scorers.
+    All paths share the embedding store, so the extractive ones run first and the first
+    of them pays for encoding the transcript.
+    """
+    from summarize_content import extract_main_points
+    from SummarizedTimestamps import match_summary_to_timestamps
+
+    os.makedirs(work_dir, exist_ok=True)
+    summary_file = os.path.join(work_dir, "benchmark_summary.txt")
+    timestamps_file = os.path.join(work_dir, "benchmark_timestamps.json")
+    report = {}
+
+    for method in SCORING_METHODS:
+        started = time.perf_counter()
+        matches = extractive_summarize(transcript_json_file, summary_file, timestamps_file, method=method)
+        report[method] = {"seconds": round(time.perf_counter() - started, 2), "segments": len(matches or [])}
+
+    started = time.perf_counter()
+    extract_main_points(transcript_txt_file, output_file=summary_file)
+    matches = match_summary_to_timestamps(summary_file, transcript_json_file, output_file=timestamps_file)
+    report["abstractive"] = {"seconds": round(time.perf_counter() - started, 2), "segments": len(matches or [])}
+
+    for f in (summary_file, timestamps_file):
+        if os.path.exists(f):
+            os.remove(f)
+
+    print(f"{'summarizer':<12} {'seconds':>8} {'segments':>9}")
+    for name, row in report.items():
+        print(f"{name:<12} {row['seconds']:>8.2f} {row['segments']:>9}")
+    return report
+
+
+if __name__ == "__main__":
+    benchmark("downloads/transcript.txt", "downloads/transcript.json")
@@ -0,0 +1,43 @@
+import os
+from model_registry import WHISPER_MODEL, SUMMARIZER_MODEL, EMBEDDING_MODEL, quantized_name
+from jobs import MAX_RUNNING_JOBS
+
+# Speed / quality trade-offs for CPU-only hosts. "quantize" loads the summarizer and
+# embedder with int8 dynamic quantization of their linear layers. "balanced" (the default)
+# is the fp32 setup the pipeline always used; int8 is opt-in through "fast".
+PROFILES = {
+    "fast": {"whisper_model": "tiny", "quantize": True},
+    "balanced": {"whisper_model": WHISPER_MODEL, "quantize": False},
+    "accurate": {"whisper_model": "small", "quantize": False},
+}
+DEFAULT_PROFILE = os.environ.get("QUICKCLIPS_PROFILE", "balanced")
+
+# Intra-op threads for a job: the cores are shared by the jobs that may run at once
+JOB_THREADS = int(os.environ.get("QUICKCLIPS_JOB_THREADS", str(max(1, (os.cpu_count() or 1) // MAX_RUNNING_JOBS))))
+
+
+def get_profile(name=None):
+    """Resolve a profile name to the model names and settings the stages use (a resolved profile is kept)."""
+    if isinstance(name, dict):
+        return name
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown inference profile '{name}' (choose from {', '.join(PROFILES)})")
+    settings = PROFILES[name]
+    return {
+        "name": name,
+        "whisper_model": settings["whisper_model"],
+        "summarizer_model": quantized_name(SUMMARIZER_MODEL) if settings["quantize"] else SUMMARIZER_MODEL,
+        "embedding_model": quantized_name(EMBEDDING_MODEL) if settings["quantize"] else EMBEDDING_MODEL,
+        "quantize": settings["quantize"],
+        "threads": JOB_THREADS,
+    }
+
+
+def apply_thread_limit(profile):
+    """
+    Cap torch's intra-op thread pool at the profile's per-job share.
+    torch keeps one pool per process, so concurrent jobs share this setting.
+    """
+    import torch
+    torch.set_num_threads(profile["threads"])
@@ -0,0 +1,419 @@
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from model_registry import current_rss_bytes, registry
+
+try:
+    import resource
+except ImportError:  # not available on Windows; child-process CPU time is then not counted
+    resource = None
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+BYTES_BUCKETS = tuple(2 ** n for n in range(20, 36, 2))  # 1 MB .. 32 GB
+AUDIO_SECONDS_BUCKETS = (10, 30, 60, 300, 600, 1200, 1800, 3600, 7200, 14400)
+
+# How often the resident set size is sampled while a stage runs
+RSS_SAMPLE_SECONDS = 0.25
+
+# Worker processes (worker.py) write their metrics here, one snapshot file per process, and the
+# web server's /metrics adds them to its own, since with the sqlite queue the stages run there
+METRICS_DIR = os.path.abspath(os.environ.get("QUICKCLIPS_METRICS_DIR", "metrics"))
+
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, buckets, labelnames=("stage",)):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._series = {}  # label values -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), list(series)] for key, series in self._series.items()]
+
+    def render(self, snapshots=()):
+        """Render this process's series plus those of other processes' snapshot() (summed per label set)."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            merged = {key: list(series) for key, series in self._series.items()}
+        for snapshot in snapshots:
+            for key, series in snapshot:
+                total = merged.setdefault(tuple(key), [0] * len(series))
+                merged[tuple(key)] = [a + b for a, b in zip(total, series)]
+        for key, series in sorted(merged.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labelnames, key))
+            prefix = f"{labels}," if labels else ""
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series[-2]}')
+            lines.append(f"{self.name}_count{{{labels}}} {series[-2]}")
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]}")
+        return "\n".join(lines)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=("stage",)):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def render(self, snapshots=()):
+        """Render this process's values plus those of other processes' snapshot() (summed per label set)."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            merged = dict(self._values)
+        for snapshot in snapshots:
+            for key, value in snapshot:
+                merged[tuple(key)] = merged.get(tuple(key), 0) + value
+        for key, value in sorted(merged.items()):
+            labels = ",".join(f'{name}="{v}"' for name, v in zip(self.labelnames, key))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return "\n".join(lines)
+
+
+STAGE_SECONDS = Histogram("quickclips_stage_seconds", "Wall time per pipeline stage", SECONDS_BUCKETS)
+STAGE_CPU_SECONDS = Histogram("quickclips_stage_cpu_seconds",
+                              "CPU time per pipeline stage (process and child processes)", SECONDS_BUCKETS)
+STAGE_MODEL_LOAD_SECONDS = Histogram("quickclips_stage_model_load_seconds",
+                                     "Part of a stage's wall time spent loading models", SECONDS_BUCKETS)
+STAGE_INFERENCE_SECONDS = Histogram("quickclips_stage_inference_seconds",
+                                    "Stage wall time excluding model loading", SECONDS_BUCKETS)
+STAGE_PEAK_RSS_BYTES = Histogram("quickclips_stage_peak_rss_bytes", "Peak resident memory during a stage",
+                                 BYTES_BUCKETS)
+STAGE_INPUT_BYTES = Histogram("quickclips_stage_input_bytes", "Size of a stage's input", BYTES_BUCKETS)
+STAGE_OUTPUT_BYTES = Histogram("quickclips_stage_output_bytes", "Size of a stage's output", BYTES_BUCKETS)
+STAGE_AUDIO_SECONDS = Histogram("quickclips_stage_audio_seconds", "Seconds of audio processed by a stage",
+                                AUDIO_SECONDS_BUCKETS)
+STAGE_FAILURES = Counter("quickclips_stage_failures_total", "Pipeline stages that failed")
+MODEL_LOAD_SECONDS = Histogram("quickclips_model_load_seconds", "Model load time", SECONDS_BUCKETS,
+                               labelnames=("kind",))
+SUBPROCESS_SECONDS = Histogram("quickclips_subprocess_seconds", "Wall time of ffmpeg / ffprobe runs",
+                               SECONDS_BUCKETS, labelnames=("tool", "stage"))
+SUBPROCESS_INPUT_BYTES = Histogram("quickclips_subprocess_input_bytes", "Input size of ffmpeg / ffprobe runs",
+                                   BYTES_BUCKETS, labelnames=("tool", "stage"))
+SUBPROCESS_OUTPUT_BYTES = Histogram("quickclips_subprocess_output_bytes", "Output file size of ffmpeg runs",
+                                    BYTES_BUCKETS, labelnames=("tool", "stage"))
+SUBPROCESS_FAILURES = Counter("quickclips_subprocess_failures_total", "ffmpeg / ffprobe runs that failed",
+                              labelnames=("tool", "stage"))
+
+METRICS = [
+    STAGE_SECONDS, STAGE_CPU_SECONDS, STAGE_MODEL_LOAD_SECONDS, STAGE_INFERENCE_SECONDS, STAGE_PEAK_RSS_BYTES,
+    STAGE_INPUT_BYTES, STAGE_OUTPUT_BYTES, STAGE_AUDIO_SECONDS, STAGE_FAILURES, MODEL_LOAD_SECONDS,
+    SUBPROCESS_SECONDS, SUBPROCESS_INPUT_BYTES, SUBPROCESS_OUTPUT_BYTES, SUBPROCESS_FAILURES,
+]
+
+
+def render_metrics(snapshot_dir=None):
+    """
+    All metrics in the Prometheus text exposition format; with `snapshot_dir`, summed with
+    the snapshots other processes wrote there (see save_metrics_snapshot).
+    """
+    snapshots = load_metrics_snapshots(snapshot_dir) if snapshot_dir else []
+    return "\n".join(metric.render([snapshot.get(metric.name, []) for snapshot in snapshots])
+                     for metric in METRICS) + "\n"
+
+
+def save_metrics_snapshot(name, snapshot_dir=METRICS_DIR):
+    """
+    Write this process's metrics to <snapshot_dir>/<name>.json (atomically), for another
+    process to serve. Files of exited processes are kept, so their counts never go backwards.
+    """
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=snapshot_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({metric.name: metric.snapshot() for metric in METRICS}, f)
+        os.replace(tmp, os.path.join(snapshot_dir, f"{name}.json"))
+        return True
+    except OSError as e:
+        print(f"⚠️ Could not save metrics snapshot: {e}")
+        return False
+
+
+def load_metrics_snapshots(snapshot_dir=METRICS_DIR):
+    """Every snapshot file in `snapshot_dir`; unreadable ones are skipped."""
+    snapshots = []
+    try:
+        names = sorted(name for name in os.listdir(snapshot_dir) if name.endswith(".json"))
+    except OSError:
+        return snapshots
+    for name in names:
+        try:
+            with open(os.path.join(snapshot_dir, name), "r", encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+# The report of the job running on this thread, so helpers deep in the stages can attribute to it
+_active = threading.local()
+
+
+def current_report():
+    return getattr(_active, "report", None)
+
+
+@contextmanager
+def attached(report):
+    """
+    Attribute work on this thread to `report`. Threads a job starts for itself (the
+    streaming stages) run inside this so their ffmpeg runs and model loads are labelled
+    with the job's running stage instead of none at all.
+    """
+    previous = current_report()
+    _active.report = report
+    try:
+        yield report
+    finally:
+        _active.report = previous
+
+
+def _cpu_seconds():
+    cpu = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += children.ru_utime + children.ru_stime
+    return cpu
+
+
+class StageReport:
+    """
+    Trace of one pipeline run: wall and CPU time, peak RSS, model load versus inference
+    time, input / output sizes and audio seconds per stage. Finished stages are also
+    observed into the process-wide histograms served on /metrics.
+    CPU time is process-wide, so it is exact only while one job runs at a time.
+    """
+
+    def __init__(self, profile=None):
+        self.profile = profile
+        self.stages = []
+        self._current = None
+        self._sampler = None
+
+    @contextmanager
+    def stage(self, name, **fields):
+        self.start(name, **fields)
+        try:
+            yield self
+        except Exception as e:
+            self.fail(e)
+            raise
+        finally:
+            self.finish()
+
+    def start(self, name, **fields):
+        """Close the running stage, if any, and start timing `name` on this thread."""
+        self.finish()
+        _active.report = self
+        rss = current_rss_bytes()
+        self._current = {
+            "stage": name, "started": time.perf_counter(), "cpu": _cpu_seconds(),
+            "rss_before": rss, "peak_rss": rss, "model_load_seconds": 0.0, "failed": False, "error": None,
+        }
+        self._current.update(fields)
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample_rss, args=(self._current, stop), daemon=True)
+        sampler.start()
+        self._sampler = (sampler, stop)
+
+    def _sample_rss(self, current, stop):
+        while not stop.wait(RSS_SAMPLE_SECONDS):
+            current["peak_rss"] = max(current["peak_rss"], current_rss_bytes())
+
+    def current_stage(self):
+        """Name of the running stage, or None between stages."""
+        current = self._current
+        return current["stage"] if current is not None else None
+
+    def annotate(self, **fields):
+        """Attach input_bytes, output_bytes, audio_seconds, ... to the running stage."""
+        if self._current is not None:
+            self._current.update(fields)
+
+    def fail(self, error=None):
+        """Mark the running stage as failed (stages that swallow errors call this)."""
+        if self._current is not None:
+            self._current["failed"] = True
+            self._current["error"] = str(error) if error is not None else None
+
+    def add_model_load(self, seconds):
+        if self._current is not None:
+            self._current["model_load_seconds"] += seconds
+
+    def finish(self):
+        """Close the running stage, if any, and record it."""
+        current = self._current
+        if current is None:
+            return
+        self._current = None
+        sampler, stop = self._sampler
+        stop.set()
+        sampler.join()
+        if getattr(_active, "report", None) is self:
+            _active.report = None
+
+        rss_after = current_rss_bytes()
+        name = current["stage"]
+        seconds = time.perf_counter() - current["started"]
+        peak = max(current["peak_rss"], rss_after)
+        row = {
+            "stage": name,
+            "seconds": round(seconds, 3),
+            "cpu_seconds": round(_cpu_seconds() - current["cpu"], 3),
+            "model_load_seconds": round(current["model_load_seconds"], 3),
+            "inference_seconds": round(max(seconds - current["model_load_seconds"], 0.0), 3),
+            "rss_mb": round(rss_after / (1024 * 1024), 1),
+            "rss_delta_mb": round((rss_after - current["rss_before"]) / (1024 * 1024), 1),
+            "peak_rss_mb": round(peak / (1024 * 1024), 1),
+            "failed": current["failed"],
+        }
+        for field in ("input_bytes", "output_bytes", "audio_seconds", "error"):
+            if current.get(field) is not None:
+                row[field] = current[field]
+        self.stages.append(row)
+
+        STAGE_SECONDS.observe(seconds, stage=name)
+        STAGE_CPU_SECONDS.observe(row["cpu_seconds"], stage=name)
+        STAGE_MODEL_LOAD_SECONDS.observe(row["model_load_seconds"], stage=name)
+        STAGE_INFERENCE_SECONDS.observe(row["inference_seconds"], stage=name)
+        STAGE_PEAK_RSS_BYTES.observe(peak, stage=name)
+        if "input_bytes" in row:
+            STAGE_INPUT_BYTES.observe(row["input_bytes"], stage=name)
+        if "output_bytes" in row:
+            STAGE_OUTPUT_BYTES.observe(row["output_bytes"], stage=name)
+        if "audio_seconds" in row:
+            STAGE_AUDIO_SECONDS.observe(row["audio_seconds"], stage=name)
+        if row["failed"]:
+            STAGE_FAILURES.inc(stage=name)
+
+    def track(self, progress=None):
+        """Wrap a progress callback so every stage change also starts a new traced stage."""
+        def tracked(stage, fraction=0.0, message=None):
+            if self._current is None or self._current["stage"] != stage:
+                self.start(stage)
+            if progress is not None:
+                progress(stage, fraction=fraction, message=message)
+        return tracked
+
+    def as_dict(self):
+        return {
+            "profile": self.profile,
+            "stages": self.stages,
+            "total_seconds": round(sum(s["seconds"] for s in self.stages), 3),
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=4)
+
+    def format_table(self):
+        lines = []
+        if self.profile:
+            lines.append(f"Profile '{self.profile['name']}' (whisper {self.profile['whisper_model']}, "
+                         f"int8 {'on' if self.profile['quantize'] else 'off'}, {self.profile['threads']} threads)")
+        lines.append(f"{'stage':<15} {'seconds':>9} {'cpu s':>8} {'load s':>8} {'rss MB':>8} {'peak MB':>8}")
+        for s in self.stages:
+            lines.append(f"{s['stage']:<15} {s['seconds']:>9.2f} {s['cpu_seconds']:>8.2f} "
+                         f"{s['model_load_seconds']:>8.2f} {s['rss_mb']:>8.0f} {s['peak_rss_mb']:>8.0f}"
+                         f"{'  FAILED' if s['failed'] else ''}")
+        lines.append(f"{'total':<15} {self.as_dict()['total_seconds']:>9.2f}")
+        return "\n".join(lines)
+
+
+def record_model_load(kind, name, seconds):
+    """Registry load listener: model load time, also charged to the running stage."""
+    MODEL_LOAD_SECONDS.observe(seconds, kind=kind)
+    report = current_report()
+    if report is not None:
+        report.add_model_load(seconds)
+
+
+registry.add_load_listener(record_model_load)
+
+
+def record_failure(error=None):
+    """Mark the current thread's running stage as failed."""
+    report = current_report()
+    if report is not None:
+        report.fail(error)
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return None
+
+
+def _input_bytes(cmd):
+    sizes = [file_size(arg) for flag, arg in zip(cmd, cmd[1:]) if flag == "-i"]
+    if cmd and cmd[0] == "ffprobe":
+        sizes.append(file_size(cmd[-1]))
+    return sum(size for size in sizes if size)
+
+
+@contextmanager
+def traced_subprocess(cmd):
+    """
+    Trace one ffmpeg / ffprobe run: wall time, input size and (for ffmpeg) output file size,
+    labelled with the stage running on this thread. Yields a dict; set "returncode" in it.
+    Runs outside any stage (e.g. the audio download before a job's report exists, or
+    helper threads not started under attached()) are not recorded. Worker processes
+    (the long-form transcription pool, worker.py) keep their own metrics, which this
+    process's /metrics does not include.
+    """
+    tool = os.path.basename(cmd[0])
+    report = current_report()
+    stage = report.current_stage() if report is not None else None
+    outcome = {"returncode": None}
+    started = time.perf_counter()
+    try:
+        yield outcome
+    finally:
+        if stage is not None:
+            SUBPROCESS_SECONDS.observe(time.perf_counter() - started, tool=tool, stage=stage)
+            SUBPROCESS_INPUT_BYTES.observe(_input_bytes(cmd), tool=tool, stage=stage)
+            if tool == "ffmpeg":
+                output_size = file_size(cmd[-1])
+                if output_size:
+                    SUBPROCESS_OUTPUT_BYTES.observe(output_size, tool=tool, stage=stage)
+            if outcome["returncode"] != 0:
+                SUBPROCESS_FAILURES.inc(tool=tool, stage=stage)
+
+
+def run_traced(cmd, **kwargs):
+    """subprocess.run() for ffmpeg / ffprobe, traced with traced_subprocess()."""
+    with traced_subprocess(cmd) as outcome:
+        result = subprocess.run(cmd, **kwargs)
+        outcome["returncode"] = result.returncode
+    return result
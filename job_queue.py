@@ -0,0 +1,214 @@
+import importlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from jobs import STAGES, MAX_QUEUED_JOBS, JOB_TTL_SECONDS, QueueFullError
+from workspace import WORKSPACE_ROOT
+
+# Shared by the web tier (writes jobs) and the workers (lease and run them); must be on a local disk
+QUEUE_DB = os.environ.get("QUICKCLIPS_QUEUE_DB", os.path.join(WORKSPACE_ROOT, "jobs.sqlite3"))
+
+# A worker must heartbeat within this many seconds or its job goes back to the queue
+LEASE_SECONDS = int(os.environ.get("QUICKCLIPS_LEASE_SECONDS", "60"))
+
+# Attempts before a job that keeps killing its worker is failed instead of re-queued
+MAX_ATTEMPTS = int(os.environ.get("QUICKCLIPS_MAX_ATTEMPTS", "3"))
+
+# How often wait_for_change() re-reads a job
+POLL_SECONDS = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    function TEXT NOT NULL,
+    arguments TEXT NOT NULL,
+    stage TEXT,
+    stage_label TEXT,
+    stage_index INTEGER,
+    stage_count INTEGER NOT NULL,
+    percent REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+"""
+
+# Columns that make up the public job snapshot (same fields as JobManager's jobs)
+JOB_FIELDS = ("id", "status", "stage", "stage_label", "stage_index", "stage_count", "percent", "message",
+              "result", "error", "created_at", "updated_at", "version")
+
+
+class LeaseLost(Exception):
+    """Raised in a job whose worker stopped holding its lease; another worker owns it now."""
+
+
+def function_name(fn):
+    return f"{fn.__module__}:{fn.__qualname__}"
+
+
+def resolve_function(name):
+    module, _, qualname = name.partition(":")
+    target = importlib.import_module(module)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    return target
+
+
+class SqliteJobQueue:
+    """
+    Durable job queue in a local SQLite file, with the same submit / get / update /
+    wait_for_change interface as JobManager. Jobs are not run here: worker processes
+    (see worker.py) lease them with claim(), keep the lease alive with heartbeat() and
+    report back with finish(). A job whose lease runs out is handed to the next worker.
+    """
+
+    def __init__(self, path=QUEUE_DB, max_queued=MAX_QUEUED_JOBS):
+        self.path = path
+        self.max_queued = max_queued
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        # One short-lived connection per call, so any thread or process can use the queue
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return _Connection(db)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) for a worker and return the job id straight away."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                       (now - JOB_TTL_SECONDS,))
+            waiting = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if waiting >= self.max_queued:
+                db.execute("ROLLBACK")
+                raise QueueFullError("Too many jobs are waiting, try again later.")
+            db.execute(
+                "INSERT INTO jobs (id, status, function, arguments, stage_count, message, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, function_name(fn), json.dumps({"args": args, "kwargs": kwargs}), len(STAGES),
+                 "Waiting for a free worker...", now, now),
+            )
+            db.execute("COMMIT")
+        return job_id
+
+    def get(self, job_id):
+        """Snapshot of a job's state, or None if unknown."""
+        with self._connect() as db:
+            row = db.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update(self, job_id, **fields):
+        fields = {k: v for k, v in fields.items() if k in JOB_FIELDS and k not in ("id", "version")}
+        assignments = "".join(f"{column} = ?, " for column in fields)
+        with self._connect() as db:
+            db.execute(f"UPDATE jobs SET {assignments}updated_at = ?, version = version + 1 WHERE id = ?",
+                       (*fields.values(), time.time(), job_id))
+
+    def wait_for_change(self, job_id, version, timeout=15.0):
+        """Poll until the job moves past `version` (or timeout) and return its snapshot."""
+        deadline = time.time() + timeout
+        job = self.get(job_id)
+        while job is not None and job["version"] == version and time.time() < deadline:
+            time.sleep(POLL_SECONDS)
+            job = self.get(job_id)
+        return job
+
+    def claim(self, worker_id, lease_seconds=LEASE_SECONDS):
+        """
+        Lease the oldest runnable job: a queued one, or a running one whose worker stopped
+        heartbeating. Returns (job_id, function name, args, kwargs, attempt) or None.
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT id, function, arguments, attempts FROM jobs "
+                "WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+
+            attempt = row["attempts"] + 1
+            if attempt > MAX_ATTEMPTS:
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, message = 'Summarization failed.', "
+                    "lease_owner = NULL, updated_at = ?, version = version + 1 WHERE id = ?",
+                    (f"Worker lost {row['attempts']} times", now, row["id"]),
+                )
+                db.execute("COMMIT")
+                return self.claim(worker_id, lease_seconds)
+
+            message = "Starting..." if attempt == 1 else f"Resuming (attempt {attempt})..."
+            db.execute(
+                "UPDATE jobs SET status = 'running', attempts = ?, lease_owner = ?, lease_expires = ?, "
+                "message = ?, updated_at = ?, version = version + 1 WHERE id = ?",
+                (attempt, worker_id, now + lease_seconds, message, now, row["id"]),
+            )
+            db.execute("COMMIT")
+
+        arguments = json.loads(row["arguments"])
+        return row["id"], row["function"], arguments["args"], arguments["kwargs"], attempt
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=LEASE_SECONDS):
+        """Extend the lease; returns False if the job is no longer leased to this worker."""
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def finish(self, job_id, worker_id, result=None, error=None):
+        """Record the outcome of a leased job (ignored if the lease was lost meanwhile)."""
+        if result:
+            fields = {"status": "done", "result": result, "percent": 100.0, "message": "Done", "error": None}
+        else:
+            fields = {"status": "failed", "error": error or "Summarization failed.",
+                      "message": "Summarization failed."}
+        assignments = "".join(f"{column} = ?, " for column in fields)
+        with self._connect() as db:
+            db.execute(
+                f"UPDATE jobs SET {assignments}lease_owner = NULL, updated_at = ?, version = version + 1 "
+                "WHERE id = ? AND lease_owner = ?",
+                (*fields.values(), time.time(), job_id, worker_id),
+            )
+
+    def stats(self):
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+class _Connection:
+    """Context manager that always closes the connection (sqlite3's own only ends transactions)."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.db.in_transaction:
+            self.db.execute("ROLLBACK")
+        self.db.close()
+        return False
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# The six pipeline stages, in the order summarize_video_pipeline runs them
+STAGES = [
+    ("extract_audio", "Extracting audio"),
+    ("transcribe", "Transcribing audio"),
+    ("timestamps", "Generating transcript with timestamps"),
+    ("main_points", "Extracting main points"),
+    ("match", "Matching summary sentences with timestamps"),
+    ("render", "Creating summarized video"),
+]
+STAGE_INDEX = {key: i for i, (key, _) in enumerate(STAGES)}
+
+# How many pipelines may run at once, and how many may wait behind them
+MAX_RUNNING_JOBS = int(os.environ.get("QUICKCLIPS_MAX_JOBS", "2"))
+MAX_QUEUED_JOBS = int(os.environ.get("QUICKCLIPS_MAX_QUEUED_JOBS", "20"))
+
+# Finished jobs are forgotten after this many seconds
+JOB_TTL_SECONDS = 3600
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already waiting to run."""
+
+
+def progress_fields(stage, fraction=0.0, message=None):
+    """Job fields for a progress report: the stage, its label and the overall percentage."""
+    index = STAGE_INDEX[stage]
+    fraction = min(max(fraction, 0.0), 1.0)
+    return {
+        "stage": stage,
+        "stage_label": STAGES[index][1],
+        "stage_index": index,
+        "percent": round(100.0 * (index + fraction) / len(STAGES), 1),
+        "message": message or STAGES[index][1],
+    }
+
+
+class JobManager:
+    """
+    Runs pipeline jobs on a bounded background executor and tracks their progress.
+    The job function is called with a `progress(stage, fraction=0.0, message=None)`
+    keyword argument and its return value becomes the job result.
+    """
+
+    def __init__(self, max_running=MAX_RUNNING_JOBS, max_queued=MAX_QUEUED_JOBS):
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="pipeline")
+        self._jobs = {}
+        self._changed = threading.Condition()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a job and return its id straight away."""
+        with self._changed:
+            self._prune()
+            waiting = sum(1 for job in self._jobs.values() if job["status"] == "queued")
+            if waiting >= self.max_queued:
+                raise QueueFullError("Too many jobs are waiting, try again later.")
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": "queued",
+                "stage": None,
+                "stage_label": None,
+                "stage_index": None,
+                "stage_count": len(STAGES),
+                "percent": 0.0,
+                "message": "Waiting for a free worker...",
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+                "version": 0,
+            }
+
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        self.update(job_id, status="running", message="Starting...")
+
+        def progress(stage, fraction=0.0, message=None):
+            self.update(job_id, **progress_fields(stage, fraction, message))
+
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.update(job_id, status="failed", error=str(e), message="Summarization failed.")
+            return
+
+        if result:
+            self.update(job_id, status="done", result=result, percent=100.0, message="Done")
+        else:
+            self.update(job_id, status="failed", error="Summarization failed.",
+                        message="Summarization failed.")
+
+    def update(self, job_id, **fields):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job["updated_at"] = time.time()
+            job["version"] += 1
+            self._changed.notify_all()
+
+    def get(self, job_id):
+        """Snapshot of a job's state, or None if unknown."""
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait_for_change(self, job_id, version, timeout=15.0):
+        """Block until the job moves past `version` (or timeout) and return its snapshot."""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: job_id not in self._jobs or self._jobs[job_id]["version"] != version,
+                timeout=timeout,
+            )
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _prune(self):
+        cutoff = time.time() - JOB_TTL_SECONDS
+        for job_id in [j for j, job in self._jobs.items()
+                       if job["status"] in ("done", "failed") and job["updated_at"] < cutoff]:
+            del self._jobs[job_id]
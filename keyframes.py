@@ -0,0 +1,128 @@
+import bisect
+import json
+import math
+import os
+import subprocess
+from instrumentation import run_traced
+
+# Stream fields the index records, so re-encoded cut edges can reproduce the source's parameters
+STREAM_FIELDS = "codec_name,profile,level,pix_fmt,width,height,time_base,r_frame_rate"
+
+# libx264 profile for each ffprobe H.264 profile it can produce; others cannot be matched
+X264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"}
+
+
+def keyframe_index_path(video_file):
+    """The index is cached next to the video it describes."""
+    return f"{video_file}.keyframes.json"
+
+
+def build_keyframe_index(video_file):
+    """
+    List keyframe timestamps of the first video stream with ffprobe.
+    Only packet headers are read (no decoding), so this is cheap even for long videos.
+    Returns {"codec": str, "stream": {...}, "keyframes": [float, ...]} or None on failure,
+    where "stream" holds the STREAM_FIELDS of the video stream.
+    """
+    codec = run_traced(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", f"stream={STREAM_FIELDS}", "-of", "json", video_file],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    packets = run_traced(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_file],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if codec.returncode != 0 or packets.returncode != 0:
+        print("⚠️ Could not build keyframe index:", packets.stderr.decode(errors="ignore"))
+        return None
+
+    keyframes = []
+    for line in packets.stdout.decode().splitlines():
+        parts = line.strip().split(",")
+        if len(parts) >= 2 and "K" in parts[1] and parts[0] not in ("", "N/A"):
+            keyframes.append(float(parts[0]))
+
+    streams = json.loads(codec.stdout.decode() or "{}").get("streams") or [{}]
+    stream = streams[0]
+    return {"codec": stream.get("codec_name", ""), "stream": stream, "keyframes": sorted(set(keyframes))}
+
+
+def load_keyframe_index(video_file):
+    """Return the cached keyframe index for a video, building it on first use."""
+    index_path = keyframe_index_path(video_file)
+    st = os.stat(video_file)
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("size") == st.st_size and index.get("mtime") == st.st_mtime and "stream" in index:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    index = build_keyframe_index(video_file)
+    if index is None:
+        return None
+
+    index.update(size=st.st_size, mtime=st.st_mtime)
+    try:
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+    except OSError as e:
+        print(f"⚠️ Could not cache keyframe index: {e}")
+    return index
+
+
+def previous_keyframe(keyframes, t):
+    """Latest keyframe at or before t (falls back to the first keyframe)."""
+    i = bisect.bisect_right(keyframes, t + 1e-3)
+    return keyframes[i - 1] if i else (keyframes[0] if keyframes else 0.0)
+
+
+def next_keyframe(keyframes, t):
+    """Earliest keyframe at or after t, or None if there is none."""
+    i = bisect.bisect_left(keyframes, t - 1e-3)
+    return keyframes[i] if i < len(keyframes) else None
+
+
+def seek_at(t):
+    """
+    -ss value for seeking to keyframe t, rounded *up* to the millisecond. Input seeking
+    snaps back to the keyframe at or before the requested time, so rounding down below
+    the keyframe's pts would start the copy a whole GOP early.
+    """
+    return f"{math.ceil(round(t * 1000, 6)) / 1000:.3f}"
+
+
+def seek_before(t):
+    """-ss value rounded *down*, so a frame-accurate (decoding) seek still includes the frame at t."""
+    return f"{math.floor(round(t * 1000, 6)) / 1000:.3f}"
+
+
+def duration_until(start, end):
+    """-t value from the formatted `start` up to, but not including, the frame at `end`."""
+    return f"{max(math.floor(round((end - float(start)) * 1000, 6)) / 1000, 0.0):.3f}"
+
+
+def edge_encode_args(stream):
+    """
+    libx264 options that reproduce the source's H.264 profile, level, pixel format, frame
+    rate and timescale, so re-encoded edges can be joined to stream-copied GOPs.
+    Returns None when the stream's parameters are unknown or cannot be matched.
+    """
+    stream = stream or {}
+    profile = X264_PROFILES.get(stream.get("profile"))
+    level = stream.get("level")
+    time_base = str(stream.get("time_base", ""))
+    frame_rate = str(stream.get("r_frame_rate", ""))
+    if (stream.get("codec_name") != "h264" or profile is None or not isinstance(level, int) or level <= 0
+            or stream.get("pix_fmt") != "yuv420p" or not time_base.startswith("1/")
+            or frame_rate in ("", "0/0")):
+        return None
+    return [
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+        "-profile:v", profile, "-level:v", f"{level / 10:.1f}", "-pix_fmt", "yuv420p",
+        "-r", frame_rate, "-video_track_timescale", time_base[2:],
+    ]
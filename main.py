@@ -1,80 +1,131 @@
+import argparse
+import json
 import os
-from moviepy.editor import VideoFileClip
 from download import download_youtube_video
-from transcript import transcribe_audio
-from download_audio import extract_audio
+from transcript import transcribe_with_timestamps
+from download_audio import load_audio_pcm
 from summarize_content import extract_main_points
-from timestamps import generate_transcript_with_timestamps
 from SummarizedTimestamps import match_summary_to_timestamps
 from summarized_video import create_summarized_video
+from summarized_audio import create_summarized_audio
+from inference_profiles import PROFILES, apply_thread_limit, get_profile
+from instrumentation import StageReport
+from workspace import Workspace
 
-def run_pipeline(yturl=None, video_path=None, output_type="text"):
+def run_pipeline(yturl=None, video_path=None, output_type="text", profile=None):
     downloads_dir = "downloads"
     os.makedirs(downloads_dir, exist_ok=True)
 
-    video_file = os.path.join(downloads_dir, "video.mp4")
-    audio_file = os.path.join(downloads_dir, "output_audio.wav")
-    transcript_path = os.path.join(downloads_dir, "transcript.json")
-    output_summary_path = os.path.join(downloads_dir, "main_points_summary.txt")
-    output_file = os.path.join(downloads_dir, "summary_with_timestamps.json")
-    output_video_path = os.path.join(downloads_dir, "summarized_video.mp4")
+    # Models, quantization and thread count for this run
+    profile = get_profile(profile)
+    apply_thread_limit(profile)
+    report = StageReport(profile)
+
+    # Job-scoped workspace for the download and intermediates; only the final video is kept
+    workspace = Workspace()
+    video_file = None
+    transcript_txt_path = workspace.path("transcript.txt")
+    transcript_path = workspace.path("transcript.json")
+    output_summary_path = workspace.path("main_points_summary.txt")
+    output_file = workspace.path("summary_with_timestamps.json")
+    output_video_path = os.path.join(downloads_dir, f"summarized_video_{workspace.job_id}.mp4")
 
     try:
         # --- Download or use uploaded video ---
         if yturl:
-            download_youtube_video(yturl, video_file)
+            with report.stage("download"):
+                video_file = download_youtube_video(yturl, workspace.dir)
+            if not video_file:
+                return {"status": "error", "message": "YouTube download failed."}
         elif video_path:
             video_file = video_path
         else:
             return {"status": "error", "message": "No video or URL provided."}
 
-        # --- Extract audio safely ---
-        try:
-            clip = VideoFileClip(video_file)
-            if clip.audio is None:
-                return {"status": "error", "message": "No audio track found in video."}
-            clip.audio.write_audiofile(audio_file)
-        except Exception as e:
-            return {"status": "error", "message": f"Audio extraction failed: {str(e)}"}
+        # --- Extract audio into memory (16 kHz mono PCM) ---
+        with report.stage("extract_audio"):
+            audio = load_audio_pcm(video_file)
+        if audio is None:
+            return {"status": "error", "message": "Audio extraction failed or no audio track found in video."}
 
-        # --- Transcribe audio ---
+        # --- Transcribe audio with timestamps (single Whisper pass) ---
         try:
-            transcribe_audio(audio_file)
+            with report.stage("transcribe"):
+                segments = transcribe_with_timestamps(audio, transcript_txt_path, transcript_path,
+                                                      model_name=profile["whisper_model"])
+            if segments is None:
+                return {"status": "error", "message": "Audio transcription failed."}
         except Exception as e:
             return {"status": "error", "message": f"Audio transcription failed: {str(e)}"}
 
-        # --- Generate timestamps ---
-        try:
-            generate_transcript_with_timestamps(audio_file, transcript_path)
-        except Exception as e:
-            return {"status": "error", "message": f"Timestamp generation failed: {str(e)}"}
-
         # --- Summarize content ---
         try:
-            extract_main_points(transcript_path, output_file=output_summary_path)
+            with report.stage("main_points"):
+                extract_main_points(transcript_txt_path, output_file=output_summary_path,
+                                    model_name=profile["summarizer_model"])
         except Exception as e:
             return {"status": "error", "message": f"Content summarization failed: {str(e)}"}
 
         # --- Match summary to timestamps ---
         try:
-            match_summary_to_timestamps(output_summary_path, transcript_path, output_file)
+            with report.stage("match"):
+                match_summary_to_timestamps(output_summary_path, transcript_path, output_file,
+                                            model_name=profile["embedding_model"])
         except Exception as e:
             return {"status": "error", "message": f"Matching summary to timestamps failed: {str(e)}"}
 
         # --- Create summarized video if requested ---
         if output_type == "video":
             try:
-                create_summarized_video(video_file, output_file, output_video_path)
-                return {"status": "success", "video": output_video_path}
+                with report.stage("render"):
+                    created = create_summarized_video(video_file, output_file, output_video_path,
+                                                      temp_clips_dir=workspace.path("clips"),
+                                                      plan_file=workspace.path("plan.json"))
+                if not created:
+                    return {"status": "error", "message": "Video creation failed."}
+                return {"status": "success", "video": output_video_path, "report": report.as_dict()}
             except Exception as e:
                 return {"status": "error", "message": f"Video creation failed: {str(e)}"}
+        elif output_type == "audio":
+            # Cut the already-decoded audio; the video stream is never touched
+            output_audio_path = os.path.join(downloads_dir, f"summarized_audio_{workspace.job_id}.wav")
+            with report.stage("render"):
+                created = create_summarized_audio(audio, output_file, output_audio_path)
+            if not created:
+                return {"status": "error", "message": "Audio creation failed."}
+            return {"status": "success", "audio": output_audio_path, "report": report.as_dict()}
         else:
             with open(output_summary_path, "r", encoding="utf-8") as f:
                 summary_text = f.read()
-            return {"status": "success", "summary": summary_text}
+            return {"status": "success", "summary": summary_text, "report": report.as_dict()}
 
     finally:
         # Cleanup intermediate files (keep final video if exists)
-        for f in [audio_file, transcript_path, output_summary_path, output_file]:
-            if os.path.exists(f):
-                os.remove(f)
+        workspace.cleanup()
+        print(report.format_table())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a video and report per-stage latency and memory.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="YouTube URL")
+    source.add_argument("--video", help="Local video file")
+    parser.add_argument("--output-type", choices=["text", "audio", "video"], default="text")
+    parser.add_argument("--profile", choices=list(PROFILES) + ["all"], default=None,
+                        help="Inference profile; 'all' runs every profile one after another")
+    parser.add_argument("--report", help="Write the per-profile reports to this JSON file")
+    args = parser.parse_args()
+
+    profiles = list(PROFILES) if args.profile == "all" else [args.profile]
+    reports = []
+    for name in profiles:
+        result = run_pipeline(yturl=args.url, video_path=args.video, output_type=args.output_type, profile=name)
+        if result["status"] != "success":
+            print(f"❌ {result['message']}")
+            continue
+        reports.append(result["report"])
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=4)
+        print(f"✅ Report saved at {args.report}")
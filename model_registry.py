@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Default model names used by the pipeline stages
+WHISPER_MODEL = "base"  # "tiny" is faster, "small" / "medium" are more accurate
+SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# RAM budget for all resident models together (MB), overridable per host
+MODEL_RAM_BUDGET_MB = int(os.environ.get("QUICKCLIPS_MODEL_RAM_MB", "4096"))
+
+# Model names ending in this load with int8 dynamic quantization of their linear layers
+QUANTIZED_SUFFIX = "@int8"
+
+
+def quantized_name(name):
+    return name if name.endswith(QUANTIZED_SUFFIX) else f"{name}{QUANTIZED_SUFFIX}"
+
+
+def _split_quantized(name):
+    if name.endswith(QUANTIZED_SUFFIX):
+        return name[:-len(QUANTIZED_SUFFIX)], True
+    return name, False
+
+
+def _quantize_linear(module):
+    """int8 dynamic quantization (CPU): weights stored as int8, activations quantized on the fly."""
+    import torch
+    return torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_whisper(name):
+    import whisper
+    return whisper.load_model(name)
+
+
+def _load_summarizer(name):
+    from transformers import pipeline
+    name, quantize = _split_quantized(name)
+    summarizer = pipeline("summarization", model=name, device=-1 if quantize else None)
+    if quantize:
+        summarizer.model = _quantize_linear(summarizer.model)
+    return summarizer
+
+
+def _load_embedder(name):
+    from sentence_transformers import SentenceTransformer
+    name, quantize = _split_quantized(name)
+    if quantize:
+        return _quantize_linear(SentenceTransformer(name, device="cpu"))
+    return SentenceTransformer(name)
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or 0 where /proc is not available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _tensors(value):
+    """Tensors inside a state-dict value (packed quantized params are tuples of tensors)."""
+    if hasattr(value, "element_size"):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _tensors(item)
+
+
+def estimate_model_bytes(model):
+    """
+    Size of a model's parameters and buffers, looking through HF pipelines.
+    Dynamically quantized linear layers keep their int8 weights (and biases) packed
+    outside parameters(), so those are counted from the state dict. Tied weights count once.
+    """
+    module = getattr(model, "model", model)
+    if not hasattr(module, "parameters"):
+        return 0
+    tensors = list(module.parameters()) + list(module.buffers())
+    if hasattr(module, "state_dict"):
+        tensors += [tensor for value in module.state_dict().values()
+                    if isinstance(value, (tuple, list)) for tensor in _tensors(value)]
+    total = 0
+    seen = set()
+    for tensor in tensors:
+        key = tensor.data_ptr() or id(tensor)
+        if key in seen:
+            continue
+        seen.add(key)
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+    Models are loaded on first use, shared across requests and threads, and
+    evicted least-recently-used once the RAM budget is exceeded.
+    """
+
+    def __init__(self, ram_budget_mb=MODEL_RAM_BUDGET_MB):
+        self.ram_budget_bytes = ram_budget_mb * 1024 * 1024
+        self._loaders = {
+            "whisper": _load_whisper,
+            "summarizer": _load_summarizer,
+            "embedder": _load_embedder,
+        }
+        self._models = OrderedDict()  # (kind, name) -> entry, oldest first
+        self._load_listeners = []
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def register_loader(self, kind, loader):
+        """Register (or replace) the loader used for a model kind."""
+        with self._lock:
+            self._loaders[kind] = loader
+
+    def add_load_listener(self, listener):
+        """Call listener(kind, name, seconds) after every model load (used for metrics)."""
+        with self._lock:
+            self._load_listeners.append(listener)
+
+    def get(self, kind, name):
+        """Return the model, loading it on first use."""
+        key = (kind, name)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                return self._touch(key, entry)
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and reuse it
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    return self._touch(key, entry)
+                loader = self._loaders[kind]
+
+            print(f"⏳ Loading {kind} model '{name}'...")
+            rss_before = current_rss_bytes()
+            started = time.perf_counter()
+            model = loader(name)
+            load_seconds = time.perf_counter() - started
+            size_bytes = estimate_model_bytes(model) or max(current_rss_bytes() - rss_before, 0)
+            print(f"✅ Loaded {kind} model '{name}' in {load_seconds:.1f}s (~{size_bytes / 1e6:.0f} MB)")
+            for listener in list(self._load_listeners):
+                listener(kind, name, load_seconds)
+
+            with self._lock:
+                entry = {
+                    "model": model,
+                    "size_bytes": size_bytes,
+                    "load_seconds": load_seconds,
+                    "uses": 0,
+                    "last_used": time.time(),
+                }
+                self._models[key] = entry
+                self._evict_over_budget(keep=key)
+                return self._touch(key, entry)
+
+    def _touch(self, key, entry):
+        entry["uses"] += 1
+        entry["last_used"] = time.time()
+        self._models.move_to_end(key)
+        return entry["model"]
+
+    def _evict_over_budget(self, keep):
+        while self.resident_bytes() > self.ram_budget_bytes and len(self._models) > 1:
+            key = next(iter(self._models))
+            if key == keep:
+                break
+            self._models.pop(key)
+            print(f"♻️ Evicted {key[0]} model '{key[1]}' to stay within the RAM budget")
+
+    def evict(self, kind, name):
+        """Drop a model from the registry; returns True if it was resident."""
+        with self._lock:
+            return self._models.pop((kind, name), None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def resident_bytes(self):
+        return sum(entry["size_bytes"] for entry in self._models.values())
+
+    def free_bytes(self):
+        """RAM budget left after the models resident in this process."""
+        with self._lock:
+            return max(self.ram_budget_bytes - self.resident_bytes(), 0)
+
+    def size_bytes(self, kind, name):
+        """Estimated size of a resident model, or None if it is not loaded."""
+        with self._lock:
+            entry = self._models.get((kind, name))
+            return entry["size_bytes"] if entry else None
+
+    def stats(self):
+        """Load time and resident size per model, least recently used first."""
+        with self._lock:
+            return [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "load_seconds": round(entry["load_seconds"], 3),
+                    "size_mb": round(entry["size_bytes"] / (1024 * 1024), 1),
+                    "uses": entry["uses"],
+                    "last_used": entry["last_used"],
+                }
+                for (kind, name), entry in self._models.items()
+            ]
+
+
+registry = ModelRegistry()
+
+
+def get_whisper_model(name=WHISPER_MODEL):
+    return registry.get("whisper", name)
+
+
+def get_summarizer(name=SUMMARIZER_MODEL):
+    return registry.get("summarizer", name)
+
+
+def get_embedder(name=EMBEDDING_MODEL):
+    return registry.get("embedder", name)
@@ -0,0 +1,408 @@
+import os
+import json
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_for
+from download import ALLOW_AUTO_CAPTIONS, CAPTION_LANGUAGES, CAPTION_MIN_COVERAGE, download_youtube_video, \
+    download_youtube_audio, fetch_youtube_captions, youtube_video_id
+from download_audio import SAMPLE_RATE, load_audio_pcm
+from transcript import transcribe_with_timestamps, write_transcript_files
+from summarize_content import SUMMARY_TARGET_SENTENCES, extract_main_points
+from SummarizedTimestamps import match_summary_to_timestamps
+from extractive_summary import EXTRACTIVE_BUDGET_RATIO, EXTRACTIVE_MIN_SECONDS, extractive_summarize
+from summarized_video import create_summarized_video
+from summarized_audio import create_summarized_audio
+from inference_profiles import apply_thread_limit, get_profile
+from instrumentation import StageReport, file_size
+from artifact_cache import ArtifactCache, cache_key, file_content_hash
+from jobs import MAX_RUNNING_JOBS
+from job_queue import LeaseLost
+from streaming_pipeline import STREAMING_ENABLED, stream_summarize_video
+from workspace import Workspace, HostSlot
+
+# Summarizers that write a BART summary and then match it to the transcript
+ABSTRACTIVE_SUMMARIZERS = ("abstractive", "hierarchical")
+
+# Finished results (videos, audio, summaries, timing reports) are written here
+DOWNLOAD_FOLDER = os.path.abspath("downloads")
+
+# Full video downloads run beside transcription of the audio-only download
+video_downloads = ThreadPoolExecutor(max_workers=MAX_RUNNING_JOBS, thread_name_prefix="video-download")
+
+# Transcript / summary / timestamp artifacts shared by repeat videos
+artifact_cache = ArtifactCache()
+
+
+def pipeline_cache_key(source_key, transcript_source, summarizer, profile, max_length=200, min_length=50):
+    """Key of everything up to the matched timestamps, which depends only on the source and these settings."""
+    return cache_key(
+        source_key,
+        transcript_source=transcript_source,
+        summarizer=summarizer,
+        extractive_budget=None if summarizer in ABSTRACTIVE_SUMMARIZERS else
+        (EXTRACTIVE_BUDGET_RATIO, EXTRACTIVE_MIN_SECONDS),
+        target_sentences=SUMMARY_TARGET_SENTENCES if summarizer == "hierarchical" else None,
+        summarizer_model=profile["summarizer_model"],
+        embedding_model=profile["embedding_model"],
+        max_length=max_length,
+        min_length=min_length,
+    )
+
+
+def transcript_source_key(source_key, whisper_model):
+    """
+    Key recording which transcript (captions or a Whisper model) a YouTube video ended up with,
+    so a repeat URL can find its cached artifacts before fetching any captions.
+    """
+    return cache_key(source_key, step="transcript_source", whisper_model=whisper_model,
+                     captions=[ALLOW_AUTO_CAPTIONS, CAPTION_MIN_COVERAGE, CAPTION_LANGUAGES])
+
+
+def _store_artifacts(key, artifacts, source_key, transcript_source, profile):
+    artifact_cache.put(key, artifacts)
+    if source_key and source_key.startswith("youtube:"):
+        artifact_cache.put(transcript_source_key(source_key, profile["whisper_model"]),
+                           {"transcript_source": transcript_source})
+
+
+def cached_youtube_artifacts(source_key, summarizer="abstractive", profile=None, max_length=200, min_length=50):
+    """
+    (transcript_source, artifacts) cached by an earlier job on the same YouTube video with
+    these settings, or (None, None).
+    """
+    profile = get_profile(profile)
+    recorded = artifact_cache.get(transcript_source_key(source_key, profile["whisper_model"]))
+    if not recorded:
+        return None, None
+    transcript_source = recorded["transcript_source"]
+    cached = artifact_cache.get(pipeline_cache_key(source_key, transcript_source, summarizer, profile,
+                                                   max_length, min_length))
+    return (transcript_source, cached) if cached else (None, None)
+
+
+def summarize_video_pipeline(video_path, progress=None, source_key=None, max_length=200, min_length=50,
+                             streaming=STREAMING_ENABLED, audio_path=None, transcript_segments=None,
+                             transcript_source=None, workspace=None, output_type="video",
+                             summarizer="abstractive", profile=None):
+    """
+    Full video summarization pipeline.
+    Outputs downloads/summarized_<workspace id>.mp4, or with output_type="audio" a .wav of
+    the same segments cut from the decoded audio, or with output_type="text" a .json of the
+    summary and its timestamps (no rendering at all). Every intermediate file lives in
+    `workspace` (a temporary one, removed at the end, if not given), so pipelines can
+    run side by side.
+    `progress(stage, fraction=0.0)` is called as each stage starts, if given.
+    `source_key` identifies the video for the artifact cache (e.g. "youtube:<id>");
+    the file's content hash is used when it is not given.
+    streaming=True overlaps transcription, summarization and clip cutting
+    (see streaming_pipeline) instead of running the stages one after another.
+    `video_path` may also be a Future that resolves to the path (a download still in
+    progress); it is only waited for when the video itself is needed. Transcription then
+    reads `audio_path`, or is skipped entirely when `transcript_segments` (e.g. YouTube
+    captions, described by `transcript_source`) are given. The text and audio modes never
+    read the video stream, so for them `video_path` may be None when `audio_path` is given.
+    `summarizer` is "abstractive" (BART, then matching), "hierarchical" (the same, with the
+    partial summaries reduced to about SUMMARY_TARGET_SENTENCES sentences, so long videos
+    do not produce long summaries) or an extractive scoring method ("centrality",
+    "textrank") that picks transcript segments directly.
+    `profile` names an inference profile (see inference_profiles); the latency and memory
+    of every stage under it are saved next to the output as <output>.profile.json.
+    Completed transcript and summary stages are recorded in the workspace (mark_done), and
+    a workspace that already has them (a job re-run after its worker died) skips them.
+    """
+    profile = get_profile(profile)
+    apply_thread_limit(profile)
+    report = StageReport(profile)
+    progress = report.track(progress)
+    transcript_source = transcript_source or profile["whisper_model"]
+    target_sentences = SUMMARY_TARGET_SENTENCES if summarizer == "hierarchical" else None
+
+    video_future = video_path if isinstance(video_path, Future) else None
+    if output_type == "video":
+        if video_future is not None and not (source_key and (audio_path or transcript_segments is not None)):
+            video_path, video_future = video_future.result(), None
+        if video_future is None and (not video_path or not os.path.exists(video_path)):
+            print("❌ No video provided or file does not exist.")
+            return None
+    else:
+        audio_path = audio_path or video_path
+        needs_audio = output_type == "audio" or transcript_segments is None
+        if needs_audio and (not audio_path or not os.path.exists(audio_path)):
+            print("❌ No audio or video provided or file does not exist.")
+            return None
+        if not source_key and not audio_path:
+            print("❌ No source to summarize.")
+            return None
+    streaming = (streaming and output_type == "video" and summarizer == "abstractive"
+                 and video_future is None and transcript_segments is None)
+
+    downloads_dir = DOWNLOAD_FOLDER
+    os.makedirs(downloads_dir, exist_ok=True)
+
+    own_workspace = workspace is None
+    workspace = workspace or Workspace()
+
+    # Unique, job-scoped output filename
+    extension = {"video": "mp4", "audio": "wav", "text": "json"}[output_type]
+    output_path = os.path.join(downloads_dir, f"summarized_{workspace.job_id}.{extension}")
+
+    # Intermediate files live in the job's workspace
+    transcript_txt_file = workspace.path("transcript.txt")
+    transcript_json_file = workspace.path("transcript.json")
+    summary_file = workspace.path("summary.txt")
+    timestamps_file = workspace.path("timestamps.json")
+
+    try:
+        key = pipeline_cache_key(source_key or f"sha256:{file_content_hash(video_path or audio_path)}",
+                                 transcript_source, summarizer, profile, max_length, min_length)
+        cached = artifact_cache.get(key)
+        output = None
+        audio = None
+
+        if cached:
+            print("♻️ Cache hit: reusing transcript, summary and timestamps")
+            with open(summary_file, "w", encoding="utf-8") as f:
+                f.write(cached["summary"])
+            with open(timestamps_file, "w", encoding="utf-8") as f:
+                json.dump(cached["timestamps"], f, indent=4)
+        elif streaming:
+            print("🌊 Running streaming pipeline...")
+            result = stream_summarize_video(video_path, output_path, workspace.dir,
+                                            transcript_txt_file=transcript_txt_file,
+                                            transcript_json_file=transcript_json_file,
+                                            summary_file=summary_file, timestamps_file=timestamps_file,
+                                            max_length=max_length, min_length=min_length,
+                                            progress=progress, whisper_model=profile["whisper_model"],
+                                            summarizer_model=profile["summarizer_model"],
+                                            embedding_model=profile["embedding_model"])
+            if result:
+                output = result["video"]
+                _store_artifacts(key, {
+                    "segments": result["segments"],
+                    "summary": result["summary"],
+                    "timestamps": result["timestamps"],
+                }, source_key, transcript_source, profile)
+        else:
+            if workspace.done("transcript") is not None and os.path.exists(transcript_json_file):
+                # 1️⃣ - 3️⃣ Picked up again after a crash: the transcript was already written
+                print("♻️ Resuming from the saved transcript...")
+                progress("timestamps", message="Resuming from the saved transcript")
+                with open(transcript_json_file, "r", encoding="utf-8") as f:
+                    segments = json.load(f)
+            elif transcript_segments is not None:
+                # 1️⃣ - 3️⃣ Existing captions replace audio extraction and transcription
+                print(f"📝 Using {transcript_source} as transcript...")
+                progress("timestamps")
+                segments = transcript_segments
+                write_transcript_files(segments, transcript_txt_file, transcript_json_file)
+            else:
+                # 1️⃣ Extract audio straight into memory (16 kHz mono PCM, no temp files)
+                print("🎵 Extracting audio...")
+                progress("extract_audio")
+                audio = load_audio_pcm(audio_path or video_path)
+                report.annotate(input_bytes=file_size(audio_path or video_path))
+                if audio is None:
+                    report.fail("Audio extraction failed")
+                else:
+                    report.annotate(audio_seconds=round(len(audio) / SAMPLE_RATE, 3))
+
+                # 2️⃣ + 3️⃣ Transcribe audio once, writing plain text and timestamped segments
+                print("📝 Transcribing audio with timestamps...")
+                progress("transcribe")
+                segments = transcribe_with_timestamps(audio, output_txt_file=transcript_txt_file,
+                                                      output_json_file=transcript_json_file,
+                                                      model_name=profile["whisper_model"])
+                if audio is not None:
+                    report.annotate(audio_seconds=round(len(audio) / SAMPLE_RATE, 3))
+                if segments is None:
+                    report.fail("Transcription failed")
+            if segments:
+                workspace.mark_done("transcript", source=transcript_source)
+            progress("timestamps", 1.0)
+            report.annotate(output_bytes=file_size(transcript_json_file))
+
+            if workspace.done("summary") is not None and os.path.exists(timestamps_file):
+                # 4️⃣ + 5️⃣ Already summarized and matched before the crash
+                print("♻️ Resuming from the saved summary...")
+                progress("match", 1.0, message="Resuming from the saved summary")
+                with open(timestamps_file, "r", encoding="utf-8") as f:
+                    matched = json.load(f)
+            elif summarizer in ABSTRACTIVE_SUMMARIZERS:
+                # 4️⃣ Extract main points
+                print("📝 Extracting main points...")
+                progress("main_points")
+                extract_main_points(transcript_txt_file, output_file=summary_file,
+                                    max_length=max_length, min_length=min_length,
+                                    model_name=profile["summarizer_model"], target_sentences=target_sentences)
+                report.annotate(input_bytes=file_size(transcript_txt_file), output_bytes=file_size(summary_file))
+
+                # 5️⃣ Match summary to timestamps
+                print("🔗 Matching summary sentences with timestamps...")
+                progress("match")
+                matched = match_summary_to_timestamps(summary_file, transcript_json_file,
+                                                      output_file=timestamps_file,
+                                                      model_name=profile["embedding_model"])
+                report.annotate(output_bytes=file_size(timestamps_file))
+            else:
+                # 4️⃣ + 5️⃣ Pick the key transcript segments directly; they carry their own timestamps
+                print("📝 Ranking transcript segments...")
+                progress("main_points", message="Ranking transcript segments")
+                matched = extractive_summarize(transcript_json_file, summary_file, timestamps_file,
+                                               method=summarizer, model_name=profile["embedding_model"])
+                report.annotate(input_bytes=file_size(transcript_json_file), output_bytes=file_size(summary_file))
+
+            if matched:
+                workspace.mark_done("summary", summarizer=summarizer)
+            if segments and matched:
+                with open(summary_file, "r", encoding="utf-8") as f:
+                    summary_text = f.read()
+                _store_artifacts(key, {
+                    "segments": segments,
+                    "summary": summary_text,
+                    "timestamps": matched,
+                }, source_key, transcript_source, profile)
+
+        # 6️⃣ Create the result (the streaming pipeline has already rendered its video)
+        if output_type == "text":
+            with open(summary_file, "r", encoding="utf-8") as f:
+                summary_text = f.read()
+            with open(timestamps_file, "r", encoding="utf-8") as f:
+                timestamps = json.load(f)
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump({"summary": summary_text, "timestamps": timestamps}, f, indent=4)
+            output = output_path
+
+        elif output_type == "audio":
+            print("🎧 Creating summarized audio...")
+            progress("render", message="Creating summarized audio")
+            if audio is None:
+                audio = load_audio_pcm(audio_path)
+            if audio is not None:
+                output = create_summarized_audio(audio, timestamps_file, output_path,
+                                                 plan_file=workspace.path("plan.json"))
+
+        elif output is None and (cached or not streaming):
+            print("🎬 Creating summarized video...")
+            progress("render")
+            if video_future is not None:
+                video_path = video_future.result()
+                if not video_path or not os.path.exists(video_path):
+                    raise RuntimeError("Failed to download video.")
+            output = create_summarized_video(video_path, timestamps_file, output_path,
+                                             temp_clips_dir=workspace.path("clips"),
+                                             plan_file=workspace.path("plan.json"))
+
+        # Confirm result exists
+        if output and os.path.exists(output):
+            print(f"✅ Summarized {output_type} created at: {output}")
+            report.annotate(output_bytes=file_size(output))
+            report.finish()
+            report.save(profile_report_path(output))
+            print(report.format_table())
+            return output
+        else:
+            print(f"⚠️ Summarized {output_type} could not be created.")
+            report.fail(f"Summarized {output_type} could not be created")
+            return None
+
+    except LeaseLost:
+        raise  # stopped on purpose; the worker that took the job over continues it
+
+    except Exception as e:
+        print(f"⚠️ Error while creating summarized {output_type}: {e}")
+        report.fail(e)
+        return None
+
+    finally:
+        report.finish()
+        # Cleanup intermediates
+        if own_workspace:
+            workspace.cleanup()
+
+
+def profile_report_path(output_path):
+    return f"{os.path.splitext(output_path)[0]}.profile.json"
+
+
+def saved_download(workspace, stage):
+    """Path of a download an earlier attempt of this job already finished, if it is still there."""
+    details = workspace.done(stage)
+    if details and os.path.exists(details["path"]):
+        print(f"♻️ Reusing {os.path.basename(details['path'])} from an earlier attempt")
+        return details["path"]
+    return None
+
+
+def _download_video(url, workspace):
+    path = download_youtube_video(url, workspace.dir)
+    if path:
+        workspace.mark_done("download_video", path=path)
+    return path
+
+
+def run_summarization_job(workspace_id, youtube_url=None, video_path=None, output_type="video",
+                          summarizer="abstractive", profile=None, content_hash=None, progress=None):
+    """
+    Background job: download (if needed), summarize and return the output filename.
+    Everything is written inside the job's workspace, which is always removed afterwards.
+    Text and audio jobs never download the YouTube video stream.
+    `content_hash` is the SHA-256 of an uploaded video, computed while it was received,
+    so the file is not read again just to key the artifact cache.
+    If the process dies mid-job the workspace is left behind, and running the job again
+    with the same workspace id reuses its downloads and completed stages.
+    """
+    workspace = Workspace(workspace_id)
+    source_key = f"sha256:{content_hash}" if content_hash else None
+    lease_lost = False
+    audio_path = None
+    captions, transcript_source = None, None
+    try:
+        # Host-wide limit on concurrent pipelines, shared with other server processes
+        with HostSlot():
+            if youtube_url:
+                video_id = youtube_video_id(youtube_url)
+                source_key = f"youtube:{video_id}" if video_id else None
+
+                cached = None
+                if source_key:
+                    transcript_source, cached = cached_youtube_artifacts(source_key, summarizer, profile)
+                if cached:
+                    # A repeat video: its transcript, summary and timestamps are cached, so no
+                    # captions are fetched and only the media the output is cut from is downloaded
+                    print(f"♻️ Cache hit for {source_key}: skipping captions and transcription")
+                    captions = cached["segments"]
+                else:
+                    # Captions (when good enough) replace audio extraction and Whisper entirely
+                    captions, caption_info = fetch_youtube_captions(youtube_url, workspace.dir)
+                    if captions is not None:
+                        transcript_source = f"captions:{caption_info['source']}:{caption_info['language']}"
+
+                # The video downloads in the background; without captions the much smaller
+                # audio-only stream is fetched first so transcription can start right away
+                if output_type == "video":
+                    video_path = saved_download(workspace, "download_video") or \
+                        video_downloads.submit(_download_video, youtube_url, workspace)
+                if captions is None or output_type == "audio":
+                    audio_path = saved_download(workspace, "download_audio")
+                    if audio_path is None:
+                        audio_path = download_youtube_audio(youtube_url, workspace.dir)
+                        if audio_path:
+                            workspace.mark_done("download_audio", path=audio_path)
+                    if not audio_path and output_type != "video":
+                        raise RuntimeError("Failed to download audio.")
+
+            summarized_path = summarize_video_pipeline(video_path, progress=progress, source_key=source_key,
+                                                       audio_path=audio_path, transcript_segments=captions,
+                                                       transcript_source=transcript_source,
+                                                       workspace=workspace, output_type=output_type,
+                                                       summarizer=summarizer, profile=profile)
+        if not summarized_path:
+            return None
+        return os.path.basename(summarized_path)
+    except LeaseLost:
+        lease_lost = True  # the worker that took the job over is using the workspace now
+        raise
+    finally:
+        if isinstance(video_path, Future):
+            video_path.cancel()
+            wait_for([video_path])  # a download still running must not write into a deleted workspace
+        if not lease_lost:
+            workspace.cleanup()
@@ -0,0 +1,86 @@
+import json
+import os
+
+# Defaults for turning matched timestamps into render segments (seconds)
+MERGE_GAP = float(os.environ.get("QUICKCLIPS_MERGE_GAP", "1.0"))
+LEAD_IN = float(os.environ.get("QUICKCLIPS_LEAD_IN", "0.25"))
+TAIL_PADDING = float(os.environ.get("QUICKCLIPS_TAIL_PADDING", "0.25"))
+
+
+def _pad_and_merge(intervals, merge_gap, lead_in, tail, video_duration):
+    """Pad each (start, end, source) interval, sort by time and merge close neighbours."""
+    padded = []
+    for start, end, source in intervals:
+        start = max(0.0, start - lead_in)
+        end = end + tail
+        if video_duration:
+            end = min(end, video_duration)
+        if end > start:
+            padded.append((start, end, source))
+    padded.sort()
+
+    merged = []
+    for start, end, source in padded:
+        if merged and start - merged[-1]["end"] <= merge_gap:
+            merged[-1]["end"] = max(merged[-1]["end"], end)
+            merged[-1]["sources"].append(source)
+        else:
+            merged.append({"start": start, "end": end, "sources": [source]})
+    return merged
+
+
+def _total(segments):
+    return sum(seg["end"] - seg["start"] for seg in segments)
+
+
+def plan_segments(intervals, merge_gap=MERGE_GAP, lead_in=LEAD_IN, tail=TAIL_PADDING,
+                  target_duration=None, video_duration=None):
+    """
+    Turn matched (start, end) intervals, given in summary order, into a render plan:
+    padded, sorted by time and merged when they overlap or sit within merge_gap seconds.
+    Each segment's "sources" are indices into `intervals`; empty intervals are skipped.
+    With target_duration, intervals are considered in summary order (earlier summary
+    sentences first) and each one is kept only if the padded, merged plan still fits the
+    target; a later one that fits (e.g. a short match, or one that merges into a chosen
+    segment) is still taken after an earlier one was skipped. The first interval is
+    always kept, so the plan is never empty.
+    """
+    candidates = [(start, end, i) for i, (start, end) in enumerate(intervals) if end > start]
+
+    if target_duration:
+        chosen = []
+        for candidate in candidates:
+            trial = _pad_and_merge(chosen + [candidate], merge_gap, lead_in, tail, video_duration)
+            if chosen and _total(trial) > target_duration:
+                continue
+            chosen.append(candidate)
+        candidates = chosen
+
+    segments = _pad_and_merge(candidates, merge_gap, lead_in, tail, video_duration)
+    for seg in segments:
+        seg["start"] = round(seg["start"], 3)
+        seg["end"] = round(seg["end"], 3)
+        seg["sources"].sort()
+
+    return {
+        "segments": segments,
+        "clip_count": len(segments),
+        "matched_count": sum(1 for start, end in intervals if end > start),
+        "total_duration": round(_total(segments), 3),
+        "settings": {
+            "merge_gap": merge_gap,
+            "lead_in": lead_in,
+            "tail": tail,
+            "target_duration": target_duration,
+        },
+        # Render cost: the single-pass renderer is one process; per-clip is one per clip plus a concat
+        "ffmpeg_invocations": {"single_pass": 1, "per_clip": len(segments) + 1},
+    }
+
+
+def write_plan(plan, plan_file):
+    os.makedirs(os.path.dirname(plan_file) or ".", exist_ok=True)
+    with open(plan_file, "w", encoding="utf-8") as f:
+        json.dump(plan, f, indent=4)
+    print(f"🗺 Render plan: {plan['matched_count']} matches -> {plan['clip_count']} clips, "
+          f"{plan['total_duration']:.1f}s (saved at {plan_file})")
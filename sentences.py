@@ -0,0 +1,3 @@
+def split_summary_sentences(summary_text):
+    """Summary sentences, split the way matching and the hierarchical summarizer count them."""
+    return [s.strip() for s in summary_text.split(".") if s.strip()]
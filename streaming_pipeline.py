@@ -0,0 +1,254 @@
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import numpy as np
+from download_audio import SAMPLE_RATE, load_audio_pcm
+from chunked_transcription import split_windows
+from voice_activity import VAD_ENABLED, remap_segments, speech_only
+from transcript import segments_to_text, transcribe_segments
+from summarize_content import SPECIAL_TOKEN_MARGIN
+from SummarizedTimestamps import assign_segments, build_matches
+from sentences import split_summary_sentences
+from embedding_store import encode_normalized
+from segment_planner import plan_segments
+from keyframes import load_keyframe_index
+from summarized_video import concat_clips, cut_clip, time_str_to_seconds
+from instrumentation import attached, current_report
+from model_registry import WHISPER_MODEL, SUMMARIZER_MODEL, EMBEDDING_MODEL, \
+    get_embedder, get_summarizer
+
+# Run the overlapping streaming pipeline instead of the sequential one (QUICKCLIPS_STREAMING=1)
+STREAMING_ENABLED = os.environ.get("QUICKCLIPS_STREAMING", "0") == "1"
+
+# Streaming mode transcribes in short windows so the first summary chunk is ready early
+STREAM_WINDOW_MINUTES = float(os.environ.get("QUICKCLIPS_STREAM_WINDOW_MINUTES", "2"))
+
+# How long a stopped streaming run waits for its stage threads (a Whisper window or a clip cut
+# in progress) before giving up on removing their clip directory
+STOP_TIMEOUT_SECONDS = 120
+
+_DONE = object()
+
+
+def _start_stage(name, stage, inbox, outbox, stop, errors):
+    """
+    Run one stage generator in its own thread, passing its items to the next stage.
+    The thread reports to the starting thread's StageReport, so its work is attributed to the job.
+    """
+    report = current_report()
+
+    def target():
+        try:
+            with attached(report):
+                items = iter(inbox.get, _DONE) if inbox is not None else None
+                for item in (stage(items) if items is not None else stage()):
+                    if stop.is_set():
+                        break
+                    outbox.put(item)
+        except Exception as e:
+            traceback.print_exc()
+            errors.append(f"{name}: {e}")
+            stop.set()
+        finally:
+            outbox.put(_DONE)
+
+    thread = threading.Thread(target=target, name=f"stream-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _stopped(stop):
+    return stop is not None and stop.is_set()
+
+
+def stream_transcript(audio, model_name=WHISPER_MODEL, window_minutes=STREAM_WINDOW_MINUTES, vad=VAD_ENABLED,
+                      stop=None):
+    """
+    Yield lists of transcript segments window by window, on the original timeline.
+    Stops before the next window once `stop` is set.
+    """
+    offset_map = None
+    if vad:
+        audio, offset_map, _ = speech_only(audio)
+
+    for a, b in split_windows(audio, SAMPLE_RATE, window_minutes):
+        if _stopped(stop):
+            return
+        offset = a / SAMPLE_RATE
+        segments = [
+            dict(seg, start=round(seg["start"] + offset, 3), end=round(seg["end"] + offset, 3))
+            for seg in transcribe_segments(np.ascontiguousarray(audio[a:b], dtype=np.float32), model_name)
+        ]
+        if offset_map is not None:
+            segments = remap_segments(segments, offset_map)
+        yield segments
+
+
+def rolling_chunks(segment_batches, tokenizer, max_tokens=None):
+    """Group incoming segments into chunks that fill the summarizer's context window."""
+    if max_tokens is None:
+        max_tokens = min(tokenizer.model_max_length, 1024) - SPECIAL_TOKEN_MARGIN
+
+    chunk, tokens = [], 0
+    for segments in segment_batches:
+        for seg in segments:
+            seg_tokens = len(tokenizer(seg["text"], add_special_tokens=False)["input_ids"]) + 1
+            if chunk and tokens + seg_tokens > max_tokens:
+                yield chunk
+                chunk, tokens = [], 0
+            chunk.append(seg)
+            tokens += seg_tokens
+    if chunk:
+        yield chunk
+
+
+def summarize_and_match(chunks, summarizer, embedder, max_length=200, min_length=50, assignment="greedy",
+                        stop=None):
+    """
+    Summarize each chunk as soon as it is full and match its sentences to that chunk's
+    segments. Chunks never share segments, so matches stay unique across chunks.
+    Yields (summary_text, matches) per chunk; stops before the next chunk once `stop` is set.
+    """
+    for chunk in chunks:
+        if _stopped(stop):
+            return
+        text = segments_to_text(chunk)
+        summary = summarizer(text, max_length=max_length, min_length=min_length,
+                             do_sample=False, truncation=True)[0]["summary_text"]
+        sentences = split_summary_sentences(summary)
+        if not sentences:
+            continue
+
+        segment_vectors = encode_normalized(embedder, [seg["text"] for seg in chunk])
+        sentence_vectors = encode_normalized(embedder, sentences)
+        scores = sentence_vectors @ segment_vectors.T
+        yield summary, build_matches(sentences, chunk, assign_segments(scores, method=assignment))
+
+
+def cut_as_matched(results, video_file, clips_dir, stop=None):
+    """
+    Plan and cut the clips for each chunk's matches as soon as they arrive.
+    Stops before the next clip once `stop` is set.
+    """
+    index = load_keyframe_index(video_file) or {}
+    clip_number = 0
+    for summary, matches in results:
+        intervals = [time_str_to_seconds(m["timestamp"]) for m in matches]
+        planned = plan_segments(intervals)["segments"]
+        if not planned:
+            yield summary, matches, None
+        for seg in planned:
+            if _stopped(stop):
+                return
+            clip_number += 1
+            clip_path = os.path.join(clips_dir, f"clip_{clip_number}.mp4")
+            ok = cut_clip(video_file, seg["start"], seg["end"], clip_path,
+                          keyframes=index.get("keyframes"), stream=index.get("stream"))
+            yield summary, matches, clip_path if ok else None
+            summary, matches = None, []  # report each chunk's summary only once
+
+
+def stream_summarize_video(video_path, output_video_path, work_dir, transcript_txt_file=None,
+                           transcript_json_file=None, summary_file=None, timestamps_file=None,
+                           max_length=200, min_length=50, progress=None, whisper_model=WHISPER_MODEL,
+                           summarizer_model=SUMMARIZER_MODEL, embedding_model=EMBEDDING_MODEL):
+    """
+    Streaming variant of the pipeline: transcription, summarization/matching and clip
+    cutting run on separate threads connected by queues, so summaries start as soon as
+    the first transcript window is done and clips are cut as their timestamps arrive.
+    Writes the same intermediate files as the sequential pipeline when paths are given.
+    Returns a dict with segments, summary, timestamps and the output video path, or None.
+    """
+    progress = progress or (lambda stage, fraction=0.0, message=None: None)
+
+    progress("extract_audio")
+    audio = load_audio_pcm(video_path)
+    if audio is None:
+        return None
+
+    summarizer = get_summarizer(summarizer_model)
+    embedder = get_embedder(embedding_model)
+    # A private directory, so a later attempt of the same job never shares it with this one
+    os.makedirs(work_dir, exist_ok=True)
+    clips_dir = tempfile.mkdtemp(prefix="stream_clips_", dir=work_dir)
+
+    all_segments, summaries, matches_all, clip_files = [], [], [], []
+    segment_queue, chunk_queue, match_queue, clip_queue = (queue.Queue() for _ in range(4))
+    stop = threading.Event()
+    errors = []
+    threads = []
+
+    def record_segments(batches):
+        for segments in batches:
+            all_segments.extend(segments)
+            yield segments
+
+    try:
+        progress("transcribe", message="Transcribing, summarizing and cutting in parallel")
+        threads += [
+            _start_stage("transcribe", lambda: record_segments(stream_transcript(audio, whisper_model, stop=stop)),
+                         None, segment_queue, stop, errors),
+            _start_stage("chunk", lambda items: rolling_chunks(items, summarizer.tokenizer),
+                         segment_queue, chunk_queue, stop, errors),
+            _start_stage("summarize", lambda items: summarize_and_match(items, summarizer, embedder,
+                                                                        max_length, min_length, stop=stop),
+                         chunk_queue, match_queue, stop, errors),
+            _start_stage("render", lambda items: cut_as_matched(items, video_path, clips_dir, stop=stop),
+                         match_queue, clip_queue, stop, errors),
+        ]
+
+        for summary, matches, clip_path in iter(clip_queue.get, _DONE):
+            if summary:
+                summaries.append(summary)
+            matches_all.extend(matches)
+            if clip_path:
+                clip_files.append(clip_path)
+            progress("render", message=f"{len(clip_files)} clips cut so far")
+
+        for thread in threads:
+            thread.join()
+        if errors:
+            print(f"⚠️ Streaming pipeline failed: {'; '.join(errors)}")
+            return None
+
+        if transcript_txt_file:
+            with open(transcript_txt_file, "w", encoding="utf-8") as f:
+                f.write(segments_to_text(all_segments))
+        if transcript_json_file:
+            with open(transcript_json_file, "w", encoding="utf-8") as f:
+                json.dump(all_segments, f, indent=4)
+        if summary_file:
+            with open(summary_file, "w", encoding="utf-8") as f:
+                f.write(" ".join(summaries))
+        if timestamps_file:
+            with open(timestamps_file, "w", encoding="utf-8") as f:
+                json.dump(matches_all, f, indent=4)
+
+        if not clip_files:
+            print("⚠️ No valid clips were created. Check timestamps.")
+            return None
+        if not concat_clips(clip_files, output_video_path, os.path.join(clips_dir, "clips_list.txt")):
+            return None
+
+        return {
+            "segments": all_segments,
+            "summary": " ".join(summaries),
+            "timestamps": matches_all,
+            "video": output_video_path,
+        }
+    finally:
+        # If the job is being stopped (e.g. LeaseLost from progress), end the stage threads too,
+        # and only remove the clips once no thread can still be cutting into the directory
+        stop.set()
+        deadline = time.monotonic() + STOP_TIMEOUT_SECONDS
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        if any(thread.is_alive() for thread in threads):
+            print(f"⚠️ Streaming stages still running after {STOP_TIMEOUT_SECONDS}s, leaving {clips_dir}")
+        else:
+            shutil.rmtree(clips_dir, ignore_errors=True)
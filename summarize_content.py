@@ -1,5 +1,33 @@
-from transformers import pipeline
+import hashlib
 import os
+import time
+from model_registry import SUMMARIZER_MODEL, get_summarizer
+from instrumentation import record_failure
+from artifact_cache import CACHE_DIR, ArtifactCache, cache_key
+from sentences import split_summary_sentences
+
+# Number of chunks summarized per forward pass
+SUMMARY_BATCH_SIZE = int(os.environ.get("QUICKCLIPS_SUMMARY_BATCH_SIZE", "4"))
+
+# Tokens kept free in the context window for the special tokens the model adds
+SPECIAL_TOKEN_MARGIN = 8
+
+# Hierarchical mode: partial summaries are re-summarized until at most this many sentences remain
+SUMMARY_TARGET_SENTENCES = int(os.environ.get("QUICKCLIPS_SUMMARY_SENTENCES", "12"))
+
+# Reduce steps stop after this many levels even if the target is not met
+MAX_SUMMARY_LEVELS = 4
+
+# Rough token cost of one word, used to size the output of the last reduce steps
+TOKENS_PER_WORD = 1.4
+MIN_REDUCE_TOKENS = 30
+
+# Hierarchical mode: each level's partial summaries and chunk count, keyed by the level's
+# input text, model and lengths. Kept under its own root with its own size budget, so level
+# entries never evict whole-pipeline artifacts and show up separately in the cache stats
+SUMMARY_LEVEL_CACHE_MB = int(os.environ.get("QUICKCLIPS_SUMMARY_LEVEL_CACHE_MB", "128"))
+level_cache = ArtifactCache(root=os.path.join(CACHE_DIR, "summary_levels"), max_mb=SUMMARY_LEVEL_CACHE_MB)
+
 
 def chunk_text(text, max_chars=1000):
     """Split text into chunks of max_chars length without breaking words."""
@@ -15,23 +43,141 @@ def chunk_text(text, max_chars=1000):
         chunks.append(chunk.strip())
     return chunks
 
-def extract_main_points(transcript_file, output_file="downloads/summary_output.txt", max_length=200, min_length=50):
+
+def chunk_text_by_tokens(text, tokenizer, max_tokens=None):
+    """
+    Split text into chunks that fill the model's context window without breaking words.
+    Uses the tokenizer's character offsets, so the text is tokenized only once.
+    """
+    if max_tokens is None:
+        max_tokens = min(tokenizer.model_max_length, 1024) - SPECIAL_TOKEN_MARGIN
+
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = encoding["offset_mapping"]
+    if not offsets:
+        return []
+
+    # Spread tokens evenly so the last chunk is not a tiny remainder
+    chunk_count = -(-len(offsets) // max_tokens)
+    target_tokens = -(-len(offsets) // chunk_count)
+
+    chunks = []
+    start = 0
+    while start < len(offsets):
+        end = min(start + target_tokens, len(offsets))
+        if end < len(offsets):
+            # Back off to the first token of a word so no word is split across chunks
+            cut = end
+            while cut > start + 1 and not _starts_word(text, offsets[cut][0]):
+                cut -= 1
+            if cut > start + 1:
+                end = cut
+        chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    return chunks
+
+
+def _starts_word(text, char_index):
+    return char_index == 0 or text[char_index - 1].isspace()
+
+
+def summarize_chunks(summarizer, chunks, max_length=200, min_length=50, batch_size=SUMMARY_BATCH_SIZE,
+                     batch_latencies=None):
+    """Summarize chunks several at a time (one forward pass per batch); returns one summary per chunk."""
+    summary_list = []
+    for i in range(0, len(chunks), batch_size):
+        batch = chunks[i:i + batch_size]
+        started = time.perf_counter()
+        outputs = summarizer(
+            batch, max_length=max_length, min_length=min_length, do_sample=False,
+            truncation=True, batch_size=len(batch)
+        )
+        latency = time.perf_counter() - started
+        if batch_latencies is not None:
+            batch_latencies.append(latency)
+        summary_list.extend(output["summary_text"] for output in outputs)
+        print(f"⏱ Summarized batch {i // batch_size + 1} ({len(batch)} chunks) in {latency:.2f}s")
+    return summary_list
+
+
+def summarize_level(text, model_name=SUMMARIZER_MODEL, max_length=200, min_length=50,
+                    batch_size=SUMMARY_BATCH_SIZE, batch_latencies=None, cache=False):
+    """
+    One map step: chunk `text` to the context window and summarize every chunk.
+    With cache=True the result is cached by input text, so the model is not even loaded on a hit.
+    Returns (partial summaries, chunk count).
+    """
+    key = None
+    if cache:
+        key = cache_key(f"sha256:{hashlib.sha256(text.encode('utf-8')).hexdigest()}", step="summary_level",
+                        model=model_name, max_length=max_length, min_length=min_length)
+        cached = level_cache.get(key)
+        if cached and "chunks" in cached:
+            return cached["partials"], cached["chunks"]
+
+    summarizer = get_summarizer(model_name)
+    chunks = chunk_text_by_tokens(text, summarizer.tokenizer)
+    partials = summarize_chunks(summarizer, chunks, max_length=max_length, min_length=min_length,
+                                batch_size=batch_size, batch_latencies=batch_latencies)
+    if key is not None:
+        level_cache.put(key, {"partials": partials, "chunks": len(chunks)})
+    return partials, len(chunks)
+
+
+def _reduce_lengths(text, target_sentences, max_length, min_length):
+    """Output lengths for a reduce step, shrunk so `target_sentences` of this text's average length fit."""
+    sentences = split_summary_sentences(text)
+    words_per_sentence = len(text.split()) / max(len(sentences), 1)
+    budget = max(MIN_REDUCE_TOKENS, int(target_sentences * words_per_sentence * TOKENS_PER_WORD))
+    max_length = min(max_length, budget)
+    return max_length, min(min_length, max_length // 2)
+
+
+def extract_main_points(transcript_file, output_file="downloads/summary_output.txt", max_length=200, min_length=50,
+                        model_name=SUMMARIZER_MODEL, batch_size=SUMMARY_BATCH_SIZE, stats=None,
+                        target_sentences=None):
+    """
+    Summarize a transcript in token-sized chunks, several chunks per forward pass.
+    With `target_sentences` (hierarchical mode) the joined partial summaries are
+    summarized again, level by level, until at most that many sentences remain, so the
+    summary (and the clips matched to it) no longer grows with the video's length.
+    In that mode every level is cached, so another target for the same transcript reruns
+    only the reduce steps that change; the plain single-level summary is not cached.
+    If a `stats` dict is given it is filled with the chunk count, per-batch latency
+    and the sentences / chunks of each level.
+    """
     try:
         with open(transcript_file, "r", encoding="utf-8") as f:
             text = f.read()
 
-        summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-
-        chunks = chunk_text(text, max_chars=1000)  # split long transcript
-        summary_list = []
+        batch_latencies = []
+        partials, chunk_count = summarize_level(text, model_name, max_length=max_length, min_length=min_length,
+                                                batch_size=batch_size, batch_latencies=batch_latencies,
+                                                cache=bool(target_sentences))
+        final_summary = " ".join(partials)
+        levels = [{"chunks": chunk_count, "sentences": len(split_summary_sentences(final_summary))}]
 
-        for chunk in chunks:
-            summary = summarizer(
-                chunk, max_length=max_length, min_length=min_length, do_sample=False
-            )[0]["summary_text"]
-            summary_list.append(summary)
+        while (target_sentences and levels[-1]["sentences"] > target_sentences
+               and len(levels) < MAX_SUMMARY_LEVELS):
+            reduce_max, reduce_min = _reduce_lengths(final_summary, target_sentences, max_length, min_length)
+            partials, chunk_count = summarize_level(final_summary, model_name, max_length=reduce_max,
+                                                    min_length=reduce_min, batch_size=batch_size,
+                                                    batch_latencies=batch_latencies, cache=True)
+            reduced = " ".join(partials)
+            sentences = len(split_summary_sentences(reduced))
+            if sentences >= levels[-1]["sentences"]:
+                break  # no longer shrinking
+            final_summary = reduced
+            levels.append({"chunks": chunk_count, "sentences": sentences})
+            print(f"🔁 Reduced the summary to {sentences} sentences (level {len(levels)})")
 
-        final_summary = " ".join(summary_list)
+        if stats is not None:
+            stats["chunks"] = levels[0]["chunks"]
+            stats["batch_size"] = batch_size
+            stats["batch_latencies"] = batch_latencies
+            stats["levels"] = levels
 
         # Ensure downloads directory exists
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
@@ -44,8 +190,10 @@ def extract_main_points(transcript_file, output_file="downloads/summary_output.t
         return True
     except Exception as e:
         print(f"⚠️ Error: {e}")
+        record_failure(e)
         return False
 
+
 if __name__ == "__main__":
     transcript_path = "downloads/transcript.txt"
     output_summary_path = "downloads/main_points_summary.txt"  # <-- New file
@@ -0,0 +1,63 @@
+import wave
+import numpy as np
+from download_audio import SAMPLE_RATE
+from segment_planner import MERGE_GAP, LEAD_IN, TAIL_PADDING, plan_segments, write_plan
+from summarized_video import load_intervals
+from instrumentation import record_failure
+
+# Short fade at every cut so joined segments do not click
+FADE_SECONDS = 0.01
+
+
+def write_wav(pieces, output_file, sample_rate=SAMPLE_RATE):
+    """Write float32 mono PCM pieces one after another as a single 16-bit WAV."""
+    with wave.open(output_file, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        for piece in pieces:
+            pcm = (np.clip(piece, -1.0, 1.0) * 32767).astype("<i2")
+            wav.writeframes(pcm.tobytes())
+
+
+def _faded(audio, start, end, fade):
+    piece = np.array(audio[start:end], dtype=np.float32)
+    n = min(fade, len(piece) // 2)
+    if n:
+        ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+        piece[:n] *= ramp
+        piece[-n:] *= ramp[::-1]
+    return piece
+
+
+def create_summarized_audio(audio, timestamps_file, output_file="downloads/summarized_audio.wav",
+                            plan_file=None, merge_gap=MERGE_GAP, lead_in=LEAD_IN, tail=TAIL_PADDING,
+                            target_duration=None, sample_rate=SAMPLE_RATE):
+    """
+    Join the matched segments of already-decoded mono PCM (see load_audio_pcm) into one WAV.
+    Segments are planned exactly like create_summarized_video, but the cut is plain array
+    slicing, so no video is decoded or muxed.
+    """
+    try:
+        duration = len(audio) / sample_rate
+        plan = plan_segments(load_intervals(timestamps_file), merge_gap=merge_gap, lead_in=lead_in,
+                             tail=tail, target_duration=target_duration, video_duration=duration)
+        if plan_file:
+            write_plan(plan, plan_file)
+
+        spans = [(int(seg["start"] * sample_rate), int(seg["end"] * sample_rate)) for seg in plan["segments"]]
+        spans = [(a, min(b, len(audio))) for a, b in spans if min(b, len(audio)) > a]
+        if not spans:
+            print("⚠️ No valid segments were found. Check timestamps.")
+            return None
+
+        fade = int(FADE_SECONDS * sample_rate)
+        write_wav((_faded(audio, a, b, fade) for a, b in spans), output_file, sample_rate)
+
+        print(f"✅ Summarized audio saved at: {output_file} ({plan['total_duration']:.1f}s)")
+        return output_file
+
+    except Exception as e:
+        print(f"⚠️ Error while creating summarized audio: {e}")
+        record_failure(e)
+        return None
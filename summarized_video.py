@@ -1,6 +1,26 @@
 import json
 import os
+import shutil
 import subprocess
+import tempfile
+from download_audio import probe_media
+from keyframes import (load_keyframe_index, next_keyframe, previous_keyframe, seek_at, seek_before,
+                       duration_until, edge_encode_args)
+from segment_planner import MERGE_GAP, LEAD_IN, TAIL_PADDING, plan_segments, write_plan
+from instrumentation import record_failure, run_traced
+
+# Final outputs put the moov atom first, so browsers can start playing before the download ends
+FASTSTART = ["-movflags", "+faststart"]
+
+# A smart cut whose joined clip is off by more than this is replaced by a full re-encode
+SMART_CUT_TOLERANCE = 0.1
+
+# Above this many segments the single-pass renderer trims one input instead of seeking per segment
+MAX_SEEK_INPUTS = 64
+
+# renderer="auto" cuts clips by stream copy (re-encoding only their edges) when at least this
+# share of the segments holds a whole GOP; many short segments render faster in a single pass
+COPY_MIN_GOP_SHARE = 0.5
 
 
 def time_str_to_seconds(time_str):
@@ -11,86 +31,314 @@ def time_str_to_seconds(time_str):
     return start, end
 
 
-def cut_clip(video_file, start, end, clip_path):
-    """Try fast cut for video, but always re-encode audio for clarity."""
+def _run_ffmpeg(cmd):
+    run_traced(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _valid_clip(clip_path):
+    return os.path.exists(clip_path) and os.path.getsize(clip_path) > 1000
+
 
-    # --- Fast cut: video copy, audio re-encode ---
-    cmd_fast = [
+def _copy_cmd(video_file, start, end, clip_path, start_is_keyframe=False, end_is_keyframe=False):
+    """
+    Stream-copy video from `start`, re-encode audio for clarity. Keyframe times are
+    formatted so the copy starts on that keyframe and stops before the one at `end`.
+    """
+    ss = seek_at(start) if start_is_keyframe else f"{start:.3f}"
+    t = duration_until(ss, end) if end_is_keyframe else f"{end - float(ss):.3f}"
+    return [
         "ffmpeg", "-y",
-        "-ss", str(start),
-        "-to", str(end),
+        "-ss", ss,
         "-i", video_file,
+        "-t", t,
         "-c:v", "copy",            # fast video copy
         "-c:a", "aac",             # re-encode audio for clarity
         "-b:a", "192k",            # good audio quality
+        "-avoid_negative_ts", "make_zero",
         clip_path
     ]
-    subprocess.run(cmd_fast, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-    # If clip is valid, return success
-    if os.path.exists(clip_path) and os.path.getsize(clip_path) > 1000:
-        return True
 
-    # --- Fallback: re-encode both video + audio ---
-    cmd_reencode = [
+def _reencode_cmd(video_file, start, end, clip_path, video_args=None):
+    ss = seek_before(start)
+    return [
         "ffmpeg", "-y",
-        "-ss", str(start),
-        "-to", str(end),
+        "-ss", ss,
         "-i", video_file,
-        "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+        "-t", duration_until(ss, end),
+        *(video_args or ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23"]),
         "-c:a", "aac", "-b:a", "192k",
         clip_path
     ]
-    subprocess.run(cmd_reencode, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-    return os.path.exists(clip_path) and os.path.getsize(clip_path) > 1000
 
+def _smart_cut(video_file, start, end, clip_path, keyframes, stream=None):
+    """
+    Exact cut that only re-encodes the partial GOPs at each edge:
+    [start, k_in) and [k_out, end) are re-encoded with the source's H.264 parameters,
+    [k_in, k_out) is stream-copied. Returns False (so the caller re-encodes the whole
+    clip) when the interval does not span a whole GOP, the source's parameters cannot
+    be reproduced, or the joined clip does not have the expected duration.
+    """
+    video_args = edge_encode_args(stream)
+    if video_args is None:
+        return False
+    k_in = next_keyframe(keyframes, start)
+    k_out = previous_keyframe(keyframes, end)
+    if k_in is None or k_out <= k_in:
+        return False
 
-def create_summarized_video(video_file, timestamps_file, output_file="downloads/summarized_video.mp4"):
+    base, _ = os.path.splitext(clip_path)
+    parts = []
+    if k_in - start > 0.01:
+        parts.append((f"{base}_head.mp4", _reencode_cmd(video_file, start, k_in, f"{base}_head.mp4", video_args)))
+    parts.append((f"{base}_body.mp4", _copy_cmd(video_file, k_in, k_out, f"{base}_body.mp4",
+                                                start_is_keyframe=True, end_is_keyframe=True)))
+    if end - k_out > 0.01:
+        parts.append((f"{base}_tail.mp4", _reencode_cmd(video_file, k_out, end, f"{base}_tail.mp4", video_args)))
+
+    list_file = f"{base}_parts.txt"
     try:
-        # Load timestamps
-        with open(timestamps_file, "r", encoding="utf-8") as f:
-            summary_data = json.load(f)
-
-        clips_dir = "downloads/temp_clips"
-        os.makedirs(clips_dir, exist_ok=True)
-        clip_files = []
-
-        # Generate clips
-        for i, item in enumerate(summary_data):
-            start, end = time_str_to_seconds(item["timestamp"])
-            if end > start:
-                clip_path = os.path.join(clips_dir, f"clip_{i+1}.mp4")
-                if cut_clip(video_file, start, end, clip_path):
-                    clip_files.append(clip_path)
-
-        if not clip_files:
+        for part_path, cmd in parts:
+            _run_ffmpeg(cmd)
+            if not _valid_clip(part_path):
+                return False
+
+        with open(list_file, "w") as f:
+            for part_path, _ in parts:
+                f.write(f"file '{os.path.abspath(part_path)}'\n")
+        _run_ffmpeg(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", clip_path])
+        if not _valid_clip(clip_path):
+            return False
+        duration = (probe_media(clip_path) or {}).get("duration")
+        if duration is None or abs(duration - (end - start)) > SMART_CUT_TOLERANCE:
+            print(f"↩️ Smart cut of {start:.2f}-{end:.2f}s came out at {duration}s, re-encoding instead")
+            return False
+        return True
+    finally:
+        for path in [list_file] + [part_path for part_path, _ in parts]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def cut_clip(video_file, start, end, clip_path, keyframes=None, exact=False, stream=None):
+    """
+    Cut [start, end) from video_file, stream-copying video wherever possible.
+    With a keyframe list, non-exact cuts snap the start back to the previous keyframe
+    so the copy is clean; exact cuts re-encode only the partial GOPs at the edges
+    (H.264 sources whose parameters libx264 can reproduce, see keyframes.edge_encode_args;
+    `stream` is the keyframe index's stream info).
+    Without keyframes, a plain copy is tried first and a full re-encode is the fallback.
+    """
+    if keyframes:
+        if exact:
+            if _smart_cut(video_file, start, end, clip_path, keyframes, stream):
+                return True
+        else:
+            _run_ffmpeg(_copy_cmd(video_file, previous_keyframe(keyframes, start), end, clip_path,
+                                  start_is_keyframe=True))
+            if _valid_clip(clip_path):
+                return True
+    else:
+        # --- Fast cut: video copy, audio re-encode ---
+        _run_ffmpeg(_copy_cmd(video_file, start, end, clip_path))
+        if _valid_clip(clip_path):
+            return True
+
+    # --- Fallback: re-encode both video + audio ---
+    _run_ffmpeg(_reencode_cmd(video_file, start, end, clip_path))
+    return _valid_clip(clip_path)
+
+
+def load_intervals(timestamps_file):
+    """
+    Read the matched timestamps JSON and return its (start, end) pairs in file order.
+    Empty or reversed pairs are kept (plan_segments skips them), so a plan's source
+    indices are row numbers in the file.
+    """
+    with open(timestamps_file, "r", encoding="utf-8") as f:
+        summary_data = json.load(f)
+
+    return [time_str_to_seconds(item["timestamp"]) for item in summary_data]
+
+
+def has_audio_stream(video_file):
+    info = probe_media(video_file)
+    return bool(info and info["has_audio"])
+
+
+def build_single_pass_command(video_file, intervals, output_file, with_audio=True):
+    """
+    Build one ffmpeg command that renders all intervals into output_file.
+    Up to MAX_SEEK_INPUTS intervals, the source is opened once per interval with
+    input seeking (only the needed GOPs are decoded); beyond that, a single input
+    is cut with trim/atrim filters. Either way the pieces are joined by the concat filter.
+    """
+    cmd = ["ffmpeg", "-y", "-nostdin"]
+    filters = []
+    labels = []
+
+    if len(intervals) <= MAX_SEEK_INPUTS:
+        for i, (start, end) in enumerate(intervals):
+            cmd += ["-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", video_file]
+            filters.append(f"[{i}:v:0]setpts=PTS-STARTPTS[v{i}]")
+            if with_audio:
+                filters.append(f"[{i}:a:0]asetpts=PTS-STARTPTS[a{i}]")
+    else:
+        cmd += ["-i", video_file]
+        for i, (start, end) in enumerate(intervals):
+            filters.append(f"[0:v:0]trim=start={start:.3f}:end={end:.3f},setpts=PTS-STARTPTS[v{i}]")
+            if with_audio:
+                filters.append(f"[0:a:0]atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS[a{i}]")
+
+    for i in range(len(intervals)):
+        labels.append(f"[v{i}][a{i}]" if with_audio else f"[v{i}]")
+    audio_flag = 1 if with_audio else 0
+    outputs = "[outv][outa]" if with_audio else "[outv]"
+    filters.append(f"{''.join(labels)}concat=n={len(intervals)}:v=1:a={audio_flag}{outputs}")
+
+    cmd += ["-filter_complex", ";".join(filters), "-map", "[outv]"]
+    if with_audio:
+        cmd += ["-map", "[outa]", "-c:a", "aac", "-b:a", "192k"]
+    cmd += ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", *FASTSTART, output_file]
+    return cmd
+
+
+def render_single_pass(video_file, intervals, output_file, with_audio=None):
+    """Render all intervals with a single ffmpeg process and no intermediate clip files."""
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    if with_audio is None:
+        with_audio = has_audio_stream(video_file)
+    cmd = build_single_pass_command(video_file, intervals, output_file, with_audio=with_audio)
+    result = run_traced(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        print("⚠️ Single-pass render failed:", result.stderr.decode(errors="ignore")[-500:])
+        return False
+    return os.path.exists(output_file) and os.path.getsize(output_file) > 1000
+
+
+def render_per_clip(video_file, intervals, output_file, clips_dir, exact_cuts=False, index=None):
+    """
+    Cut each interval to its own clip file, then concatenate them (one ffmpeg per clip).
+    The keyframe index is built once per source video so most cuts are pure stream copies.
+    """
+    os.makedirs(clips_dir, exist_ok=True)
+    clip_files = []
+
+    index = index or load_keyframe_index(video_file) or {}
+    keyframes = index.get("keyframes")
+
+    # Generate clips
+    for i, (start, end) in enumerate(intervals):
+        clip_path = os.path.join(clips_dir, f"clip_{i+1}.mp4")
+        if cut_clip(video_file, start, end, clip_path, keyframes=keyframes,
+                    exact=exact_cuts, stream=index.get("stream")):
+            clip_files.append(clip_path)
+
+    if not clip_files:
+        print("⚠️ No valid clips were created. Check timestamps.")
+        return False
+
+    return concat_clips(clip_files, output_file, os.path.join(clips_dir, "clips_list.txt"))
+
+
+def concat_clips(clip_files, output_file, list_file):
+    """Join already-cut clips with the concat demuxer (stream copy, no re-encode)."""
+    # Write list of clips for concatenation
+    with open(list_file, "w") as f:
+        for clip in clip_files:
+            f.write(f"file '{os.path.abspath(clip)}'\n")
+
+    # Concatenate all clips
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    cmd_concat = [
+        "ffmpeg", "-y",
+        "-f", "concat",
+        "-safe", "0",
+        "-i", list_file,
+        "-c", "copy",
+        *FASTSTART,
+        output_file
+    ]
+    run_traced(cmd_concat, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return os.path.exists(output_file)
+
+
+def _spans_gop(keyframes, start, end):
+    k_in = next_keyframe(keyframes, start)
+    return k_in is not None and previous_keyframe(keyframes, end) > k_in
+
+
+def choose_renderer(intervals, index):
+    """
+    Renderer for renderer="auto": "per_clip" (smart cuts: whole GOPs stream-copied, edges
+    re-encoded) when the source has a keyframe index, libx264 can reproduce its parameters
+    on the edges and most segments hold a whole GOP; "single_pass" otherwise.
+    """
+    keyframes = (index or {}).get("keyframes")
+    if not keyframes or edge_encode_args(index.get("stream")) is None or len(intervals) > MAX_SEEK_INPUTS:
+        return "single_pass"
+    spanning = sum(1 for start, end in intervals if _spans_gop(keyframes, start, end))
+    return "per_clip" if spanning >= COPY_MIN_GOP_SHARE * len(intervals) else "single_pass"
+
+
+def create_summarized_video(video_file, timestamps_file, output_file="downloads/summarized_video.mp4",
+                            temp_clips_dir=None, renderer="auto", exact_cuts=False,
+                            plan_file=None, merge_gap=MERGE_GAP, lead_in=LEAD_IN, tail=TAIL_PADDING,
+                            target_duration=None):
+    """
+    Render the matched segments into one video.
+    The matches are first planned (sorted, padded, merged, optionally cut to
+    target_duration) and the plan is written to plan_file, by default next to the output.
+    renderer="single_pass" builds a single ffmpeg command (re-encoding everything) and
+    falls back to the per-clip path if it fails; renderer="per_clip" always cuts clips one
+    by one, stream-copying keyframe-snapped segments unless exact_cuts is set.
+    renderer="auto" (the default) picks one per plan with choose_renderer(); its per-clip
+    cuts are exact, so the output covers the same frames as a single-pass render.
+    """
+    try:
+        info = probe_media(video_file) or {}
+        plan = plan_segments(load_intervals(timestamps_file), merge_gap=merge_gap, lead_in=lead_in,
+                             tail=tail, target_duration=target_duration,
+                             video_duration=info.get("duration"))
+        write_plan(plan, plan_file or f"{os.path.splitext(output_file)[0]}.plan.json")
+
+        intervals = [(seg["start"], seg["end"]) for seg in plan["segments"]]
+        if not intervals:
             print("⚠️ No valid clips were created. Check timestamps.")
             return None
 
-        # Write list of clips for concatenation
-        list_file = os.path.join(clips_dir, "clips_list.txt")
-        with open(list_file, "w") as f:
-            for clip in clip_files:
-                f.write(f"file '{os.path.abspath(clip)}'\n")
-
-        # Concatenate all clips
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        cmd_concat = [
-            "ffmpeg", "-y",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", list_file,
-            "-c", "copy",
-            output_file
-        ]
-        subprocess.run(cmd_concat, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        index = None
+        if renderer == "auto":
+            index = load_keyframe_index(video_file)
+            renderer = choose_renderer(intervals, index)
+            exact_cuts = True
+            print(f"🎞 Rendering {len(intervals)} segments with the {renderer} renderer")
+
+        if renderer == "single_pass":
+            if render_single_pass(video_file, intervals, output_file, with_audio=info.get("has_audio")):
+                print(f"✅ Summarized video saved at: {output_file}")
+                return output_file
+            print("↩️ Falling back to per-clip rendering...")
+
+        # Without a job-scoped directory, clips go to a private temporary one so that
+        # concurrent renders never share clip files
+        clips_dir = temp_clips_dir or tempfile.mkdtemp(prefix=".clips_",
+                                                       dir=os.path.dirname(os.path.abspath(output_file)))
+        try:
+            if not render_per_clip(video_file, intervals, output_file, clips_dir, exact_cuts=exact_cuts,
+                                   index=index):
+                return None
+        finally:
+            if temp_clips_dir is None:
+                shutil.rmtree(clips_dir, ignore_errors=True)
 
         print(f"✅ Summarized video saved at: {output_file}")
         return output_file
 
     except Exception as e:
         print(f"⚠️ Error while creating summarized video: {e}")
+        record_failure(e)
         return None
 
 
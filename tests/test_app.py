@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("flask")
+import app  # noqa: E402
+from job_queue import SqliteJobQueue  # noqa: E402
+
+
+class FailingWarmup:
+    def start(self):
+        raise AssertionError("the web tier must not load models in sqlite mode")
+
+
+@pytest.fixture
+def sqlite_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "JOB_QUEUE", "sqlite")
+    monkeypatch.setattr(app, "jobs", SqliteJobQueue(path=str(tmp_path / "queue.db")))
+    monkeypatch.setattr(app, "warmup", FailingWarmup())
+    return app.app.test_client()
+
+
+def test_sqlite_mode_is_ready_without_loading_models(sqlite_app):
+    response = sqlite_app.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json() == {"ready": True, "queue": {}}
+
+
+def test_sqlite_mode_is_not_ready_without_the_queue(sqlite_app, tmp_path):
+    (tmp_path / "queue.db").unlink()
+    (tmp_path / "queue.db").mkdir()  # no longer a database sqlite can open
+    response = sqlite_app.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["ready"] is False
@@ -0,0 +1,19 @@
+import importlib
+import os
+import sys
+
+
+def test_importing_the_benchmark_leaves_the_cache_alone(monkeypatch):
+    monkeypatch.delenv("QUICKCLIPS_CACHE_DIR", raising=False)
+    sys.modules.pop("benchmarks.run", None)
+    run = importlib.import_module("benchmarks.run")
+    assert "QUICKCLIPS_CACHE_DIR" not in os.environ
+    assert not hasattr(run, "BENCHMARK_CACHE_DIR")
+
+
+def test_use_private_cache_points_the_cache_at_a_fresh_directory(monkeypatch):
+    from benchmarks.run import use_private_cache
+    monkeypatch.setenv("QUICKCLIPS_CACHE_DIR", "cache")  # restored after the test
+    cache_dir = use_private_cache()
+    assert os.environ["QUICKCLIPS_CACHE_DIR"] == cache_dir
+    assert os.listdir(cache_dir) == []
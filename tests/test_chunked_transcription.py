@@ -0,0 +1,38 @@
+import chunked_transcription
+from chunked_transcription import pool_size
+from model_registry import ModelRegistry
+
+MB = 1024 * 1024
+
+
+def use_registry(monkeypatch, budget_mb):
+    registry = ModelRegistry(ram_budget_mb=budget_mb)
+    monkeypatch.setattr(chunked_transcription, "registry", registry)
+    return registry
+
+
+def test_workers_are_shared_by_concurrent_jobs(monkeypatch):
+    use_registry(monkeypatch, budget_mb=100_000)
+    assert pool_size("base", workers=8, concurrent_jobs=2) == 4
+    assert pool_size("base", workers=1, concurrent_jobs=2) == 1
+
+
+def test_workers_fit_in_the_free_model_budget(monkeypatch):
+    # 1000 MB free, ~290 MB per base model -> 3 copies
+    use_registry(monkeypatch, budget_mb=1000)
+    assert pool_size("base", workers=8, concurrent_jobs=1) == 3
+    assert pool_size("base@int8", workers=8, concurrent_jobs=1) == 3
+
+
+def test_resident_model_size_is_preferred(monkeypatch):
+    registry = use_registry(monkeypatch, budget_mb=1000)
+    registry.register_loader("whisper", lambda name: object())
+    registry.get("whisper", "custom-model")
+    registry._models[("whisper", "custom-model")]["size_bytes"] = 400 * MB
+    # 600 MB left after the resident copy, 400 MB per worker
+    assert pool_size("custom-model", workers=8, concurrent_jobs=1) == 1
+
+
+def test_unknown_models_are_only_limited_by_the_worker_count(monkeypatch):
+    use_registry(monkeypatch, budget_mb=10)
+    assert pool_size("my-finetune", workers=4, concurrent_jobs=1) == 4
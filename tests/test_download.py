@@ -0,0 +1,79 @@
+from download import _vtt_seconds, parse_vtt
+
+
+def test_timestamps_with_and_without_hours():
+    assert _vtt_seconds("01:02:03.456") == 3723.456
+    assert _vtt_seconds("02:03.456") == 123.456
+    assert _vtt_seconds(" 00:00:01.500 align:start position:0%") == 1.5
+
+
+def test_unparseable_timestamp_is_none():
+    assert _vtt_seconds("a") is None
+    assert _vtt_seconds("") is None
+
+
+def test_hourless_cues():
+    text = """WEBVTT
+
+00:01.000 --> 00:03.500
+Hello there.
+
+00:04.000 --> 00:06.000
+General Kenobi.
+"""
+    assert parse_vtt(text) == [
+        {"start": 1.0, "end": 3.5, "text": "Hello there."},
+        {"start": 4.0, "end": 6.0, "text": "General Kenobi."},
+    ]
+
+
+def test_auto_caption_repeated_lines_are_dropped():
+    # YouTube automatic captions carry the previous line into the next cue
+    text = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+we<00:00:00.500><c> are</c><c> live</c>
+
+00:00:02.000 --> 00:00:02.010 align:start position:0%
+we are live
+
+00:00:02.010 --> 00:00:04.000 align:start position:0%
+we are live
+and<00:00:02.500><c> talking</c>
+
+00:00:04.000 --> 00:00:06.000 align:start position:0%
+and talking
+about captions
+"""
+    assert parse_vtt(text) == [
+        {"start": 0.0, "end": 2.0, "text": "we are live"},
+        {"start": 2.01, "end": 4.0, "text": "and talking"},
+        {"start": 4.0, "end": 6.0, "text": "about captions"},
+    ]
+
+
+def test_malformed_cues_and_notes_are_skipped():
+    text = """WEBVTT
+
+NOTE a --> b
+
+NOTE
+timings look like 00:00:01.000 --> 00:00:02.000
+
+00:00:01.000 --> garbage
+broken end
+
+-->
+no stamps at all
+
+00:00:05.000 --> 00:00:07.000
+kept
+"""
+    assert parse_vtt(text) == [{"start": 5.0, "end": 7.0, "text": "kept"}]
+
+
+def test_crlf_line_endings():
+    text = "WEBVTT\r\n\r\n00:00:01.000 --> 00:00:02.000\r\nline\r\n"
+    assert parse_vtt(text) == [{"start": 1.0, "end": 2.0, "text": "line"}]
@@ -0,0 +1,71 @@
+import os
+import numpy as np
+from embedding_store import evict_embeddings, load_or_encode
+
+
+class FakeEmbedder:
+    """Encodes each text to a one-hot vector; counts the texts it was asked to encode."""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.encoded = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            vectors[i, hash(text) % self.dim] = 1.0
+        return vectors
+
+
+def stored(store_dir):
+    return sorted(name for name in os.listdir(store_dir) if name.endswith(".npy"))
+
+
+def test_second_lookup_reads_the_stored_file(tmp_path):
+    embedder = FakeEmbedder()
+    first = load_or_encode(embedder, "m", ["a", "b"], store_dir=str(tmp_path))
+    second = load_or_encode(embedder, "m", ["a", "b"], store_dir=str(tmp_path))
+    assert embedder.encoded == 2
+    assert np.array_equal(first, second)
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    store = str(tmp_path)
+    embedder = FakeEmbedder(dim=1024)  # 100 texts x 1024 x float16 = 200 KB per transcript
+    one, two, three = ([f"{name} {i}" for i in range(100)] for name in ("one", "two", "three"))
+
+    load_or_encode(embedder, "m", one, store_dir=store, max_mb=0.5)
+    load_or_encode(embedder, "m", two, store_dir=store, max_mb=0.5)
+    for age, name in enumerate(stored(store)):
+        os.utime(os.path.join(store, name), (1000 + age, 1000 + age))
+    load_or_encode(embedder, "m", one, store_dir=store, max_mb=0.5)  # hit: now the most recently used
+    assert embedder.encoded == 200
+
+    # the 0.5 MB budget holds two transcripts, so storing a third evicts "two"
+    load_or_encode(embedder, "m", three, store_dir=store, max_mb=0.5)
+    assert len(stored(store)) == 2
+    load_or_encode(embedder, "m", one, store_dir=store, max_mb=0.5)
+    assert embedder.encoded == 300  # still stored
+    load_or_encode(embedder, "m", two, store_dir=store, max_mb=0.5)
+    assert embedder.encoded == 400  # was evicted, encoded again
+
+
+def test_evict_stops_once_under_budget(tmp_path):
+    store = str(tmp_path)
+    for i in range(3):
+        np.save(os.path.join(store, f"{i}.npy"), np.zeros(64 * 1024, dtype=np.float16))  # 128 KB each
+        os.utime(os.path.join(store, f"{i}.npy"), (1000 + i, 1000 + i))
+    open(os.path.join(store, "x.npy.1.tmp.npy"), "wb").close()
+
+    evict_embeddings(store, max_mb=0.3)
+    assert stored(store) == ["1.npy", "2.npy", "x.npy.1.tmp.npy"]
+
+
+def test_the_file_just_written_is_kept_even_over_budget(tmp_path):
+    vectors = load_or_encode(FakeEmbedder(), "m", ["a"] * 10, store_dir=str(tmp_path), max_mb=0)
+    assert vectors.shape == (10, 256)
+    assert len(stored(str(tmp_path))) == 1
@@ -0,0 +1,83 @@
+import threading
+from instrumentation import SUBPROCESS_FAILURES, SUBPROCESS_SECONDS, Counter, Histogram, StageReport, attached, \
+    render_metrics, save_metrics_snapshot, traced_subprocess
+
+
+def stages_seen():
+    return {key[1] for key in SUBPROCESS_SECONDS._series}
+
+
+def run_fake_ffmpeg(returncode=0):
+    with traced_subprocess(["ffmpeg", "-i", "missing-input.mp4", "missing-output.mp4"]) as outcome:
+        outcome["returncode"] = returncode
+
+
+def test_current_stage():
+    report = StageReport()
+    assert report.current_stage() is None
+    report.start("transcribe")
+    assert report.current_stage() == "transcribe"
+    report.finish()
+    assert report.current_stage() is None
+
+
+def test_runs_are_labelled_with_the_running_stage():
+    report = StageReport()
+    with report.stage("cut_clips"):
+        run_fake_ffmpeg(returncode=1)
+    assert "cut_clips" in stages_seen()
+    assert SUBPROCESS_FAILURES._values[("ffmpeg", "cut_clips")] >= 1
+
+
+def test_helper_threads_attached_to_the_report_are_labelled():
+    report = StageReport()
+    with report.stage("stream_render"):
+        def helper():
+            with attached(report):
+                run_fake_ffmpeg()
+        thread = threading.Thread(target=helper)
+        thread.start()
+        thread.join()
+    assert "stream_render" in stages_seen()
+
+
+def test_runs_outside_any_stage_are_not_recorded():
+    thread = threading.Thread(target=run_fake_ffmpeg)
+    thread.start()
+    thread.join()
+    run_fake_ffmpeg()
+    assert "" not in stages_seen()
+
+
+def test_snapshots_from_other_processes_are_summed_per_series():
+    seconds = Histogram("test_seconds", "Test histogram", (1, 10))
+    failures = Counter("test_failures_total", "Test counter")
+    seconds.observe(0.5, stage="transcribe")
+    failures.inc(stage="render")
+
+    other_seconds = Histogram("test_seconds", "Test histogram", (1, 10))
+    other_failures = Counter("test_failures_total", "Test counter")
+    other_seconds.observe(5, stage="transcribe")
+    other_seconds.observe(20, stage="render")
+    other_failures.inc(2, stage="render")
+
+    text = seconds.render([other_seconds.snapshot()])
+    assert 'test_seconds_bucket{stage="transcribe",le="1"} 1' in text
+    assert 'test_seconds_bucket{stage="transcribe",le="10"} 2' in text
+    assert 'test_seconds_count{stage="transcribe"} 2' in text
+    assert 'test_seconds_sum{stage="transcribe"} 5.5' in text
+    assert 'test_seconds_bucket{stage="render",le="+Inf"} 1' in text
+    assert failures.render([other_failures.snapshot()]).endswith('test_failures_total{stage="render"} 3')
+
+
+def test_worker_snapshots_are_served_with_the_local_metrics(tmp_path):
+    with StageReport().stage("snapshot_stage"):
+        run_fake_ffmpeg(returncode=1)
+    assert save_metrics_snapshot("worker-1", str(tmp_path))
+    assert save_metrics_snapshot("worker-2", str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["worker-1.json", "worker-2.json"]
+
+    local = SUBPROCESS_FAILURES._values[("ffmpeg", "snapshot_stage")]
+    merged = render_metrics(str(tmp_path))
+    assert f'quickclips_subprocess_failures_total{{tool="ffmpeg",stage="snapshot_stage"}} {local * 3}' in merged
+    assert merged.count("# TYPE quickclips_subprocess_failures_total counter") == 1
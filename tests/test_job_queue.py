@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import threading
+import time
+import pytest
+import job_queue
+import worker
+from job_queue import LeaseLost, SqliteJobQueue
+from workspace import Workspace
+
+# What the job functions below saw, for the assertions
+calls = []
+
+
+def summarize(name, progress=None):
+    progress("transcribe")
+    return f"summarized_{name}.mp4"
+
+
+def stalls_until_taken_over(path, progress=None):
+    # Another worker takes the lease over while this one is still running the job
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE jobs SET lease_owner = 'other-worker'")
+    try:
+        for _ in range(500):
+            progress("transcribe")
+            time.sleep(0.01)
+    except LeaseLost:
+        calls.append("stopped")
+        raise
+    calls.append("ran to the end")
+    return "summarized_stale.mp4"
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SqliteJobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_claim_leases_the_oldest_job_once(queue):
+    first = queue.submit(summarize, "a")
+    queue.submit(summarize, "b")
+
+    job_id, function, args, kwargs, attempt = queue.claim("w1")
+    assert (job_id, args, kwargs, attempt) == (first, ["a"], {}, 1)
+    assert job_queue.resolve_function(function) is summarize
+    assert queue.get(first)["status"] == "running"
+
+    assert queue.claim("w2")[0] != first
+    assert queue.claim("w3") is None
+
+
+def test_expired_lease_is_claimed_again(queue):
+    job_id = queue.submit(summarize, "a")
+    queue.claim("w1", lease_seconds=-1)  # already expired
+
+    claimed = queue.claim("w2")
+    assert claimed[0] == job_id and claimed[-1] == 2
+    assert queue.get(job_id)["message"] == "Resuming (attempt 2)..."
+    # the first worker is fenced off
+    assert queue.heartbeat(job_id, "w1") is False
+    assert queue.heartbeat(job_id, "w2") is True
+
+
+def test_live_lease_is_not_claimed(queue):
+    queue.submit(summarize, "a")
+    queue.claim("w1", lease_seconds=60)
+    assert queue.claim("w2") is None
+
+
+def test_job_fails_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 2)
+    job_id = queue.submit(summarize, "a")
+    queue.claim("w1", lease_seconds=-1)
+    queue.claim("w2", lease_seconds=-1)
+
+    assert queue.claim("w3") is None
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "Worker lost 2 times"
+
+
+def test_finish_is_fenced_by_the_lease(queue):
+    job_id = queue.submit(summarize, "a")
+    queue.claim("w1", lease_seconds=-1)
+    queue.claim("w2")
+
+    queue.finish(job_id, "w1", result="stale.mp4")
+    assert queue.get(job_id)["status"] == "running"
+
+    queue.finish(job_id, "w2", result="summarized_a.mp4")
+    job = queue.get(job_id)
+    assert (job["status"], job["result"], job["percent"]) == ("done", "summarized_a.mp4", 100.0)
+
+
+def test_run_job_records_the_result_and_progress(queue):
+    job_id = queue.submit(summarize, "a")
+    claimed_id, function, args, kwargs, _ = queue.claim("w1")
+    worker.run_job(queue, "w1", claimed_id, function, args, kwargs)
+
+    job = queue.get(job_id)
+    assert (job["status"], job["result"]) == ("done", "summarized_a.mp4")
+
+
+def test_run_job_stops_when_the_lease_is_lost(queue, monkeypatch):
+    monkeypatch.setattr(worker, "LEASE_SECONDS", 0.03)
+    calls.clear()
+    job_id = queue.submit(stalls_until_taken_over, queue.path)
+    claimed_id, function, args, kwargs, _ = queue.claim("w1")
+    worker.run_job(queue, "w1", claimed_id, function, args, kwargs)
+
+    assert calls == ["stopped"]
+    job = queue.get(job_id)
+    assert job["status"] == "running" and job["result"] is None  # left to the new owner
+
+
+def test_workspace_resumes_completed_stages(tmp_path):
+    workspace = Workspace("job-1", root=str(tmp_path))
+    assert workspace.done("transcribe") is None
+    workspace.mark_done("download_audio", path=workspace.path("audio.m4a"))
+    workspace.mark_done("transcribe")
+
+    # a second worker picking the job up sees the same stages
+    resumed = Workspace("job-1", root=str(tmp_path))
+    assert resumed.done("download_audio") == {"path": workspace.path("audio.m4a")}
+    assert resumed.done("transcribe") == {}
+    assert set(resumed.completed()) == {"download_audio", "transcribe"}
+
+    resumed.cleanup()
+    assert Workspace("job-1", root=str(tmp_path)).completed() == {}
+
+
+def test_concurrent_stages_keep_every_entry(tmp_path):
+    # e.g. the background video download and the job thread finishing at the same time
+    workspace = Workspace("job-1", root=str(tmp_path))
+    threads = [threading.Thread(target=lambda n=n: [workspace.mark_done(f"stage_{n}_{i}") for i in range(50)])
+               for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(workspace.completed()) == 200
+    assert os.listdir(workspace.dir) == [".stages.json"]  # no temp file left behind
+
+
+def test_worker_processes_split_the_cores(monkeypatch):
+    monkeypatch.setattr(worker.os, "cpu_count", lambda: 8)
+    assert worker.threads_per_process(4) == 2
+    assert worker.threads_per_process(1) == 8
+    assert worker.threads_per_process(16) == 1
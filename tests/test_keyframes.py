@@ -0,0 +1,70 @@
+from keyframes import duration_until, edge_encode_args, next_keyframe, previous_keyframe, seek_at, seek_before
+
+KEYFRAMES = [0.0, 2.002, 4.004, 6.006]
+
+H264_STREAM = {"codec_name": "h264", "profile": "High", "level": 40, "pix_fmt": "yuv420p",
+               "time_base": "1/15360", "r_frame_rate": "30000/1001"}
+
+
+def test_previous_keyframe_snaps_back():
+    assert previous_keyframe(KEYFRAMES, 3.5) == 2.002
+    assert previous_keyframe(KEYFRAMES, 2.002) == 2.002
+    assert previous_keyframe(KEYFRAMES, 100.0) == 6.006
+
+
+def test_previous_keyframe_tolerates_rounded_times():
+    # A start printed with 3 decimals just below the keyframe still snaps to it
+    assert previous_keyframe(KEYFRAMES, 2.0015) == 2.002
+
+
+def test_next_keyframe():
+    assert next_keyframe(KEYFRAMES, 2.5) == 4.004
+    assert next_keyframe(KEYFRAMES, 4.004) == 4.004
+    assert next_keyframe(KEYFRAMES, 6.5) is None
+
+
+def test_previous_keyframe_before_first_and_empty():
+    assert previous_keyframe([1.0, 3.0], 0.5) == 1.0
+    assert previous_keyframe([], 5.0) == 0.0
+
+
+def test_seek_at_never_lands_before_the_keyframe():
+    # Keyframe pts that do not fall on a millisecond (1001/24000 timebase)
+    for pts in (2.0020833, 4.0041666, 0.0005, 12.3454999):
+        assert float(seek_at(pts)) >= pts
+        assert float(seek_at(pts)) - pts < 0.001
+
+
+def test_seek_at_keeps_exact_milliseconds():
+    assert seek_at(2.1) == "2.100"  # 2.1 * 1000 is 2100.0000000000005 in floating point
+    assert seek_at(4.004) == "4.004"
+
+
+def test_seek_before_never_lands_after_the_frame():
+    for t in (2.0020833, 4.0049999, 7.1):
+        assert float(seek_before(t)) <= t
+        assert t - float(seek_before(t)) < 0.001
+
+
+def test_duration_until_stops_before_the_next_keyframe():
+    start = seek_at(2.0020833)
+    end = 4.0041666
+    assert float(start) + float(duration_until(start, end)) <= end
+    assert duration_until("5.000", 4.0) == "0.000"
+
+
+def test_edge_encode_args_match_the_source():
+    args = edge_encode_args(H264_STREAM)
+    assert args[args.index("-profile:v") + 1] == "high"
+    assert args[args.index("-level:v") + 1] == "4.0"
+    assert args[args.index("-pix_fmt") + 1] == "yuv420p"
+    assert args[args.index("-r") + 1] == "30000/1001"
+    assert args[args.index("-video_track_timescale") + 1] == "15360"
+
+
+def test_edge_encode_args_refuse_unmatchable_streams():
+    assert edge_encode_args(None) is None
+    assert edge_encode_args(dict(H264_STREAM, profile="High 10")) is None
+    assert edge_encode_args(dict(H264_STREAM, pix_fmt="yuv422p")) is None
+    assert edge_encode_args(dict(H264_STREAM, codec_name="hevc")) is None
+    assert edge_encode_args(dict(H264_STREAM, level=-99)) is None
@@ -0,0 +1,78 @@
+from inference_profiles import get_profile
+from model_registry import EMBEDDING_MODEL, SUMMARIZER_MODEL, WHISPER_MODEL, estimate_model_bytes
+
+
+class FakeTensor:
+    """Just enough of a torch tensor for estimate_model_bytes."""
+    _next_ptr = 1
+
+    def __init__(self, numel, element_size):
+        self._numel = numel
+        self._element_size = element_size
+        self._ptr = FakeTensor._next_ptr
+        FakeTensor._next_ptr += 1
+
+    def numel(self):
+        return self._numel
+
+    def element_size(self):
+        return self._element_size
+
+    def data_ptr(self):
+        return self._ptr
+
+
+class FakeModule:
+    def __init__(self, parameters=(), buffers=(), state=None):
+        self._parameters = list(parameters)
+        self._buffers = list(buffers)
+        self._state = state or {}
+
+    def parameters(self):
+        return iter(self._parameters)
+
+    def buffers(self):
+        return iter(self._buffers)
+
+    def state_dict(self):
+        return dict(self._state)
+
+
+def test_counts_parameters_and_buffers():
+    weight, bias, running = FakeTensor(100, 4), FakeTensor(10, 4), FakeTensor(10, 4)
+    module = FakeModule([weight, bias], [running], {"w": weight, "b": bias, "r": running})
+    assert estimate_model_bytes(module) == 480
+
+
+def test_counts_packed_int8_weights():
+    # quantize_dynamic moves Linear weights into packed params that parameters() never yields
+    layer_norm = FakeTensor(10, 4)
+    packed_weight, packed_bias = FakeTensor(100, 1), FakeTensor(10, 4)
+    module = FakeModule([layer_norm], [], {
+        "norm.weight": layer_norm,
+        "linear._packed_params.dtype": "qint8",
+        "linear._packed_params._packed_params": (packed_weight, packed_bias),
+    })
+    assert estimate_model_bytes(module) == 40 + 100 + 40
+
+
+def test_tied_weights_count_once():
+    shared = FakeTensor(1000, 4)
+    module = FakeModule([shared], [], {"encoder.embed": shared, "decoder.embed": shared})
+    assert estimate_model_bytes(module) == 4000
+
+
+def test_looks_through_pipelines():
+    class Pipeline:
+        model = FakeModule([FakeTensor(5, 4)])
+
+    assert estimate_model_bytes(Pipeline()) == 20
+    assert estimate_model_bytes(object()) == 0
+
+
+def test_default_profile_is_the_fp32_setup():
+    profile = get_profile("balanced")
+    assert profile["quantize"] is False
+    assert profile["whisper_model"] == WHISPER_MODEL
+    assert profile["summarizer_model"] == SUMMARIZER_MODEL
+    assert profile["embedding_model"] == EMBEDDING_MODEL
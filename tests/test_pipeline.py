@@ -0,0 +1,59 @@
+import json
+import os
+from contextlib import nullcontext
+import pytest
+import pipeline
+from artifact_cache import ArtifactCache
+from inference_profiles import get_profile
+from workspace import Workspace
+
+SEGMENTS = [{"start": 0.0, "end": 4.0, "text": "Hello there."}]
+TIMESTAMPS = [{"summary_sentence": "Hello there", "timestamp": "0.0 --> 4.0"}]
+
+
+@pytest.fixture
+def offline_pipeline(tmp_path, monkeypatch):
+    """The pipeline with a private cache and folders, and every network download recorded."""
+    downloads = []
+    monkeypatch.setattr(pipeline, "artifact_cache", ArtifactCache(root=str(tmp_path / "cache")))
+    monkeypatch.setattr(pipeline, "DOWNLOAD_FOLDER", str(tmp_path / "downloads"))
+    monkeypatch.setattr(pipeline, "Workspace", lambda job_id: Workspace(job_id, root=str(tmp_path / "ws")))
+    monkeypatch.setattr(pipeline, "HostSlot", nullcontext)
+    monkeypatch.setattr(pipeline, "apply_thread_limit", lambda profile: None)
+    monkeypatch.setattr(pipeline, "fetch_youtube_captions",
+                        lambda url, path: downloads.append("captions") or (SEGMENTS, {"source": "manual",
+                                                                                      "language": "en"}))
+    monkeypatch.setattr(pipeline, "download_youtube_audio", lambda url, path: downloads.append("audio"))
+    monkeypatch.setattr(pipeline, "download_youtube_video", lambda url, path: downloads.append("video"))
+    return downloads
+
+
+def cache_first_run(source_key, transcript_source="captions:manual:en"):
+    profile = get_profile(None)
+    key = pipeline.pipeline_cache_key(source_key, transcript_source, "abstractive", profile)
+    pipeline._store_artifacts(key, {"segments": SEGMENTS, "summary": "Hello there.", "timestamps": TIMESTAMPS},
+                              source_key, transcript_source, profile)
+
+
+def test_repeat_url_skips_captions_and_downloads(offline_pipeline):
+    cache_first_run("youtube:dQw4w9WgXcQ")
+    result = pipeline.run_summarization_job("job1", youtube_url="https://youtu.be/dQw4w9WgXcQ", output_type="text")
+
+    assert offline_pipeline == []
+    assert result == "summarized_job1.json"
+    with open(os.path.join(pipeline.DOWNLOAD_FOLDER, result), "r", encoding="utf-8") as f:
+        assert json.load(f) == {"summary": "Hello there.", "timestamps": TIMESTAMPS}
+
+
+def test_unknown_url_fetches_captions(offline_pipeline):
+    assert pipeline.cached_youtube_artifacts("youtube:aaaaaaaaaaa") == (None, None)
+    pipeline.run_summarization_job("job2", youtube_url="https://youtu.be/aaaaaaaaaaa", output_type="text",
+                                   summarizer="centrality")
+    assert offline_pipeline[0] == "captions"
+
+
+def test_other_settings_miss_the_cache(offline_pipeline):
+    cache_first_run("youtube:dQw4w9WgXcQ")
+    assert pipeline.cached_youtube_artifacts("youtube:dQw4w9WgXcQ", "abstractive")[0] == "captions:manual:en"
+    assert pipeline.cached_youtube_artifacts("youtube:dQw4w9WgXcQ", "hierarchical") == (None, None)
+    assert pipeline.cached_youtube_artifacts("youtube:dQw4w9WgXcQ", profile="fast") == (None, None)
@@ -0,0 +1,82 @@
+import json
+from segment_planner import plan_segments
+from summarized_video import load_intervals
+
+NO_PADDING = {"lead_in": 0.0, "tail": 0.0}
+
+
+def spans(plan):
+    return [(seg["start"], seg["end"]) for seg in plan["segments"]]
+
+
+def test_sorts_by_time():
+    plan = plan_segments([(20.0, 25.0), (5.0, 8.0)], merge_gap=0.0, **NO_PADDING)
+    assert spans(plan) == [(5.0, 8.0), (20.0, 25.0)]
+    assert [seg["sources"] for seg in plan["segments"]] == [[1], [0]]
+
+
+def test_merge_gap_is_inclusive():
+    plan = plan_segments([(0.0, 5.0), (6.0, 9.0)], merge_gap=1.0, **NO_PADDING)
+    assert spans(plan) == [(0.0, 9.0)]
+    assert plan["segments"][0]["sources"] == [0, 1]
+
+
+def test_gap_just_over_merge_gap_is_kept_apart():
+    plan = plan_segments([(0.0, 5.0), (6.01, 9.0)], merge_gap=1.0, **NO_PADDING)
+    assert spans(plan) == [(0.0, 5.0), (6.01, 9.0)]
+
+
+def test_padding_can_close_a_gap():
+    # 1.5 s apart, but 0.25 s lead-in + 0.25 s tail brings them within the 1 s merge gap
+    plan = plan_segments([(2.0, 5.0), (6.5, 9.0)], merge_gap=1.0, lead_in=0.25, tail=0.25)
+    assert spans(plan) == [(1.75, 9.25)]
+
+
+def test_overlapping_and_contained_intervals_merge():
+    plan = plan_segments([(0.0, 10.0), (2.0, 4.0), (9.0, 12.0)], merge_gap=0.0, **NO_PADDING)
+    assert spans(plan) == [(0.0, 12.0)]
+    assert plan["segments"][0]["sources"] == [0, 1, 2]
+
+
+def test_lead_in_is_clamped_at_zero():
+    plan = plan_segments([(0.1, 3.0)], merge_gap=0.0, lead_in=0.5, tail=0.0)
+    assert spans(plan) == [(0.0, 3.0)]
+
+
+def test_tail_is_clamped_to_the_video_and_intervals_past_the_end_are_dropped():
+    plan = plan_segments([(5.0, 9.9), (12.0, 14.0)], merge_gap=0.0, lead_in=0.0, tail=0.5, video_duration=10.0)
+    assert spans(plan) == [(5.0, 10.0)]
+
+
+def test_empty_intervals_are_skipped_but_sources_keep_input_indices():
+    plan = plan_segments([(3.0, 3.0), (8.0, 7.0), (10.0, 12.0)], merge_gap=0.0, **NO_PADDING)
+    assert spans(plan) == [(10.0, 12.0)]
+    assert plan["segments"][0]["sources"] == [2]
+    assert plan["matched_count"] == 1
+
+
+def test_target_duration_skips_matches_that_do_not_fit():
+    # Summary order: 5 s, then 20 s (too long for a 10 s target), then 3 s (still fits)
+    intervals = [(0.0, 5.0), (30.0, 50.0), (60.0, 63.0)]
+    plan = plan_segments(intervals, merge_gap=0.0, target_duration=10.0, **NO_PADDING)
+    assert spans(plan) == [(0.0, 5.0), (60.0, 63.0)]
+    assert plan["total_duration"] == 8.0
+
+
+def test_target_duration_keeps_matches_that_merge_for_free():
+    intervals = [(0.0, 9.0), (2.0, 4.0), (40.0, 45.0)]
+    plan = plan_segments(intervals, merge_gap=0.0, target_duration=10.0, **NO_PADDING)
+    assert spans(plan) == [(0.0, 9.0)]
+    assert plan["segments"][0]["sources"] == [0, 1]
+
+
+def test_target_duration_always_keeps_the_first_match():
+    plan = plan_segments([(0.0, 30.0)], merge_gap=0.0, target_duration=10.0, **NO_PADDING)
+    assert spans(plan) == [(0.0, 30.0)]
+
+
+def test_load_intervals_keeps_row_numbers(tmp_path):
+    path = tmp_path / "timestamps.json"
+    path.write_text(json.dumps([{"timestamp": "4.0 --> 4.0"}, {"timestamp": "1.0 --> 2.5"}]))
+    assert load_intervals(str(path)) == [(4.0, 4.0), (1.0, 2.5)]
+    assert plan_segments(load_intervals(str(path)), **NO_PADDING)["segments"][0]["sources"] == [1]
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+import streaming_pipeline
+
+
+class JobStopped(Exception):
+    pass
+
+
+class FakeTokenizer:
+    model_max_length = 12  # 4 tokens per chunk after the special-token margin
+
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": [0]}
+
+
+class FakeSummarizer:
+    tokenizer = FakeTokenizer()
+
+    def __call__(self, text, **kwargs):
+        return [{"summary_text": text.split(".")[0] + "."}]
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Stand-ins for the models and ffmpeg; records every clip cut and whether its directory existed."""
+    cuts = []
+    windows = []
+
+    def transcribe(audio, model_name):
+        windows.append(len(audio))
+        time.sleep(0.01)
+        return [{"start": 0.0, "end": 1.0, "text": f"Window {len(windows)}."}]
+
+    def cut(video_file, start, end, clip_path, **kwargs):
+        time.sleep(0.05)
+        exists = os.path.isdir(os.path.dirname(clip_path))
+        cuts.append(exists)
+        if exists:
+            with open(clip_path, "wb") as f:
+                f.write(b"clip")
+        return exists
+
+    monkeypatch.setattr(streaming_pipeline, "load_audio_pcm", lambda path: np.zeros(16000 * 200, dtype=np.float32))
+    monkeypatch.setattr(streaming_pipeline, "split_windows",
+                        lambda audio, rate, minutes: [(i * 16000, (i + 1) * 16000) for i in range(200)])
+    monkeypatch.setattr(streaming_pipeline, "transcribe_segments", transcribe)
+    monkeypatch.setattr(streaming_pipeline, "get_summarizer", lambda name: FakeSummarizer())
+    monkeypatch.setattr(streaming_pipeline, "get_embedder", lambda name: None)
+    monkeypatch.setattr(streaming_pipeline, "encode_normalized",
+                        lambda embedder, texts: np.ones((len(texts), 4), dtype=np.float32))
+    monkeypatch.setattr(streaming_pipeline, "load_keyframe_index", lambda path: None)
+    monkeypatch.setattr(streaming_pipeline, "cut_clip", cut)
+    return cuts, windows
+
+
+def stream_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("stream-")]
+
+
+def test_stopping_the_job_stops_every_stage_before_removing_the_clips(fake_models, tmp_path):
+    cuts, windows = fake_models
+
+    def progress(stage, fraction=0.0, message=None):
+        if stage == "render":
+            raise JobStopped()  # e.g. LeaseLost from the worker's progress callback
+
+    with pytest.raises(JobStopped):
+        streaming_pipeline.stream_summarize_video("in.mp4", str(tmp_path / "out.mp4"), str(tmp_path),
+                                                  progress=progress)
+
+    assert stream_threads() == []
+    assert all(cuts)  # no clip was cut into an already deleted directory
+    assert len(windows) < 200  # transcription stopped early instead of running to the end
+    assert os.listdir(tmp_path) == []  # the clips directory was removed once the stages had exited
+
+
+def test_stage_generators_stop_between_items(fake_models):
+    stop = threading.Event()
+    stop.set()
+    assert list(streaming_pipeline.summarize_and_match([[{"text": "a."}]], FakeSummarizer(), None,
+                                                       stop=stop)) == []
+    assert list(streaming_pipeline.cut_as_matched(
+        [("a.", [{"timestamp": "0.0 --> 5.0"}])], "in.mp4", "clips", stop=stop)) == []
@@ -0,0 +1,106 @@
+import pytest
+import summarize_content
+from artifact_cache import ArtifactCache
+from sentences import split_summary_sentences
+from summarize_content import extract_main_points
+
+
+class HalvingSummarizer:
+    """Stand-in model: keeps the first half of each chunk's sentences."""
+    tokenizer = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, batch, **kwargs):
+        self.calls += 1
+        outputs = []
+        for chunk in batch:
+            sentences = split_summary_sentences(chunk)
+            kept = sentences[:max(1, len(sentences) // 2)]
+            outputs.append({"summary_text": ". ".join(kept) + "."})
+        return outputs
+
+
+def four_sentence_chunks(text, tokenizer, max_tokens=None):
+    sentences = split_summary_sentences(text)
+    return [". ".join(sentences[i:i + 4]) + "." for i in range(0, len(sentences), 4)]
+
+
+@pytest.fixture
+def summarizer(tmp_path, monkeypatch):
+    model = HalvingSummarizer()
+    monkeypatch.setattr(summarize_content, "get_summarizer", lambda name: model)
+    monkeypatch.setattr(summarize_content, "chunk_text_by_tokens", four_sentence_chunks)
+    monkeypatch.setattr(summarize_content, "level_cache", ArtifactCache(root=str(tmp_path / "cache" / "summary_levels")))
+    return model
+
+
+@pytest.fixture
+def transcript(tmp_path):
+    path = tmp_path / "transcript.txt"
+    path.write_text(" ".join(f"Sentence number {i}." for i in range(64)), encoding="utf-8")
+    return str(path)
+
+
+def summarize(transcript, tmp_path, **kwargs):
+    stats = {}
+    output = str(tmp_path / "out" / "summary.txt")
+    assert extract_main_points(transcript, output_file=output, stats=stats, **kwargs)
+    with open(output, "r", encoding="utf-8") as f:
+        return f.read(), stats
+
+
+def test_plain_summary_is_not_cached(summarizer, transcript, tmp_path):
+    first, stats = summarize(transcript, tmp_path)
+    assert stats["chunks"] == 16
+    assert len(split_summary_sentences(first)) == 32
+    assert summarize_content.level_cache.stats()["entries"] == 0
+
+    calls = summarizer.calls
+    second, stats = summarize(transcript, tmp_path)
+    assert second == first
+    assert summarizer.calls > calls  # ran the model again
+    assert stats["chunks"] == 16
+
+
+def test_hierarchical_levels_reduce_to_the_target(summarizer, transcript, tmp_path):
+    summary, stats = summarize(transcript, tmp_path, target_sentences=8)
+    assert [level["sentences"] for level in stats["levels"]] == [32, 16, 8]
+    assert [level["chunks"] for level in stats["levels"]] == [16, 8, 4]
+    assert len(split_summary_sentences(summary)) == 8
+
+
+def test_cached_levels_keep_their_chunk_counts(summarizer, transcript, tmp_path):
+    first, first_stats = summarize(transcript, tmp_path, target_sentences=8)
+    calls = summarizer.calls
+
+    second, stats = summarize(transcript, tmp_path, target_sentences=8)
+    assert second == first
+    assert summarizer.calls == calls  # every level came from the cache
+    assert stats["chunks"] == 16
+    assert stats["levels"] == first_stats["levels"]
+
+
+def test_a_new_target_reuses_the_map_level(summarizer, transcript, tmp_path):
+    summarize(transcript, tmp_path, target_sentences=16)
+    calls = summarizer.calls
+
+    _, stats = summarize(transcript, tmp_path, target_sentences=8)
+    assert [level["sentences"] for level in stats["levels"]] == [32, 16, 8]
+    assert stats["chunks"] == 16
+    # the reduce lengths depend on the target, so only the two reduce steps ran
+    # (8 + 4 chunks, 3 batches); the 16-chunk map level came from the cache
+    assert summarizer.calls == calls + 3
+
+
+def test_levels_have_their_own_root_and_budget():
+    assert summarize_content.level_cache.root != ArtifactCache().root
+    assert summarize_content.level_cache.max_bytes == summarize_content.SUMMARY_LEVEL_CACHE_MB * 1024 * 1024
+
+
+def test_level_entries_leave_the_artifact_cache_alone(summarizer, transcript, tmp_path):
+    artifacts = ArtifactCache(root=str(tmp_path / "cache"))
+    summarize(transcript, tmp_path, target_sentences=8)
+    assert summarize_content.level_cache.stats()["entries"] == 3
+    assert artifacts.stats()["entries"] == 0
@@ -0,0 +1,91 @@
+import summarized_video
+from keyframes import seek_at
+
+KEYFRAMES = [0.0, 2.0020833, 4.0041666, 6.00625]
+
+H264_STREAM = {"codec_name": "h264", "profile": "Main", "level": 31, "pix_fmt": "yuv420p",
+               "time_base": "1/24000", "r_frame_rate": "24000/1001"}
+
+
+def record_commands(monkeypatch, duration=None):
+    commands = []
+    monkeypatch.setattr(summarized_video, "_run_ffmpeg", commands.append)
+    monkeypatch.setattr(summarized_video, "_valid_clip", lambda path: True)
+    monkeypatch.setattr(summarized_video, "probe_media", lambda path: {"duration": duration})
+    return commands
+
+
+def option(cmd, name):
+    return cmd[cmd.index(name) + 1]
+
+
+def test_copy_cut_starts_on_the_previous_keyframe(monkeypatch):
+    commands = record_commands(monkeypatch)
+    assert summarized_video.cut_clip("in.mp4", 3.0, 5.0, "clip.mp4", keyframes=KEYFRAMES)
+    (cmd,) = commands
+    assert option(cmd, "-ss") == seek_at(2.0020833) == "2.003"
+    assert option(cmd, "-c:v") == "copy"
+
+
+def test_smart_cut_copies_whole_gops_and_encodes_edges_like_the_source(monkeypatch):
+    commands = record_commands(monkeypatch, duration=4.0)
+    assert summarized_video.cut_clip("in.mp4", 1.0, 5.0, "clip.mp4", keyframes=KEYFRAMES,
+                                     exact=True, stream=H264_STREAM)
+    head, body, tail, concat = commands
+    assert option(head, "-profile:v") == "main" and option(head, "-level:v") == "3.1"
+    assert float(option(head, "-ss")) + float(option(head, "-t")) <= 2.0020833
+    assert option(body, "-c:v") == "copy"
+    assert float(option(body, "-ss")) >= 2.0020833
+    assert float(option(body, "-ss")) + float(option(body, "-t")) <= 4.0041666
+    assert float(option(tail, "-ss")) <= 4.0041666
+    assert option(concat, "-c") == "copy"
+
+
+def test_smart_cut_falls_back_when_parameters_cannot_be_matched(monkeypatch):
+    commands = record_commands(monkeypatch, duration=4.0)
+    stream = dict(H264_STREAM, profile="High 4:4:4 Predictive")
+    assert summarized_video.cut_clip("in.mp4", 1.0, 5.0, "clip.mp4", keyframes=KEYFRAMES,
+                                     exact=True, stream=stream)
+    (cmd,) = commands
+    assert option(cmd, "-c:v") == "libx264" and "-profile:v" not in cmd
+
+
+def test_smart_cut_falls_back_when_the_joined_clip_is_off(monkeypatch):
+    commands = record_commands(monkeypatch, duration=6.0)
+    assert summarized_video.cut_clip("in.mp4", 1.0, 5.0, "clip.mp4", keyframes=KEYFRAMES,
+                                     exact=True, stream=H264_STREAM)
+    assert len(commands) == 5
+    assert option(commands[-1], "-c:v") == "libx264" and "-profile:v" not in commands[-1]
+
+
+def test_auto_renderer_copies_when_segments_hold_whole_gops():
+    index = {"keyframes": KEYFRAMES, "stream": H264_STREAM}
+    assert summarized_video.choose_renderer([(1.0, 5.0), (0.5, 4.5)], index) == "per_clip"
+
+
+def test_auto_renderer_keeps_single_pass_for_short_segments():
+    index = {"keyframes": KEYFRAMES, "stream": H264_STREAM}
+    assert summarized_video.choose_renderer([(1.0, 1.5), (2.5, 3.0), (1.0, 5.0)], index) == "single_pass"
+
+
+def test_auto_renderer_needs_a_reproducible_index():
+    intervals = [(1.0, 5.0)]
+    assert summarized_video.choose_renderer(intervals, None) == "single_pass"
+    assert summarized_video.choose_renderer(intervals, {"keyframes": KEYFRAMES, "stream": {}}) == "single_pass"
+
+
+def test_default_render_uses_exact_smart_cuts(monkeypatch, tmp_path):
+    timestamps = tmp_path / "timestamps.json"
+    timestamps.write_text('[{"timestamp": "1.0 --> 5.0"}]', encoding="utf-8")
+    index = {"keyframes": KEYFRAMES, "stream": H264_STREAM}
+    calls = []
+    monkeypatch.setattr(summarized_video, "probe_media", lambda path: {"duration": 6.0, "has_audio": True})
+    monkeypatch.setattr(summarized_video, "load_keyframe_index", lambda path: index)
+    monkeypatch.setattr(summarized_video, "render_single_pass", lambda *args, **kwargs: calls.append("single_pass"))
+    monkeypatch.setattr(summarized_video, "render_per_clip",
+                        lambda *args, exact_cuts=False, index=None: calls.append(("per_clip", exact_cuts)) or True)
+
+    output = str(tmp_path / "out.mp4")
+    assert summarized_video.create_summarized_video("in.mp4", str(timestamps), output, lead_in=0.0,
+                                                    tail=0.0) == output
+    assert calls == [("per_clip", True)]
@@ -0,0 +1,68 @@
+import numpy as np
+from voice_activity import compact_speech, remap_segments, to_original_time
+
+RATE = 100  # samples per second, so sample indices read as hundredths of a second
+
+
+def compacted(regions, join_gap=0.5, seconds=60):
+    audio = np.arange(seconds * RATE, dtype=np.float32)
+    return audio, *compact_speech(audio, regions, sample_rate=RATE, join_gap=join_gap)
+
+
+def test_offset_map_counts_the_joined_gaps():
+    _, _, offset_map = compacted([(10.0, 12.0), (30.0, 31.0), (50.0, 54.0)])
+    # each region starts after the previous one plus the 0.5 s gap
+    assert offset_map == [(0.0, 10.0, 2.0), (2.5, 30.0, 1.0), (4.0, 50.0, 4.0)]
+
+
+def test_remap_segments_back_to_the_original_timeline():
+    _, _, offset_map = compacted([(10.0, 12.0), (30.0, 31.0), (50.0, 54.0)])
+    segments = [
+        {"start": 0.5, "end": 1.5, "text": "first"},
+        {"start": 2.5, "end": 3.0, "text": "second"},
+        {"start": 4.25, "end": 6.0, "text": "third"},
+    ]
+    assert remap_segments(segments, offset_map) == [
+        {"start": 10.5, "end": 11.5, "text": "first"},
+        {"start": 30.0, "end": 30.5, "text": "second"},
+        {"start": 50.25, "end": 52.0, "text": "third"},
+    ]
+
+
+def test_segment_spanning_a_joined_gap_keeps_both_ends():
+    _, _, offset_map = compacted([(10.0, 12.0), (30.0, 31.0)])
+    # starts in the first region, ends in the second one
+    assert remap_segments([{"start": 1.0, "end": 2.75, "text": "x"}], offset_map) == [
+        {"start": 11.0, "end": 30.25, "text": "x"},
+    ]
+
+
+def test_times_inside_a_gap_clamp_to_the_region_before_it():
+    _, _, offset_map = compacted([(10.0, 12.0), (30.0, 31.0)])
+    assert to_original_time(2.25, offset_map) == 12.0
+
+
+def test_segment_entirely_inside_a_gap_is_dropped():
+    _, _, offset_map = compacted([(10.0, 12.0), (30.0, 31.0)])
+    assert remap_segments([{"start": 2.1, "end": 2.4, "text": "x"}], offset_map) == []
+
+
+def test_no_offset_map_leaves_times_alone():
+    assert to_original_time(7.5, []) == 7.5
+
+
+def test_compact_audio_slices_match_an_eager_join():
+    audio, compact, _ = compacted([(10.0, 12.0), (30.0, 31.0), (50.0, 54.0)])
+    gap = np.zeros(50, dtype=np.float32)
+    eager = np.concatenate([audio[1000:1200], gap, audio[3000:3100], gap, audio[5000:5400]])
+    assert len(compact) == len(eager)
+    assert np.array_equal(np.asarray(compact), eager)
+    for a, b in [(0, 10), (190, 260), (245, 255), (290, 700), (700, 900)]:
+        assert np.array_equal(compact[a:b], eager[a:b])
+
+
+def test_no_speech_gives_empty_audio():
+    _, compact, offset_map = compacted([])
+    assert len(compact) == 0
+    assert offset_map == []
+    assert np.asarray(compact).shape == (0,)
@@ -1,34 +1,130 @@
 import os
-import torch
-import whisper
+import json
+import numpy as np
+from model_registry import WHISPER_MODEL, get_whisper_model
+from download_audio import SAMPLE_RATE, load_audio_pcm
+from chunked_transcription import TRANSCRIBE_WORKERS, transcribe_long_form
+from voice_activity import VAD_ENABLED, remap_segments, speech_only
 
-def transcribe_audio(audio_file, output_dir="downloads", output_file="transcript.txt"):
+# Audio at least this long is transcribed in parallel windows, when QUICKCLIPS_TRANSCRIBE_WORKERS > 1
+LONG_FORM_MIN_SECONDS = float(os.environ.get("QUICKCLIPS_LONG_FORM_MIN_SECONDS", "1200"))
+
+
+def segments_to_text(segments):
+    """Join timestamped segments into the plain transcript text."""
+    return " ".join(seg["text"] for seg in segments if seg["text"])
+
+
+def write_transcript_files(segments, output_txt_file=None, output_json_file=None):
+    """Write the plain-text and/or timestamped JSON transcript from the same segments."""
+    if output_txt_file:
+        os.makedirs(os.path.dirname(output_txt_file) or ".", exist_ok=True)
+        with open(output_txt_file, "w", encoding="utf-8") as f:
+            f.write(segments_to_text(segments))
+        print(f"Transcript saved at {output_txt_file}")
+
+    if output_json_file:
+        os.makedirs(os.path.dirname(output_json_file) or ".", exist_ok=True)
+        with open(output_json_file, "w", encoding="utf-8") as f:
+            json.dump(segments, f, indent=4)
+        print(f"✅ Transcript with timestamps saved at {output_json_file}")
+
+
+def transcribe_segments(audio, model_name=WHISPER_MODEL):
+    """Single Whisper decode pass over a path or 16 kHz array; returns {"start", "end", "text"} segments."""
+    # Whisper model is loaded once per process and shared across requests
+    model = get_whisper_model(model_name)
+
+    if isinstance(audio, str):
+        print(f"Transcribing {audio}...")
+    else:
+        print(f"Transcribing {len(audio) / SAMPLE_RATE:.1f}s of in-memory audio...")
+        audio = np.asarray(audio, dtype=np.float32)  # no copy unless it is a lazy view
+    result = model.transcribe(audio)
+
+    segments = []
+    for seg in result["segments"]:
+        segments.append({
+            "start": seg["start"],
+            "end": seg["end"],
+            "text": seg["text"].strip()
+        })
+    return segments
+
+
+def transcribe_with_timestamps(audio_file, output_txt_file="downloads/transcript.txt",
+                               output_json_file="downloads/transcript.json", model_name=WHISPER_MODEL,
+                               long_form=None, vad=None, stats=None):
     """
-    Transcribe audio to text and save as transcript.txt in downloads folder.
+    Run Whisper once and write both transcript artifacts.
+    The plain text is built from the segments so the .txt and .json always agree.
+    `audio_file` is either a path or a 16 kHz mono float32 array (see load_audio_pcm).
+    long_form=True splits the audio at silences and transcribes the windows in parallel
+    (see chunked_transcription); by default this is used for in-memory audio of
+    LONG_FORM_MIN_SECONDS or more when more than one worker is configured.
+    vad=True first drops silence / non-speech (see voice_activity) and maps the segment
+    times back onto the original timeline; by default it is used for in-memory audio
+    when QUICKCLIPS_VAD=1.
+    If a `stats` dict is given it receives the voice-activity report.
+    Pass None for either output path to skip writing that file.
+    Returns the list of segments, or None on failure.
     """
-    if not os.path.exists(audio_file):
+    if audio_file is None:
+        print("Error: no audio to transcribe.")
+        return None
+    if isinstance(audio_file, str) and not os.path.exists(audio_file):
         print(f"Error: {audio_file} not found.")
         return None
 
-    # Create downloads folder if not exists
-    os.makedirs(output_dir, exist_ok=True)
+    if vad is None:
+        vad = VAD_ENABLED and not isinstance(audio_file, str)
 
-    # Load Whisper model (choose from: tiny, base, small, medium, large)
-    print("Loading Whisper model...")
-    model = whisper.load_model("base")  # "tiny" is faster, "base" is balanced
+    offset_map = None
+    if vad:
+        if isinstance(audio_file, str):
+            audio_file = load_audio_pcm(audio_file)
+            if audio_file is None:
+                return None
+        audio_file, offset_map, report = speech_only(audio_file)
+        if stats is not None:
+            stats["voice_activity"] = report
 
-    # Transcribe
-    print(f"Transcribing {audio_file}...")
-    result = model.transcribe(audio_file)
+    if long_form is None:
+        long_form = (not isinstance(audio_file, str)
+                     and len(audio_file) / SAMPLE_RATE >= LONG_FORM_MIN_SECONDS
+                     and TRANSCRIBE_WORKERS > 1)
 
-    transcript_text = result["text"]
+    if long_form:
+        if isinstance(audio_file, str):
+            audio_file = load_audio_pcm(audio_file)
+            if audio_file is None:
+                return None
+        # Silence-aligned windows transcribed in parallel, one model per worker process
+        segments = transcribe_long_form(audio_file, model_name=model_name)
+    elif len(audio_file) == 0:
+        segments = []  # no speech detected
+    else:
+        segments = transcribe_segments(audio_file, model_name=model_name)
 
-    # Save transcript
-    transcript_path = os.path.join(output_dir, output_file)
-    with open(transcript_path, "w", encoding="utf-8") as f:
-        f.write(transcript_text)
+    if offset_map is not None:
+        segments = remap_segments(segments, offset_map)
 
-    print(f"Transcript saved at {transcript_path}")
-    return transcript_path
+    write_transcript_files(segments, output_txt_file, output_json_file)
+    return segments
 
 
+def transcribe_audio(audio_file, output_dir="downloads", output_file="transcript.txt"):
+    """
+    Transcribe audio to text and save as transcript.txt in downloads folder.
+    Thin wrapper around transcribe_with_timestamps(); prefer that function when
+    the timestamped segments are needed too, so Whisper only runs once.
+    """
+    # Create downloads folder if not exists
+    os.makedirs(output_dir, exist_ok=True)
+
+    transcript_path = os.path.join(output_dir, output_file)
+    segments = transcribe_with_timestamps(audio_file, output_txt_file=transcript_path,
+                                          output_json_file=None)
+    if segments is None:
+        return None
+    return transcript_path
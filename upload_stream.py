@@ -0,0 +1,58 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from flask import Request
+from workspace import WORKSPACE_ROOT
+
+
+class HashingUpload:
+    """
+    Writable file for one uploaded file. Chunks go straight to disk as the form parser
+    reads them and are hashed on the way, so the upload is never buffered in memory or
+    read a second time. Call move_to() to keep the file; otherwise close() deletes it.
+    """
+
+    def __init__(self, directory=WORKSPACE_ROOT):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.name = tempfile.mkstemp(dir=directory, suffix=".part")
+        self._file = os.fdopen(fd, "w+b")
+        self._digest = hashlib.sha256()
+        self._kept = False
+        self.size = 0
+
+    def write(self, data):
+        self._digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        """SHA-256 of everything written so far (same value as artifact_cache.file_content_hash)."""
+        return self._digest.hexdigest()
+
+    def move_to(self, path):
+        """Close the upload and move it to `path` (a rename when both are on one filesystem)."""
+        self._file.close()
+        shutil.move(self.name, path)
+        self.name = path
+        self._kept = True
+        return path
+
+    def close(self):
+        self._file.close()
+        if not self._kept:
+            try:
+                os.remove(self.name)
+            except OSError:
+                pass
+
+    def __getattr__(self, name):
+        # seek / read / tell / flush / closed for the form parser and FileStorage
+        return getattr(self._file, name)
+
+
+class StreamingUploadRequest(Request):
+    """Request whose file uploads are streamed into HashingUpload files instead of spooled temp files."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingUpload()
@@ -0,0 +1,201 @@
+import bisect
+import os
+import numpy as np
+from download_audio import SAMPLE_RATE
+
+# Skip silence / non-speech before Whisper (QUICKCLIPS_VAD=1). Off by default: Whisper then
+# sees different audio, so transcripts (and the summaries built on them) change
+VAD_ENABLED = os.environ.get("QUICKCLIPS_VAD", "0") == "1"
+
+FRAME_SECONDS = 0.03       # webrtcvad accepts 10, 20 or 30 ms frames
+MIN_SPEECH_SECONDS = 0.3   # shorter bursts are treated as noise
+MIN_SILENCE_SECONDS = 0.6  # shorter pauses stay inside the surrounding speech region
+PADDING_SECONDS = 0.2      # kept either side of each region so word edges are not clipped
+JOIN_GAP_SECONDS = 0.3     # silence inserted between regions so Whisper sees a pause
+
+# Energy detector: frames this far above the noise floor count as speech; the threshold is
+# kept between these levels so continuous, quiet speech is never mistaken for the floor
+ENERGY_MARGIN_DB = 12.0
+ENERGY_MIN_DBFS = -50.0
+ENERGY_MAX_DBFS = -40.0
+
+
+def _webrtc_speech_frames(audio, sample_rate, frame_seconds, aggressiveness=3):
+    """Per-frame speech flags from webrtcvad, or None if it is not installed."""
+    try:
+        import webrtcvad
+    except ImportError:
+        return None
+
+    vad = webrtcvad.Vad(aggressiveness)
+    frame = int(sample_rate * frame_seconds)
+    flags = []
+    for start in range(0, len(audio) - frame + 1, frame):
+        pcm = (np.clip(np.asarray(audio[start:start + frame]), -1.0, 1.0) * 32767).astype(np.int16)
+        flags.append(vad.is_speech(pcm.tobytes(), sample_rate))
+    return np.array(flags, dtype=bool)
+
+
+def _energy_speech_frames(audio, sample_rate, frame_seconds):
+    """Per-frame speech flags from loudness relative to the estimated noise floor."""
+    frame = int(sample_rate * frame_seconds)
+    block = frame * 2000  # about a minute of frames at a time
+    levels = []
+    for start in range(0, len(audio) - len(audio) % frame, block):
+        frames = np.asarray(audio[start:start + block], dtype=np.float32)
+        frames = frames[:len(frames) - len(frames) % frame].reshape(-1, frame)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        levels.append(20 * np.log10(np.maximum(rms, 1e-6)))
+    if not levels:
+        return np.zeros(0, dtype=bool)
+
+    db = np.concatenate(levels)
+    noise_floor = np.percentile(db, 10)
+    threshold = min(max(noise_floor + ENERGY_MARGIN_DB, ENERGY_MIN_DBFS), ENERGY_MAX_DBFS)
+    return db > threshold
+
+
+def detect_speech_regions(audio, sample_rate=SAMPLE_RATE, frame_seconds=FRAME_SECONDS,
+                          min_speech=MIN_SPEECH_SECONDS, min_silence=MIN_SILENCE_SECONDS,
+                          padding=PADDING_SECONDS):
+    """
+    CPU-only speech detection over 16 kHz mono audio.
+    Uses webrtcvad when installed (also rejects most music), otherwise an energy detector.
+    Returns a list of (start_seconds, end_seconds) speech regions.
+    """
+    flags = _webrtc_speech_frames(audio, sample_rate, frame_seconds)
+    if flags is None:
+        flags = _energy_speech_frames(audio, sample_rate, frame_seconds)
+
+    regions = []
+    start = None
+    for i, is_speech in enumerate(flags):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            regions.append([start * frame_seconds, i * frame_seconds])
+            start = None
+    if start is not None:
+        regions.append([start * frame_seconds, len(flags) * frame_seconds])
+
+    # Bridge short pauses, then drop short blips
+    merged = []
+    for region in regions:
+        if merged and region[0] - merged[-1][1] < min_silence:
+            merged[-1][1] = region[1]
+        else:
+            merged.append(region)
+    merged = [r for r in merged if r[1] - r[0] >= min_speech]
+
+    duration = len(audio) / sample_rate
+    padded = []
+    for start, end in merged:
+        start, end = max(0.0, start - padding), min(duration, end + padding)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+class CompactAudio:
+    """
+    The speech regions of `audio` joined by short silences, read lazily: a slice copies
+    only the samples it covers out of the (possibly memory-mapped) source, so the
+    compacted audio is never held in memory as a whole.
+    """
+
+    def __init__(self, audio, spans, length):
+        self._audio = audio
+        self._spans = spans  # (compact_start, source_start, length) in samples
+        self._starts = [span[0] for span in spans]
+        self._length = length
+        self.dtype = np.dtype(np.float32)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("CompactAudio only supports slicing")
+        start, stop, step = key.indices(self._length)
+        if step != 1:
+            raise ValueError("CompactAudio only supports contiguous slices")
+        out = np.zeros(max(0, stop - start), dtype=np.float32)  # gaps stay silent
+        i = max(0, bisect.bisect_right(self._starts, start) - 1)
+        for compact_start, source_start, length in self._spans[i:]:
+            if compact_start >= stop:
+                break
+            a, b = max(start, compact_start), min(stop, compact_start + length)
+            if b > a:
+                out[a - start:b - start] = self._audio[source_start + a - compact_start:
+                                                       source_start + b - compact_start]
+        return out
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[:]
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+
+def compact_speech(audio, regions, sample_rate=SAMPLE_RATE, join_gap=JOIN_GAP_SECONDS):
+    """
+    Join the speech regions (with a short silence between them) without copying them.
+    Returns (compact_audio, offset_map) where compact_audio is a CompactAudio view and
+    offset_map rows are (compact_start, original_start, length) in seconds.
+    """
+    gap = int(join_gap * sample_rate)
+    spans = []
+    offset_map = []
+    position = 0
+    for start, end in regions:
+        a, b = int(start * sample_rate), int(end * sample_rate)
+        if b <= a:
+            continue
+        if spans:
+            position += gap
+        spans.append((position, a, b - a))
+        offset_map.append((position / sample_rate, a / sample_rate, (b - a) / sample_rate))
+        position += b - a
+    return CompactAudio(audio, spans, position), offset_map
+
+
+def to_original_time(t, offset_map):
+    """Map a time on the compacted audio back to the original timeline."""
+    if not offset_map:
+        return t
+    starts = [row[0] for row in offset_map]
+    i = max(0, bisect.bisect_right(starts, t) - 1)
+    compact_start, original_start, length = offset_map[i]
+    return original_start + min(max(t - compact_start, 0.0), length)
+
+
+def remap_segments(segments, offset_map):
+    remapped = []
+    for seg in segments:
+        start = round(to_original_time(seg["start"], offset_map), 3)
+        end = round(to_original_time(seg["end"], offset_map), 3)
+        if end > start:
+            remapped.append(dict(seg, start=start, end=end))
+    return remapped
+
+
+def speech_only(audio, sample_rate=SAMPLE_RATE):
+    """
+    Run the pre-pass: returns (compact_audio, offset_map, report), where the report
+    says how much of the audio was skipped.
+    """
+    regions = detect_speech_regions(audio, sample_rate)
+    compact, offset_map = compact_speech(audio, regions, sample_rate)
+
+    total = len(audio) / sample_rate
+    speech = sum(row[2] for row in offset_map)
+    report = {
+        "total_seconds": round(total, 2),
+        "speech_seconds": round(speech, 2),
+        "skipped_seconds": round(total - speech, 2),
+        "skipped_ratio": round((total - speech) / total, 3) if total else 0.0,
+        "regions": len(offset_map),
+    }
+    print(f"🔇 Voice activity: {report['speech_seconds']:.0f}s of speech in {report['regions']} regions, "
+          f"skipping {report['skipped_seconds']:.0f}s ({report['skipped_ratio']:.0%})")
+    return compact, offset_map, report
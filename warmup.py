@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+import traceback
+from model_registry import get_embedder, get_summarizer, get_whisper_model
+from inference_profiles import get_profile
+
+# Preload the default profile's models in the background after startup (QUICKCLIPS_WARMUP=0 to skip)
+WARMUP_ENABLED = os.environ.get("QUICKCLIPS_WARMUP", "1") == "1"
+
+
+class Warmup:
+    """
+    Loads the models one profile needs on a background thread, so the server can
+    accept connections (and answer health checks) while torch and the weights load.
+    """
+
+    def __init__(self, profile=None):
+        self.profile = profile
+        self.state = "idle"  # idle -> warming -> ready / failed
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start warming up once; later calls do nothing."""
+        with self._lock:
+            if self.state != "idle":
+                return
+            self.state = "warming"
+            self.started_at = time.time()
+        threading.Thread(target=self._run, name="warmup", daemon=True).start()
+
+    def _run(self):
+        try:
+            profile = get_profile(self.profile)
+            print(f"🔥 Warming up models for the '{profile['name']}' profile...")
+            get_whisper_model(profile["whisper_model"])
+            get_summarizer(profile["summarizer_model"])
+            get_embedder(profile["embedding_model"])
+            state, error = "ready", None
+            print(f"✅ Warmup finished in {time.time() - self.started_at:.1f}s")
+        except Exception as e:
+            traceback.print_exc()
+            state, error = "failed", str(e)
+        with self._lock:
+            self.state, self.error, self.finished_at = state, error, time.time()
+
+    def ready(self):
+        """True once the models are loaded, or always when warmup is not used (models load on demand)."""
+        return self.state == "ready" or (self.state == "idle" and not WARMUP_ENABLED)
+
+    def status(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "error": self.error,
+                "seconds": round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else None,
+            }
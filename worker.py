@@ -0,0 +1,157 @@
+"""
+Standalone summarization workers, fed by the SQLite job queue the web tier writes to
+(run the server with QUICKCLIPS_QUEUE=sqlite).
+
+    python worker.py --processes 4 --profile balanced
+
+Each process keeps its own models warm and runs one job at a time. A job is leased while
+it runs and the lease is renewed by a heartbeat; if the process dies, the lease runs out,
+another worker picks the job up and continues from the last completed stage in its
+workspace. The supervisor restarts dead processes and stops them all on SIGTERM / Ctrl-C,
+letting running jobs finish first.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from job_queue import LEASE_SECONDS, QUEUE_DB, LeaseLost, SqliteJobQueue, resolve_function
+from jobs import progress_fields
+from inference_profiles import PROFILES
+from workspace import HOST_MAX_PIPELINES
+from warmup import WARMUP_ENABLED, Warmup
+from instrumentation import save_metrics_snapshot
+
+# Idle workers check the queue this often
+POLL_SECONDS = 1.0
+
+# Idle workers also re-save their metrics snapshot this often (e.g. for warmup model loads);
+# it is always saved after each job
+METRICS_SAVE_SECONDS = 15.0
+
+
+def run_job(queue, worker_id, job_id, function, args, kwargs):
+    """
+    Run one leased job, heartbeating until it returns, and record its outcome.
+    If the lease is lost (a stall longer than LEASE_SECONDS let another worker take the
+    job over), the job is stopped at its next progress update with LeaseLost, and its
+    workspace is left to the worker that owns it now.
+    """
+    finished = threading.Event()
+    lost = []
+
+    def heartbeat():
+        while not finished.wait(LEASE_SECONDS / 3):
+            try:
+                renewed = queue.heartbeat(job_id, worker_id)
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not renew the lease on job {job_id}: {e}")
+                continue
+            if not renewed:
+                print(f"⚠️ Lost the lease on job {job_id}, stopping it")
+                lost.append(job_id)
+                return
+
+    def progress(stage, fraction=0.0, message=None):
+        if lost:
+            raise LeaseLost(f"Job {job_id} was taken over by another worker")
+        queue.update(job_id, **progress_fields(stage, fraction, message))
+
+    threading.Thread(target=heartbeat, name=f"heartbeat-{job_id}", daemon=True).start()
+    try:
+        result = resolve_function(function)(*args, progress=progress, **kwargs)
+        queue.finish(job_id, worker_id, result=result)
+    except LeaseLost as e:
+        print(f"🛑 {e}")
+    except Exception as e:
+        traceback.print_exc()
+        queue.finish(job_id, worker_id, error=str(e))
+    finally:
+        finished.set()
+
+
+def work(queue_path, profile):
+    """Worker process: warm the models, then claim and run jobs until told to stop."""
+    # SIGTERM (sent by the supervisor) stops the loop once the current job is done;
+    # Ctrl-C reaches the whole process group, so only the supervisor reacts to it
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if WARMUP_ENABLED:
+        Warmup(profile).start()
+
+    queue = SqliteJobQueue(queue_path)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    # The stages' metrics live in this process; the web server's /metrics serves them from here
+    metrics_name = f"worker-{socket.gethostname()}-{os.getpid()}"
+    metrics_saved = 0.0
+    print(f"👷 Worker {worker_id} waiting for jobs")
+    while not stopping:
+        if time.monotonic() - metrics_saved >= METRICS_SAVE_SECONDS:
+            save_metrics_snapshot(metrics_name)
+            metrics_saved = time.monotonic()
+        claimed = queue.claim(worker_id)
+        if claimed is None:
+            time.sleep(POLL_SECONDS)
+            continue
+        job_id, function, args, kwargs, attempt = claimed
+        print(f"▶️ Worker {worker_id} running job {job_id} (attempt {attempt})")
+        run_job(queue, worker_id, job_id, function, args, kwargs)
+        save_metrics_snapshot(metrics_name)
+        metrics_saved = time.monotonic()
+
+
+def threads_per_process(processes):
+    """Intra-op threads for each worker process: they run one job each, so the cores are split between them."""
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run QuickClips summarization workers")
+    parser.add_argument("--processes", type=int, default=HOST_MAX_PIPELINES, help="Worker processes on this host")
+    parser.add_argument("--profile", choices=list(PROFILES), default=None, help="Inference profile to warm up")
+    parser.add_argument("--queue", default=QUEUE_DB, help="SQLite queue file shared with the web server")
+    args = parser.parse_args(argv)
+
+    # Fresh interpreters, so no torch / thread-pool state is inherited from the supervisor.
+    # They read their thread share from the environment (inference_profiles.JOB_THREADS),
+    # which would otherwise split the cores by the web server's MAX_RUNNING_JOBS instead
+    context = multiprocessing.get_context("spawn")
+    os.environ.setdefault("QUICKCLIPS_JOB_THREADS", str(threads_per_process(args.processes)))
+    SqliteJobQueue(args.queue)  # create the schema once, before the workers race for it
+
+    stopping = []
+
+    def shutdown(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    def spawn():
+        process = context.Process(target=work, args=(args.queue, args.profile), daemon=False)
+        process.start()
+        return process
+
+    processes = [spawn() for _ in range(args.processes)]
+    while not stopping:
+        for i, process in enumerate(processes):
+            if not process.is_alive():
+                print(f"⚠️ Worker {process.pid} exited with code {process.exitcode}, restarting")
+                processes[i] = spawn()
+        time.sleep(POLL_SECONDS)
+
+    print("🛑 Stopping workers after their current jobs...")
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
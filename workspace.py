@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; only the per-process job limit applies there
+    fcntl = None
+
+# Every job gets its own directory under here for downloads and intermediate files
+WORKSPACE_ROOT = os.path.abspath(os.environ.get("QUICKCLIPS_WORKSPACE_DIR", "workspaces"))
+
+# Pipelines allowed to run at once on this host, across all server / worker processes
+HOST_MAX_PIPELINES = int(os.environ.get("QUICKCLIPS_HOST_MAX_PIPELINES", "4"))
+
+
+class Workspace:
+    """
+    Job-scoped scratch directory. All stages write their files here, so concurrent
+    jobs never share a path, and the whole directory is removed on cleanup().
+    Use as a context manager to guarantee cleanup.
+    """
+
+    # mark_done is called from the job thread and from its background downloads
+    _stages_lock = threading.Lock()
+
+    def __init__(self, job_id=None, root=WORKSPACE_ROOT):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.dir = os.path.join(root, self.job_id)
+        os.makedirs(self.dir, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _stages_file(self):
+        return self.path(".stages.json")
+
+    def completed(self):
+        """Stages recorded with mark_done(), mapped to the details stored with them."""
+        try:
+            with open(self._stages_file(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def mark_done(self, stage, **details):
+        """
+        Record that `stage` finished and its artifacts are complete, so a job picked up
+        again after a crash can continue from here. Written atomically (temp file + rename);
+        the read-modify-write is serialized, so concurrent stages never drop each other's entry.
+        """
+        with self._stages_lock:
+            stages = self.completed()
+            stages[stage] = details
+            fd, tmp = tempfile.mkstemp(prefix=".stages.", suffix=".tmp", dir=self.dir)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(stages, f)
+                os.replace(tmp, self._stages_file())
+            except OSError:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+
+    def done(self, stage):
+        """Details stored for a completed stage, or None if it has not completed."""
+        return self.completed().get(stage)
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
+
+
+class HostSlot:
+    """
+    Host-wide concurrency limit built on file locks: a pipeline holds one of
+    HOST_MAX_PIPELINES lock files while it runs. The OS releases the lock if the
+    process dies, so a crashed job never leaks its slot.
+    """
+
+    def __init__(self, limit=HOST_MAX_PIPELINES, root=WORKSPACE_ROOT, poll_seconds=1.0):
+        self.limit = limit
+        self.root = root
+        self.poll_seconds = poll_seconds
+        self._handle = None
+
+    def __enter__(self):
+        if fcntl is None or self.limit <= 0:
+            return self
+        os.makedirs(self.root, exist_ok=True)
+        while True:
+            for slot in range(self.limit):
+                handle = open(os.path.join(self.root, f".slot_{slot}.lock"), "w")
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    handle.close()
+                    continue
+                self._handle = handle
+                return self
+            time.sleep(self.poll_seconds)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._handle is not None:
+            fcntl.flock(self._handle, fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+        return False